@@ -40,6 +40,11 @@ def test_mflistfile():
     cum = mflist.get_cumulative(names='PERCENT_DISCREPANCY')
     assert isinstance(cum, np.ndarray)
 
+    assert len(mflist.null_entries) == 2
+    for null_entries in mflist.null_entries:
+        assert list(null_entries.keys()) == mflist.entries
+        assert np.all(np.isnan(list(null_entries.values())))
+
     # if pandas is installed
     try:
         import pandas
@@ -56,5 +61,141 @@ def test_mflistfile():
     return
 
 
+def test_mflistfile_multiple_budgets():
+    pth = os.path.join('..', 'examples', 'data', 'preserve_unitnums')
+    list_file = os.path.join(pth, 'testsfr2_tab.lst')
+    assert os.path.exists(list_file)
+    mflist = flopy.utils.MfListBudget(list_file)
+    assert mflist.isvalid()
+
+    inc, cum = mflist.get_budget()
+    assert inc.shape == (51,)
+    kstpkper = mflist.get_kstpkper()
+    assert kstpkper[:3] == [(9, 0), (29, 0), (29, 1)]
+    assert kstpkper[-1] == (29, 49)
+    times = mflist.get_times()
+    assert np.allclose(times[:3], [2.9066, 30., 60.])
+    assert times[-1] == 1500.
+    assert np.isclose(inc['STREAM_LEAKAGE_IN'][-1], 0.035585)
+    assert np.isclose(cum['TOTAL_OUT'][-1], 53699796.)
+
+    # the same budgets should be parsed from a file with dos line endings
+    cpth = os.path.join('temp', 't011')
+    if not os.path.isdir(cpth):
+        os.makedirs(cpth)
+    dos_file = os.path.join(cpth, 'testsfr2_tab_dos.lst')
+    with open(list_file, 'rb') as fin:
+        data = fin.read().replace(b'\r\n', b'\n')
+    with open(dos_file, 'wb') as fout:
+        fout.write(data.replace(b'\n', b'\r\n'))
+    dos = flopy.utils.MfListBudget(dos_file)
+    assert dos.get_kstpkper() == kstpkper
+    for name in inc.dtype.names:
+        assert np.array_equal(dos.inc[name], inc[name])
+        assert np.array_equal(dos.cum[name], cum[name])
+
+    return
+
+
+def test_mflistfile_update():
+    pth = os.path.join('..', 'examples', 'data', 'preserve_unitnums')
+    list_file = os.path.join(pth, 'testsfr2_tab.lst')
+    full = flopy.utils.MfListBudget(list_file)
+    with open(list_file, 'rb') as f:
+        data = f.read()
+
+    # write the list file in pieces that split budget tables and time
+    # summaries to mimic a simulation that is still running
+    cpth = os.path.join('temp', 't011')
+    if not os.path.isdir(cpth):
+        os.makedirs(cpth)
+    grow_file = os.path.join(cpth, 'testsfr2_tab_grow.lst')
+    with open(grow_file, 'wb') as f:
+        f.write(data[:1000])
+    mflist = flopy.utils.MfListBudget(grow_file)
+    assert not mflist.isvalid()
+
+    nadded = 0
+    for i0 in range(1000, len(data), 37111):
+        with open(grow_file, 'ab') as f:
+            f.write(data[i0:i0 + 37111])
+        nadded += mflist.update()
+    assert nadded == 51
+    assert mflist.update() == 0
+    assert mflist.get_kstpkper() == full.get_kstpkper()
+    for name in full.inc.dtype.names:
+        assert np.array_equal(mflist.inc[name], full.inc[name])
+        assert np.array_equal(mflist.cum[name], full.cum[name])
+
+    # stop the list file after a budget table, before its time summary
+    i0 = data.index(b'TIME SUMMARY AT END')
+    with open(grow_file, 'wb') as f:
+        f.write(data[:i0])
+    mflist = flopy.utils.MfListBudget(grow_file)
+    assert len(mflist.get_times()) == 1
+    assert np.isnan(mflist.get_times()[0])
+    offset = mflist._offset
+    assert offset > 0
+    with open(grow_file, 'ab') as f:
+        f.write(data[i0:])
+    assert mflist.update() == 50
+    assert mflist._offset > offset
+    assert np.array_equal(mflist.get_times(), full.get_times())
+
+    # restart from the last budget table when time summaries are not written
+    i0 = data.index(b'TIME SUMMARY AT END')
+    i0 = data.rfind(b'\n', 0, i0) + 1
+    i1 = data.index(b'\n', data.index(b'TOTAL TIME', i0)) + 1
+    notsum = data[:i0] + data[i1:]
+    with open(grow_file, 'wb') as f:
+        f.write(notsum[:i0])
+    mflist = flopy.utils.MfListBudget(grow_file)
+    offset = mflist._offset
+    assert offset > 0
+    with open(grow_file, 'ab') as f:
+        f.write(data[i1:i1 + 1000])
+    assert mflist.update() == 0
+    assert mflist._offset == offset
+    assert np.isnan(mflist.get_times()[0])
+
+    return
+
+
+def test_mflistfile_bad_value():
+    pth = os.path.join('..', 'examples', 'data', 'preserve_unitnums')
+    list_file = os.path.join(pth, 'testsfr2_tab.lst')
+    full = flopy.utils.MfListBudget(list_file)
+    with open(list_file, 'rb') as f:
+        data = f.read()
+
+    # replace the total inflow rate in the second budget table with a value
+    # that cannot be cast to a float
+    key = b'VOLUMETRIC BUDGET FOR ENTIRE MODEL'
+    i0 = data.index(key, data.index(key) + 1)
+    i0 = data.index(b'TOTAL IN =', i0)
+    i0 = data.index(b'TOTAL IN =', i0 + 1) + len(b'TOTAL IN =')
+    i1 = data.index(b'\n', i0)
+    data = data[:i0] + b'   **********' + data[i1:]
+    cpth = os.path.join('temp', 't011')
+    if not os.path.isdir(cpth):
+        os.makedirs(cpth)
+    bad_file = os.path.join(cpth, 'testsfr2_tab_bad.lst')
+    with open(bad_file, 'wb') as f:
+        f.write(data)
+    mflist = flopy.utils.MfListBudget(bad_file)
+    assert mflist.get_kstpkper() == full.get_kstpkper()
+    assert np.all(np.isnan(mflist.inc['TOTAL_IN'][1]))
+    assert np.all(np.isnan(mflist.cum['TOTAL_IN'][1]))
+    for name in full.inc.dtype.names:
+        idx = np.arange(len(full.inc)) != 1
+        assert np.array_equal(mflist.inc[name][idx], full.inc[name][idx])
+        assert np.array_equal(mflist.cum[name][idx], full.cum[name][idx])
+
+    return
+
+
 if __name__ == '__main__':
     test_mflistfile()
+    test_mflistfile_multiple_budgets()
+    test_mflistfile_update()
+    test_mflistfile_bad_value()
@@ -288,11 +288,414 @@ def test_binaryfile_writeread():
     return
 
 
+def test_binaryfile_mmap():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    hm = flopy.utils.HeadFile(fpth, mmap=True)
+
+    times = h.get_times()
+    for totim in times[::10]:
+        d0 = h.get_data(totim=totim)
+        d1 = hm.get_data(totim=totim)
+        assert np.array_equal(d0, d1), \
+            'memory-mapped head for totim {} != head read'.format(totim)
+        assert not d1.flags.writeable, \
+            'memory-mapped head for totim {} is not a view'.format(totim)
+
+    d0 = h.get_alldata(nodata=None)
+    d1 = hm.get_alldata(nodata=None)
+    assert np.array_equal(d0, d1), 'memory-mapped get_alldata != get_alldata'
+    assert not d1.flags.writeable, 'memory-mapped get_alldata is not a view'
+    d1 = hm.get_alldata(mflay=2, nodata=None)
+    assert np.array_equal(d0[:, 2], d1), \
+        'memory-mapped get_alldata for layer 3 != get_alldata'
+
+    idx = [(0, 0, 0), (2, 7, 9), (1, 14, 3)]
+    ts0 = h.get_ts(idx)
+    ts1 = hm.get_ts(idx)
+    assert np.array_equal(ts0, ts1), 'memory-mapped get_ts != get_ts'
+    hm.close()
+    return
+
+
+def test_binaryfile_get_ts_many():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    d = h.get_alldata(nodata=None)
+    idx = [(k, i, j) for k in range(h.nlay) for i in range(0, h.nrow, 3)
+           for j in range(0, h.ncol, 2)]
+    ts = h.get_ts(idx)
+    assert ts.shape == (len(h.get_times()), len(idx) + 1), \
+        'get_ts shape {} is not correct'.format(ts.shape)
+    assert np.array_equal(ts[:, 0], h.get_times()), \
+        'get_ts times are not equal to get_times()'
+    for n, (k, i, j) in enumerate(idx):
+        assert np.array_equal(ts[:, n + 1], d[:, k, i, j]), \
+            'get_ts for cell {} != get_alldata'.format((k, i, j))
+    return
+
+
+def test_binaryfile_index_cache():
+
+    pth = os.path.join('..', 'examples', 'data')
+    for f in [os.path.join('freyberg', 'freyberg.githds'),
+              os.path.join('mf2005_test', 'test1tr.gitcbc')]:
+        shutil.copy(os.path.join(pth, f), cpth)
+
+    fpth = os.path.join(cpth, 'freyberg.githds')
+    h0 = flopy.utils.HeadFile(fpth)
+    h1 = flopy.utils.HeadFile(fpth, index_cache=True)
+    assert os.path.isfile(fpth + '.fpidx'), 'head index cache not written'
+    h2 = flopy.utils.HeadFile(fpth, index_cache=True)
+    for h in [h1, h2]:
+        assert np.array_equal(h0.recordarray, h.recordarray), \
+            'head recordarray from index cache is not correct'
+        assert np.array_equal(h0.iposarray, h.iposarray), \
+            'head iposarray from index cache is not correct'
+        assert h0.get_times() == h.get_times(), \
+            'head times from index cache are not correct'
+        assert h0.get_kstpkper() == h.get_kstpkper(), \
+            'head kstpkper from index cache is not correct'
+        assert np.array_equal(h0.get_data(), h.get_data()), \
+            'head data read using index cache is not correct'
+
+    fpth = os.path.join(cpth, 'test1tr.gitcbc')
+    v0 = flopy.utils.CellBudgetFile(fpth)
+    v1 = flopy.utils.CellBudgetFile(fpth, index_cache=True)
+    assert os.path.isfile(fpth + '.fpidx'), 'budget index cache not written'
+    v2 = flopy.utils.CellBudgetFile(fpth, index_cache=True)
+    for v in [v1, v2]:
+        assert np.array_equal(v0.recordarray, v.recordarray), \
+            'budget recordarray from index cache is not correct'
+        assert np.array_equal(v0.iposheader, v.iposheader), \
+            'budget iposheader from index cache is not correct'
+        assert v0.get_unique_record_names() == \
+               v.get_unique_record_names(), \
+            'budget record names from index cache are not correct'
+        assert v0.get_kstpkper() == v.get_kstpkper(), \
+            'budget kstpkper from index cache is not correct'
+        t0 = v0.get_data(text='STREAM LEAKAGE')[-1]
+        t1 = v.get_data(text='STREAM LEAKAGE')[-1]
+        assert np.array_equal(t0, t1), \
+            'budget data read using index cache is not correct'
+
+    # a cache without the current cache version is rebuilt
+    with np.load(fpth + '.fpidx') as f:
+        cache = {key: f[key] for key in f.files
+                 if key not in ('cacheversion', 'iposend')}
+    with open(fpth + '.fpidx', 'wb') as f:
+        np.savez(f, **cache)
+    v = flopy.utils.CellBudgetFile(fpth, index_cache=True)
+    assert np.array_equal(v0.iposheader, v.iposheader), \
+        'budget index from an old index cache is not correct'
+
+    # totim calculated from dis is not reused for a different dis
+    fpth = os.path.join(cpth, 'nototim.cbc')
+    hdr = np.dtype([('kstp', 'i4'), ('kper', 'i4'), ('text', 'a16'),
+                    ('ncol', 'i4'), ('nrow', 'i4'), ('nlay', 'i4')])
+    with open(fpth, 'wb') as f:
+        for kstp, kper in [(1, 1), (1, 2), (2, 2)]:
+            np.array([(kstp, kper, '         STORAGE', 3, 2, 1)],
+                     dtype=hdr).tofile(f)
+            np.ones((1, 2, 3), dtype=np.float32).tofile(f)
+    times = []
+    for perlen in [[1., 10.], [2., 20.]]:
+        m = flopy.modflow.Modflow()
+        dis = flopy.modflow.ModflowDis(m, nlay=1, nrow=2, ncol=3, nper=2,
+                                       perlen=perlen, nstp=[1, 2])
+        v = flopy.utils.CellBudgetFile(fpth, dis=dis, index_cache=True)
+        times.append(v.get_times())
+    assert np.allclose(times[0], [1., 6., 11.]), \
+        'budget times calculated from dis are not correct'
+    assert np.allclose(times[1], [2., 12., 22.]), \
+        'budget times from index cache with a different dis are not correct'
+    return
+
+
+def test_cellbudgetfile_get_ts():
+
+    v = flopy.utils.CellBudgetFile(
+        os.path.join('..', 'examples', 'data', 'mf2005_test',
+                     'test1tr.gitcbc'))
+    idx = [(0, i, j) for i in range(v.nrow) for j in range(v.ncol)]
+    for text in ['STORAGE', 'FLOW RIGHT FACE', 'STREAM LEAKAGE', 'WELLS']:
+        ts = v.get_ts(idx, text=text)
+        assert ts.shape == (len(v.get_kstpkper()), len(idx) + 1), \
+            '{} get_ts shape {} is not correct'.format(text, ts.shape)
+        for itim, kk in enumerate(v.get_kstpkper()):
+            t = v.get_data(kstpkper=kk, text=text, full3D=True)[0]
+            t = np.ma.filled(t.astype(ts.dtype), np.nan)
+            np.testing.assert_array_equal(
+                ts[itim, 1:], t.ravel(),
+                err_msg='{} get_ts for kstpkper {} != full3D '
+                        'data'.format(text, kk))
+    return
+
+
+def test_binaryfile_iter_records():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    d = h.get_alldata(nodata=None)
+    n = 0
+    for header, data in h.iter_records(layers=2, reuse_buffer=True):
+        assert header['ilay'] == 3, 'iter_records returned layer {}'.format(
+            header['ilay'])
+        assert np.array_equal(data, d[n, 2]), \
+            'iter_records data for record {} != get_alldata'.format(n)
+        n += 1
+    assert n == d.shape[0], 'iter_records returned {} records'.format(n)
+
+    kstpkper = h.get_kstpkper()
+    records = list(h.iter_records(kstpkper_range=(kstpkper[1],
+                                                  kstpkper[3])))
+    assert len(records) == 3 * h.nlay, \
+        'iter_records kstpkper_range returned {} records'.format(len(records))
+
+    v = flopy.utils.CellBudgetFile(
+        os.path.join('..', 'examples', 'data', 'mf2005_test',
+                     'test1tr.gitcbc'))
+    t = v.get_data(text='STREAM LEAKAGE')
+    records = list(v.iter_records(text='STREAM LEAKAGE'))
+    assert len(records) == len(t), \
+        'iter_records returned {} stream leakage records'.format(len(records))
+    for t0, (header, t1) in zip(t, records):
+        assert np.array_equal(t0, t1), \
+            'iter_records stream leakage data != get_data'
+    t = v.get_data(text='STORAGE')
+    for t0, (header, t1) in zip(t, v.iter_records(text='STORAGE',
+                                                   reuse_buffer=True)):
+        assert np.array_equal(t0, t1), 'iter_records storage data != get_data'
+    return
+
+
+def test_binaryfile_refresh():
+
+    pth = os.path.join('..', 'examples', 'data')
+    files = [(flopy.utils.HeadFile, os.path.join(pth, 'freyberg',
+                                                 'freyberg.githds')),
+             (flopy.utils.CellBudgetFile, os.path.join(pth, 'mf2005_test',
+                                                       'test1tr.gitcbc'))]
+    for cls, fpth in files:
+        with open(fpth, 'rb') as f:
+            data = f.read()
+        v0 = cls(fpth)
+
+        # write the file in pieces that end part way through a record
+        opth = os.path.join(cpth, 'refresh_' + os.path.basename(fpth))
+        n = len(data) // 2 + 3
+        with open(opth, 'wb') as f:
+            f.write(data[:n])
+        v = cls(opth)
+        nrec = v.recordarray.shape[0]
+        assert nrec < v0.recordarray.shape[0], \
+            '{} partial file has {} records'.format(cls.__name__, nrec)
+        assert v.refresh() == 0, 'refresh without new data added records'
+        with open(opth, 'ab') as f:
+            f.write(data[n:])
+        nnew = v.refresh()
+        assert nrec + nnew == v0.recordarray.shape[0], \
+            '{} refresh added {} records'.format(cls.__name__, nnew)
+        assert np.array_equal(v0.recordarray, v.recordarray), \
+            '{} refreshed recordarray is not correct'.format(cls.__name__)
+        assert np.array_equal(v0.iposarray, v.iposarray), \
+            '{} refreshed iposarray is not correct'.format(cls.__name__)
+        assert v0.get_kstpkper() == v.get_kstpkper(), \
+            '{} refreshed kstpkper is not correct'.format(cls.__name__)
+        v.close()
+    return
+
+
+def test_binaryfile_reduce():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    d = h.get_alldata(nodata=None).astype(np.float64)
+    ops = ('min', 'max', 'mean', 'std', 'argmin', 'argmax')
+    stats = h.reduce(ops=ops)
+    for op in ops:
+        v = getattr(np, op)(d, axis=0)
+        assert np.allclose(stats[op], v), \
+            'reduce {} is not equal to numpy {}'.format(op, op)
+
+    # mask the values in the first record of the top layer
+    mask_value = float(d[0, 0, 0, 0])
+    stats = h.reduce(ops=('max', 'mean'), layers=0, mask_values=[mask_value])
+    dm = np.ma.masked_equal(d[:, 0:1], mask_value)
+    assert stats['max'].shape == (1, h.nrow, h.ncol), \
+        'reduce shape {} is not correct'.format(stats['max'].shape)
+    assert np.allclose(stats['max'], dm.max(axis=0)), \
+        'reduce max with mask_values is not correct'
+    assert np.allclose(stats['mean'], dm.mean(axis=0)), \
+        'reduce mean with mask_values is not correct'
+
+    # mask hnoflo and hdry values written in single precision
+    nrow, ncol = 3, 4
+    pth = os.path.join(cpth, 'reduce_single.hds')
+    f = open(pth, 'wb')
+    for kstp in range(3):
+        totim = np.float32(kstp + 1)
+        header = flopy.utils.BinaryHeader.create(bintype='head',
+                                                 precision='single',
+                                                 text='head', nrow=nrow,
+                                                 ncol=ncol, ilay=1,
+                                                 pertim=totim, totim=totim,
+                                                 kstp=kstp + 1, kper=1)
+        b = np.full((nrow, ncol), kstp + 1., dtype=np.float32)
+        b[0, 0] = -999.99
+        b[1, 1] = -1e30
+        if kstp == 1:
+            b[2, 2] = -1e30
+        flopy.utils.Util2d.write_bin(b.shape, f, b, header_data=header)
+    f.close()
+    h = flopy.utils.HeadFile(pth, precision='single')
+    stats = h.reduce(ops=('min', 'max', 'mean'), mask_values=[-999.99, -1e30])
+    assert np.isnan(stats['min'][0, 0, 0]), \
+        'reduce did not mask the single precision hnoflo value'
+    assert np.isnan(stats['max'][0, 1, 1]), \
+        'reduce did not mask the single precision hdry value'
+    assert stats['min'][0, 2, 2] == 1. and stats['mean'][0, 2, 2] == 2., \
+        'reduce statistics with a masked time step are not correct'
+    assert np.allclose(stats['mean'][0, 0, 1], 2.), \
+        'reduce mean of unmasked values is not correct'
+    return
+
+
+def test_binaryfile_cell_major():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    idx = [(0, 0, 0), (2, 7, 9), (1, 14, 3)]
+    ts0 = h.get_ts(idx)
+    opth = os.path.join(cpth, 'AdvGW_tidal_unch.npy')
+    cm = h.to_cell_major(opth, chunksize=50)
+    assert cm.shape == (h.nlay * h.nrow * h.ncol, len(h.get_times())), \
+        'cell-major shape {} is not correct'.format(cm.shape)
+    ts1 = h.get_ts(idx)
+    assert np.array_equal(ts0, ts1), 'cell-major get_ts != get_ts'
+
+    v = flopy.utils.CellBudgetFile(
+        os.path.join('..', 'examples', 'data', 'mf2005_test',
+                     'test1tr.gitcbc'))
+    idx = [(0, i, j) for i in range(v.nrow) for j in range(v.ncol)]
+    ts0 = v.get_ts(idx, text='STREAM LEAKAGE')
+    opth = os.path.join(cpth, 'test1tr_sfr.npy')
+    v.to_cell_major(opth, text='STREAM LEAKAGE', chunksize=7)
+    ts1 = v.get_ts(idx, text='STREAM LEAKAGE')
+    np.testing.assert_array_equal(
+        ts0, ts1, err_msg='cell-major stream leakage get_ts != get_ts')
+    return
+
+
+def test_cellbudgetfile_sparse_data():
+
+    v = flopy.utils.CellBudgetFile(
+        os.path.join('..', 'examples', 'data', 'mf2005_test',
+                     'test1tr.gitcbc'))
+    t = v.get_data(text='STREAM LEAKAGE')
+    sp = v.get_sparse_data(text='STREAM LEAKAGE')
+    assert sp.nrecords == len(t), \
+        'sparse data has {} records not {}'.format(sp.nrecords, len(t))
+    assert 'IFACE' in [name.strip() for name in sp.aux.keys()], \
+        'sparse data does not include the IFACE auxiliary variable'
+    for n, t0 in enumerate(t):
+        i0, i1 = sp.offsets[n], sp.offsets[n + 1]
+        assert np.array_equal(sp.node[i0:i1], t0['node']), \
+            'sparse data nodes for record {} != get_data'.format(n)
+        assert np.array_equal(sp.q[i0:i1], t0['q']), \
+            'sparse data flows for record {} != get_data'.format(n)
+
+    # zone totals should be equal to the sum of the full 3D arrays
+    izone = np.ones((v.nlay, v.nrow, v.ncol), dtype=np.int32)
+    izone[:, 8:, :] = 2
+    zones, totals = sp.sum_by_zone(izone)
+    t = v.get_data(text='STREAM LEAKAGE', full3D=True)
+    for n, t0 in enumerate(t):
+        t0 = t0.filled(0.)
+        for iz, z in enumerate(zones):
+            assert np.isclose(totals[n, iz], t0[izone == z].sum()), \
+                'sparse data total for zone {} is not correct'.format(z)
+
+    nodes, totals = sp.sum_by_node()
+    assert np.allclose(totals[0], t[0].ravel()[nodes - 1]), \
+        'sparse data node totals are not correct'
+
+    kstpkper, paknams, totals = v.get_sparse_data().sum_by_package()
+    assert kstpkper == v.get_kstpkper(), \
+        'sparse data package totals kstpkper is not correct'
+    i = [name.strip() for name in paknams].index(b'STREAM LEAKAGE')
+    assert np.isclose(totals[0, i], t[0].sum()), \
+        'sparse data package total is not correct'
+    return
+
+
+def test_binaryfile_get_data_many():
+
+    fpth = os.path.join('..', 'examples', 'data', 'mf6',
+                        'test005_advgw_tidal', 'expected_output',
+                        'AdvGW_tidal_unch.hds')
+    h = flopy.utils.HeadFile(fpth)
+    kstpkper = h.get_kstpkper()
+    d0 = [h.get_data(kstpkper=kk) for kk in kstpkper]
+    d1 = h.get_data_many(kstpkper, n_workers=4)
+    for kk, h0, h1 in zip(kstpkper, d0, d1):
+        assert np.array_equal(h0, h1), \
+            'get_data_many head for kstpkper {} != get_data'.format(kk)
+    h.close()
+
+    v = flopy.utils.CellBudgetFile(
+        os.path.join('..', 'examples', 'data', 'mf2005_test',
+                     'test1tr.gitcbc'))
+    kstpkper = v.get_kstpkper()
+    d0 = [v.get_data(kstpkper=kk, text='STORAGE') for kk in kstpkper]
+    d1 = v.get_data_many(kstpkper, n_workers=4, text='STORAGE')
+    for kk, t0, t1 in zip(kstpkper, d0, d1):
+        assert np.array_equal(t0[0], t1[0]), \
+            'get_data_many storage for kstpkper {} != get_data'.format(kk)
+
+    # the file handles of threads that have exited are closed
+    import threading
+    for i in range(20):
+        t = threading.Thread(target=v.get_data,
+                             kwargs={'kstpkper': kstpkper[-1],
+                                     'text': 'STORAGE'})
+        t.start()
+        t.join()
+    handles = [ref() for ref in v._file_handles if ref() is not None]
+    nopen = len([tf for tf in handles if not tf.file.closed])
+    assert nopen <= 2, \
+        '{} file handles are open after the threads exited'.format(nopen)
+    v.close()
+    return
+
+
 if __name__ == '__main__':
     test_cellbudgetfile_position()
     test_binaryfile_writeread()
     test_formattedfile_read()
     test_binaryfile_read()
+    test_binaryfile_mmap()
+    test_binaryfile_get_ts_many()
+    test_binaryfile_index_cache()
+    test_binaryfile_iter_records()
+    test_binaryfile_refresh()
+    test_binaryfile_reduce()
+    test_binaryfile_cell_major()
+    test_binaryfile_get_data_many()
     test_cellbudgetfile_read()
     test_cellbudgetfile_readrecord()
     test_cellbudgetfile_readrecord_waux()
+    test_cellbudgetfile_get_ts()
+    test_cellbudgetfile_sparse_data()
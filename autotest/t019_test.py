@@ -212,8 +212,69 @@ def test_mf6obsfile_read():
     return
 
 
+def test_obsfile_lazy():
+    files = [(flopy.utils.Mf6Obs,
+              os.path.join('..', 'examples', 'data', 'mf6_obs',
+                           'maw_obs.gitbin'), {}),
+             (flopy.utils.Mf6Obs,
+              os.path.join('..', 'examples', 'data', 'mf6_obs',
+                           'maw_obs.gitcsv'), {'isBinary': False}),
+             (flopy.utils.HydmodObs,
+              os.path.join('..', 'examples', 'data', 'hydmod_test',
+                           'test1tr.hyd.gitbin'), {}),
+             (flopy.utils.SwrObs,
+              os.path.join('..', 'examples', 'data', 'swr_test',
+                           'SWR004.obs'), {})]
+    for cls, pth, kwargs in files:
+        h = cls(pth, **kwargs)
+        hl = cls(pth, lazy=True, **kwargs)
+        assert hl.data is None, 'lazy observation data were loaded'
+        assert hl.get_times() == h.get_times()
+        assert hl.get_obsnames() == h.get_obsnames()
+
+        data = h.get_data()
+        datal = hl.get_data()
+        for name in data.dtype.names:
+            assert np.array_equal(datal[name], data[name])
+
+        names = h.get_obsnames()[::2]
+        for idx in [None, h.get_ntimes() - 1]:
+            d = h.get_data(obsname=names, idx=idx)
+            dl = hl.get_data(obsname=names, idx=idx)
+            assert list(dl.dtype.names) == ['totim'] + names
+            for name in dl.dtype.names:
+                assert np.array_equal(dl[name], d[name])
+        assert hl.get_data(obsname='not an obs') is None
+
+    return
+
+
+def test_mf6observations_rewrite():
+    from flopy.mf6.utils.mfobservation import Observations
+
+    # the row index of the csv file is rebuilt when the file is rewritten
+    fpth = os.path.join(mpth, 'rewrite_obs.csv')
+    with open(fpth, 'w') as f:
+        f.write('time,OBS1,OBS2\n1.0,10.0,20.0\n2.0,11.0,21.0\n')
+    obs = Observations(fpth)
+    assert obs.get_times() == [1.0, 2.0]
+    assert np.allclose(obs.get_data(key='OBS2'), [20., 21.])
+
+    with open(fpth, 'w') as f:
+        f.write('time,OBS1,OBS2\n1.0,-10.50,-20.25\n2.0,-11.50,-21.25\n'
+                '3.0,-12.50,-22.25\n')
+    stat = os.stat(fpth)
+    os.utime(fpth, (stat.st_atime, stat.st_mtime + 10.))
+    assert obs.get_times() == [1.0, 2.0, 3.0]
+    assert np.allclose(obs.get_data(key='OBS2'),
+                       [-20.25, -21.25, -22.25])
+    return
+
+
 if __name__ == '__main__':
     test_mf6obsfile_read()
     test_hydmodfile_create()
     test_hydmodfile_load()
     test_hydmodfile_read()
+    test_obsfile_lazy()
+    test_mf6observations_rewrite()
@@ -393,6 +393,45 @@ def test_swr_binary_obs(ipos=5):
     return
 
 
+def test_swr_binary_ts_index():
+    import numpy as np
+    # time series for a list of reaches are gathered at once and match
+    # the single reach time series
+    fpth = os.path.join(pth, files[0])
+    sobj = flopy.utils.SwrStage(fpth)
+    irecs = [0, 5, 17]
+    ts = sobj.get_ts(irec=irecs)
+    assert ts.shape == (336, 3), \
+        'SwrStage stage timeseries shape does not equal (336, 3)'
+    for j, irec in enumerate(irecs):
+        ts1 = sobj.get_ts(irec=irec)
+        assert np.array_equal(ts[:, j], ts1), \
+            'SwrStage time series for irec {} do not match'.format(irec)
+    for idx, r in enumerate([sobj.get_data(idx=idx) for idx in range(3)]):
+        assert np.allclose(ts['stage'][idx], r['stage'][irecs]), \
+            'SwrStage time series do not match get_data()'
+
+    # the layer of each exchange entry is checked for qaq data
+    fpth = os.path.join(pth, files[3])
+    sobj = flopy.utils.SwrExchange(fpth)
+    r = sobj.get_data(idx=0)
+    ts = sobj.get_ts(irec=r['reach'][0], klay=r['layer'][0])
+    assert ts['reach'][0] == r['reach'][0], \
+        'SwrExchange time series reach does not match get_data()'
+    assert ts['layer'][0] == r['layer'][0], \
+        'SwrExchange time series layer does not match get_data()'
+    assert np.allclose(ts['exchange'][0], r['exchange'][0]), \
+        'SwrExchange time series exchange does not match get_data()'
+
+    # a structure number that does not exist returns zeros
+    fpth = os.path.join(pth, files[4])
+    sobj = flopy.utils.SwrStructure(fpth)
+    ts = sobj.get_ts(irec=17, istr=99)
+    assert np.all(ts['strflow'] == 0.), \
+        'SwrStructure time series for missing structure is not zero'
+    return
+
+
 if __name__ == '__main__':
     test_swr_binary_obs()
     test_swr_binary_stage()
@@ -400,3 +439,4 @@ if __name__ == '__main__':
     test_swr_binary_qm()
     test_swr_binary_qaq()
     test_swr_binary_structure()
+    test_swr_binary_ts_index()
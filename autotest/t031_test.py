@@ -221,7 +221,207 @@ def test_loadtxt():
     # epd = EndpointFile(epfilewithnans)
 
 
+def test_get_alldata_by_particle():
+    pthobj = PathlineFile(os.path.join(path, 'EXAMPLE-3.pathline'))
+    tsobj = flopy.utils.TimeseriesFile(os.path.join(path,
+                                                    'EXAMPLE-4.timeseries'))
+    for obj in [pthobj, tsobj]:
+        data = obj._data
+        totim = np.median(data['time'])
+        for kwargs in [{}, {'totim': totim}, {'totim': totim, 'ge': False}]:
+            plist = obj.get_alldata(**kwargs)
+            assert len(plist) == len(obj.nid)
+            for partid, p in zip(obj.nid, plist):
+                idx = data['particleid'] == partid
+                if 'totim' in kwargs:
+                    if kwargs.get('ge', True):
+                        idx &= data['time'] >= totim
+                    else:
+                        idx &= data['time'] <= totim
+                assert isinstance(p, np.recarray)
+                for name in p.dtype.names:
+                    assert np.array_equal(p[name], data[idx][name])
+                p2 = obj.get_data(partid, **kwargs)
+                assert np.array_equal(p2, p)
+            for (partid, p), p2 in zip(obj.iter_particles(**kwargs), plist):
+                assert np.array_equal(p, p2)
+        assert obj.get_data(obj.nid.max() + 1).shape == (0,)
+
+    epobj = EndpointFile(os.path.join(path, 'EXAMPLE-3.endpoint'))
+    for partid in np.unique(epobj._data['particleid']):
+        ep = epobj.get_data(partid)
+        assert np.array_equal(
+            ep, epobj._data[epobj._data['particleid'] == partid])
+
+
+def test_pathline_chunked_filters():
+    fname = os.path.join(path, 'EXAMPLE-3.pathline')
+    data = PathlineFile(fname)._data
+    chunks = list(PathlineFile(fname).iter_chunks(chunksize=50))
+    assert len(chunks) > 1
+    assert np.array_equal(np.concatenate(chunks), data)
+    pthobj = PathlineFile(fname, chunksize=50)
+    assert np.array_equal(pthobj._data, data)
+
+    pids = np.unique(data['particleid'])[::2]
+    tmin, tmax = np.percentile(data['time'], [25, 75])
+    idx = np.in1d(data['particleid'], pids) & \
+          (data['time'] >= tmin) & (data['time'] <= tmax)
+    pthobj = PathlineFile(fname, chunksize=50, particleids=pids,
+                          time_window=(tmin, tmax))
+    assert np.array_equal(pthobj._data, data[idx])
+    layers = np.unique(data['k'])[:1]
+    pthobj = PathlineFile(fname, layers=layers)
+    assert np.array_equal(pthobj._data, data[np.in1d(data['k'], layers)])
+
+    cells = [(4, 12, 12), (2, 20, 20)]
+    ref = PathlineFile(fname).get_destination_pathline_data(
+        cells, to_recarray=True)
+    pthobj = PathlineFile(fname, chunksize=50, dest_cells=cells)
+    assert np.array_equal(
+        np.sort(pthobj._data, order=['particleid', 'time']), ref)
+    pthobj = PathlineFile(fname, particleids=[data['particleid'].max() + 1])
+    assert pthobj._data.shape == (0,)
+
+    # misspelled keywords are not ignored
+    for cls, f in [(PathlineFile, 'EXAMPLE-3.pathline'),
+                   (EndpointFile, 'EXAMPLE-3.endpoint'),
+                   (flopy.utils.TimeseriesFile, 'EXAMPLE-4.timeseries')]:
+        try:
+            cls(os.path.join(path, f), particleid=pids)
+            raise AssertionError('unrecognized kwarg was accepted')
+        except Exception as e:
+            assert 'unrecognized kwargs: particleid' in str(e)
+
+
+def test_destination_cell_index():
+    pthobj = PathlineFile(os.path.join(path, 'EXAMPLE-3.pathline'))
+    tsobj = flopy.utils.TimeseriesFile(os.path.join(path,
+                                                    'EXAMPLE-4.timeseries'))
+    epobj = EndpointFile(os.path.join(path, 'EXAMPLE-3.endpoint'))
+    cells = [(4, 12, 12), (2, 20, 20), (0, 4, 4), (99, 99, 99)]
+    for obj in [pthobj, tsobj, epobj]:
+        data = obj._data
+        names = ['k', 'i', 'j']
+        if obj is epobj:
+            names = ['k0', 'i0', 'j0']
+        idx = np.zeros(data.shape[0], dtype=bool)
+        for k, i, j in cells:
+            idx |= (data[names[0]] == k) & (data[names[1]] == i) & \
+                   (data[names[2]] == j)
+        if obj is epobj:
+            ep = obj.get_destination_endpoint_data(cells, source=True)
+            assert np.array_equal(ep, data[idx])
+            continue
+        partids = obj.get_destination_particleids(cells)
+        assert np.array_equal(partids, np.unique(data['particleid'][idx]))
+        # repeated queries reuse the cell index
+        assert np.array_equal(obj.get_destination_particleids(cells[:1]),
+                              np.unique(data['particleid'][
+                                  (data['k'] == 4) & (data['i'] == 12) &
+                                  (data['j'] == 12)]))
+        ref = data[np.in1d(data['particleid'], partids)]
+        ref = np.sort(ref, order=['particleid', 'time'])
+        if obj is pthobj:
+            dest = obj.get_destination_pathline_data(cells, to_recarray=True)
+        else:
+            dest = obj.get_destination_timeseries_data(cells)
+        assert np.array_equal(dest, ref)
+
+
+def test_data_cache():
+    for fname, cls in [('EXAMPLE-3.pathline', PathlineFile),
+                       ('EXAMPLE-3.endpoint', EndpointFile),
+                       ('EXAMPLE-4.timeseries',
+                        flopy.utils.TimeseriesFile)]:
+        fpth = os.path.join(path, fname)
+        for ext in ['.npy', '.fpidx']:
+            if os.path.isfile(fpth + ext):
+                os.remove(fpth + ext)
+        obj = cls(fpth)
+        obj1 = cls(fpth, data_cache=True)
+        assert os.path.isfile(fpth + '.npy')
+        assert os.path.isfile(fpth + '.fpidx')
+        obj2 = cls(fpth, data_cache=True)
+        assert isinstance(obj2._data.base, np.memmap)
+        for o in [obj1, obj2]:
+            assert o._data.shape == obj._data.shape
+            for name in obj._data.dtype.names:
+                assert np.array_equal(o._data[name], obj._data[name])
+        assert np.array_equal(obj2.get_data(1), obj.get_data(1))
+
+        # a cache that does not match the file is not used
+        with open(fpth + '.npy', 'ab') as f:
+            f.write(b'0')
+        obj3 = cls(fpth, data_cache=True)
+        assert not isinstance(obj3._data.base, np.memmap)
+        assert np.array_equal(obj3._data['particleid'],
+                              obj._data['particleid'])
+
+
+def test_pathline_segment_index():
+    pthobj = PathlineFile(os.path.join(path, 'EXAMPLE-3.pathline'))
+    data = pthobj._data
+
+    # all segments of each particle, from consecutive points
+    seg0, seg1 = [], []
+    for partid in pthobj.nid:
+        p = pthobj.get_data(partid)
+        if p.shape[0] == 1:
+            seg0.append(p)
+            seg1.append(p)
+        else:
+            seg0.append(p[:-1])
+            seg1.append(p[1:])
+    seg0 = np.concatenate(seg0)
+    seg1 = np.concatenate(seg1)
+
+    start, end = pthobj.get_intersecting_segments()
+    assert start.shape == seg0.shape
+    assert np.array_equal(np.unique(start['particleid']), pthobj.nid)
+
+    # layers
+    k = data['k'].max()
+    start, end = pthobj.get_intersecting_segments(layers=[k])
+    idx = (seg0['k'] == k) | (seg1['k'] == k)
+    assert start.shape[0] == idx.sum()
+    assert np.all((start['k'] == k) | (end['k'] == k))
+
+    # time window
+    tmin, tmax = np.percentile(data['time'], [40, 60])
+    partids = pthobj.get_intersecting_particleids(time_window=(tmin, tmax))
+    idx = (np.maximum(seg0['time'], seg1['time']) >= tmin) & \
+          (np.minimum(seg0['time'], seg1['time']) <= tmax)
+    assert np.array_equal(partids, np.unique(seg0['particleid'][idx]))
+
+    # bbox and the same area as a polygon
+    xmin, xmax = np.percentile(data['x'], [30, 60])
+    ymin, ymax = np.percentile(data['y'], [30, 60])
+    partids = pthobj.get_intersecting_particleids(bbox=(xmin, ymin,
+                                                        xmax, ymax))
+    idx = (data['x'] >= xmin) & (data['x'] <= xmax) & \
+          (data['y'] >= ymin) & (data['y'] <= ymax)
+    inside = np.unique(data['particleid'][idx])
+    assert inside.shape[0] > 0
+    assert np.all(np.in1d(inside, partids))
+    idx = (np.maximum(seg0['x'], seg1['x']) < xmin) | \
+          (np.minimum(seg0['x'], seg1['x']) > xmax) | \
+          (np.maximum(seg0['y'], seg1['y']) < ymin) | \
+          (np.minimum(seg0['y'], seg1['y']) > ymax)
+    assert np.all(np.in1d(partids, seg0['particleid'][~idx]))
+    polygon = [(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)]
+    assert np.array_equal(
+        pthobj.get_intersecting_particleids(polygon=polygon), partids)
+    assert pthobj.get_intersecting_particleids(
+        bbox=(xmin, ymin, xmax, ymax), time_window=(-2., -1.)).shape == (0,)
+
+
 if __name__ == '__main__':
     test_mpsim()
     test_get_destination_data()
     test_loadtxt()
+    test_get_alldata_by_particle()
+    test_pathline_chunked_filters()
+    test_destination_cell_index()
+    test_data_cache()
+    test_pathline_segment_index()
@@ -3,8 +3,8 @@ Test zonbud utility
 """
 import os
 import numpy as np
-from flopy.utils import CellBudgetFile, ZoneBudget, \
-    MfListBudget, read_zbarray, write_zbarray
+from flopy.utils import CellBudgetFile, ZoneBudget, ZoneTopology, \
+    MfListBudget, MfGrdFile, zone_budgets, read_zbarray, write_zbarray
 
 loadpth = os.path.join('..', 'examples', 'data', 'zonbud_examples')
 outpth = os.path.join('temp', 't039')
@@ -232,6 +232,164 @@ def test_get_model_shape():
     return
 
 
+def test_zonbud_zone_flows():
+    """
+    t039 Test the zone-to-zone and source/sink flows against the cell
+    budget file
+    """
+    fpth = os.path.join('..', 'examples', 'data', 'mp6', 'EXAMPLE.BUD')
+    cbc = CellBudgetFile(fpth)
+    kstpkper = cbc.get_kstpkper()[-1]
+    zon = np.ones((cbc.nlay, cbc.nrow, cbc.ncol), int)
+    zon[:, :, 12:] = 2
+    zb = ZoneBudget(cbc, zon, kstpkper=kstpkper)
+    bud = zb.get_budget()
+
+    # flow across the column 12/13 boundary
+    frf = cbc.get_data(text='FLOW RIGHT FACE', kstpkper=kstpkper)[0][:, :, 11]
+    q12 = bud[bud['name'] == 'TO_ZONE_2']['ZONE_1'][0]
+    q21 = bud[bud['name'] == 'TO_ZONE_1']['ZONE_2'][0]
+    assert np.allclose(q12, frf[frf > 0].sum(), rtol=1e-5), \
+        'Flow from zone 1 to zone 2 does not match the face flows.'
+    assert np.allclose(q21, -frf[frf < 0].sum(), rtol=1e-5), \
+        'Flow from zone 2 to zone 1 does not match the face flows.'
+    assert np.allclose(bud[bud['name'] == 'FROM_ZONE_1']['ZONE_2'], q12), \
+        'Zone-to-zone inflow and outflow records do not match.'
+
+    # source/sink terms summed over all zones
+    wel = cbc.get_data(text='WELLS', kstpkper=kstpkper)[0]['q']
+    qout = bud[bud['name'] == 'TO_WELLS']
+    assert np.allclose(qout['ZONE_1'] + qout['ZONE_2'], -wel[wel < 0].sum(),
+                       rtol=1e-5), 'Well outflow does not match.'
+    return
+
+
+def test_zonbud_n_workers():
+    """
+    t039 Test computing the budgets of all time steps with a thread pool
+    """
+    fpth = os.path.join('..', 'examples', 'data', 'mp6', 'EXAMPLE.BUD')
+    cbc = CellBudgetFile(fpth)
+    zon = np.ones((cbc.nlay, cbc.nrow, cbc.ncol), int)
+    zon[:, :, 12:] = 2
+    zon[2:] += 2
+    zb = ZoneBudget(cbc, zon)
+    zb2 = ZoneBudget(cbc, zon, n_workers=4)
+    assert np.array_equal(zb.get_budget(), zb2.get_budget()), \
+        'Serial and threaded zone budgets do not match.'
+    zb3 = ZoneBudget(cbc, zon, totim=cbc.get_times(), n_workers=4)
+    assert np.array_equal(zb.get_budget(), zb3.get_budget()), \
+        'Zone budgets by kstpkper and totim do not match.'
+    return
+
+
+def test_zonbud_topology():
+    """
+    t039 Test the zone-boundary faces of ZoneTopology against a loop over
+    all of the cell faces
+    """
+    nlay, nrow, ncol = 3, 6, 7
+    rng = np.random.RandomState(39)
+    zon = rng.randint(1, 4, (nlay, nrow, ncol))
+    ich = np.zeros(zon.shape, int)
+    ich[0, :, 0] = 1
+    ich[1, 2:4, 3] = 1
+    topo = ZoneTopology(zon, ich=ich)
+    nz = topo.nzones
+    for axis in range(3):
+        q = rng.uniform(-1., 1., zon.shape)
+        keys, fluxes = topo.get_face_flow_keys(q, axis, ich)
+        flows = np.bincount(keys, weights=fluxes, minlength=nz * (nz + 2))
+
+        expected = np.zeros(nz * (nz + 2))
+        for k, i, j in np.ndindex(*zon.shape):
+            kb, ib, jb = [(k, i, j)[ax] + (ax == axis) for ax in range(3)]
+            if (kb, ib, jb)[axis] >= zon.shape[axis]:
+                continue
+            za, zb = zon[k, i, j] - 1, zon[kb, ib, jb] - 1
+            cha, chb = ich[k, i, j] == 1, ich[kb, ib, jb] == 1
+            f = q[k, i, j]
+            if za != zb and not (cha and chb):
+                if f > 0:
+                    expected[za * nz + zb] += f
+                else:
+                    expected[zb * nz + za] -= f
+            if chb and not cha:
+                expected[nz * nz + 2 * zb + int(f > 0)] += abs(f)
+            if cha and not chb:
+                expected[nz * nz + 2 * za + int(f < 0)] += abs(f)
+        assert np.allclose(flows, expected), \
+            'Zone flows for axis {} do not match.'.format(axis)
+    return
+
+
+def test_zonbud_mf6_flowja():
+    """
+    t039 Test zonbud for a MODFLOW 6 unstructured model using FLOW-JA-FACE
+    and the binary grid file
+    """
+    fpth = os.path.join('..', 'examples', 'data', 'mf6', 'create_tests',
+                        'test006_gwf3_disv', 'expected_output', 'flow.cbc')
+    grb = os.path.join('..', 'examples', 'data', 'mfgrd_test',
+                       'flow.disu.grb')
+    cbc = CellBudgetFile(fpth, precision='double')
+    zon = np.random.RandomState(39).randint(1, 4, 121)
+    zb = ZoneBudget(cbc, zon, grb=grb)
+    bud = zb.get_budget()
+
+    ia, ja = MfGrdFile(grb).get_connectivity()
+    flowja = cbc.get_data(text='FLOW-JA-FACE')[0].ravel()
+    for n in range(ia.shape[0] - 1):
+        for ipos in range(ia[n] + 1, ia[n + 1]):
+            m = ja[ipos]
+            if zon[m] != zon[n]:
+                assert np.isclose(flowja[ipos], -flowja[ia[m]:ia[m + 1]][
+                    ja[ia[m]:ia[m + 1]] == n][0]), 'FLOW-JA-FACE mismatch'
+    for zf in range(1, 4):
+        for zt in range(1, 4):
+            if zf == zt:
+                continue
+            q = 0.
+            for n in np.flatnonzero(zon == zt):
+                for ipos in range(ia[n] + 1, ia[n + 1]):
+                    if zon[ja[ipos]] == zf and flowja[ipos] > 0:
+                        q += flowja[ipos]
+            name = 'ZONE_{}'.format(zt)
+            qzb = bud[bud['name'] == 'FROM_ZONE_{}'.format(zf)][name][0]
+            assert np.isclose(qzb, q, rtol=1e-5), \
+                'Flow from zone {} to zone {} does not match.'.format(zf, zt)
+
+    chd = cbc.get_data(text='CHD')[0]['q']
+    qin = bud[bud['name'] == 'FROM_CHD']
+    zones = ['ZONE_1', 'ZONE_2', 'ZONE_3']
+    assert np.isclose(sum(qin[n] for n in zones),
+                      chd[chd > 0].sum(), rtol=1e-5), 'CHD inflow mismatch'
+    pd = bud[bud['name'] == 'PERCENT_DISCREPANCY']
+    for name in zones:
+        assert pd[name][0] < 1e-3, 'Zone budget {} does not balance.'.format(
+            name)
+    return
+
+
+def test_zonbud_batch():
+    """
+    t039 Test computing the budgets of several zone arrays in one pass
+    """
+    fpth = os.path.join('..', 'examples', 'data', 'mp6', 'EXAMPLE.BUD')
+    cbc = CellBudgetFile(fpth)
+    rng = np.random.RandomState(39)
+    zons = [rng.randint(1, n, (cbc.nlay, cbc.nrow, cbc.ncol))
+            for n in (2, 4, 10)]
+    aliases = [None, {1: 'North', 2: 'South'}, None]
+    zbs = zone_budgets(cbc, zons, aliases=aliases, n_workers=2)
+    assert len(zbs) == len(zons), 'Wrong number of zone budgets returned.'
+    for zon, alias, zb in zip(zons, aliases, zbs):
+        zb1 = ZoneBudget(cbc, zon, aliases=alias)
+        assert np.array_equal(zb.get_budget(), zb1.get_budget()), \
+            'Batch zone budget does not match ZoneBudget.'
+    return
+
+
 if __name__ == '__main__':
     # test_compare2mflist_mlt()
     test_compare2zonebudget()
@@ -244,3 +402,8 @@ if __name__ == '__main__':
     test_dataframes()
     test_get_budget()
     test_get_model_shape()
+    test_zonbud_zone_flows()
+    test_zonbud_n_workers()
+    test_zonbud_topology()
+    test_zonbud_mf6_flowja()
+    test_zonbud_batch()
@@ -37,6 +37,19 @@ def test_headu_file():
         t1 = np.array([d.min(), d.max()])
         assert np.allclose(t1, minmaxtrue[i])
 
+    # write a cell-major file with one row for each node of every layer
+    cm = headobj.to_cell_major(os.path.join(tpth, 'headu.npy'))
+    nodes = [0, 7800, 19478]
+    assert cm.shape == (19479, len(headobj.get_times())), \
+        'cell-major shape {} is not correct'.format(cm.shape)
+    ts = headobj.get_ts(nodes)
+    assert ts.shape == (len(headobj.get_times()), len(nodes) + 1)
+    for itim, totim in enumerate(headobj.get_times()):
+        data = np.concatenate(headobj.get_data(totim=totim))
+        assert ts[itim, 0] == totim
+        assert np.array_equal(ts[itim, 1:], data[nodes]), \
+            'cell-major get_ts != get_data for totim {}'.format(totim)
+
     return
 
 
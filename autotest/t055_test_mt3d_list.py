@@ -26,5 +26,31 @@ def test_mtlist():
     mt = flopy.utils.MtListBudget(os.path.join(mt_dir, "mcomp_fail2.list"))
     df_gw, df_sw = mt.parse(forgive=True, start_datetime="1-1-1970")
 
+def test_mtlist_fast():
+    try:
+        import pandas as pd
+    except:
+        return
+
+    mt_dir = os.path.join("..", "examples", "data", "mt3d_test")
+    list_file = os.path.join(mt_dir, "mcomp_fail2.list")
+    for forgive in [True, False]:
+        dfs = []
+        for fast in [True, False]:
+            mt = flopy.utils.MtListBudget(list_file)
+            try:
+                dfs.append(mt.parse(forgive=forgive, fast=fast))
+            except Exception as e:
+                dfs.append(str(e))
+        if not forgive:
+            # the last stream budget table in the file is incomplete
+            assert isinstance(dfs[0], str)
+            assert dfs[0] == dfs[1]
+            continue
+        for df_fast, df in zip(dfs[0], dfs[1]):
+            assert list(df_fast.columns) == list(df.columns)
+            assert df_fast.equals(df)
+
 if __name__ == '__main__':
-    test_mtlist()
\ No newline at end of file
+    test_mtlist()
+    test_mtlist_fast()
\ No newline at end of file
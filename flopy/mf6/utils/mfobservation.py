@@ -1,5 +1,7 @@
+import os
 import numpy as np
 import csv
+from ...utils.observationfile import _get_csv_rows, _read_csv_columns
 
 def try_float(data):
     try:
@@ -71,8 +73,21 @@ class Observations:
     '''
     def __init__(self, fi):
         self.Obsname = fi
+        self._index = None
 
     def _reader(self, fi):
+        # observation file reader that converts all of the data to floating
+        # point at once, with the header as the first row
+        header = self._get_index(fi)[0]
+        try:
+            values = self._read_columns(fi, list(range(len(header))))
+        except ValueError:
+            return self._csv_reader(fi)
+        if values.shape[0] < 1:
+            return np.array([header])
+        return np.vstack((np.array(header), values.astype(str)))
+
+    def _csv_reader(self, fi):
         # observation file reader is a standard csv reader that we try to
         # convert each entry to floating point
         with open(fi) as f:
@@ -80,6 +95,43 @@ class Observations:
             data = [[try_float(point) for point in line] for line in reader]
         return np.array(data)
 
+    def _get_index(self, fi):
+        # index the observation names and the position of each row in the
+        # observation file, so that columns can be read without reading
+        # the whole file. The index is rebuilt when the file is rewritten.
+        stat = os.stat(fi)
+        signature = (fi, stat.st_size, stat.st_mtime)
+        if self._index is None or self._index[:3] != signature:
+            with open(fi) as f:
+                header = next(csv.reader(f))
+            starts, ends = _get_csv_rows(fi)
+            self._index = signature + (header, starts, ends)
+        return self._index[3:]
+
+    def _read_columns(self, fi, columns):
+        # vectorized parser for the zero-based columns of the data rows
+        header, starts, ends = self._get_index(fi)
+        return _read_csv_columns(fi, starts, ends, len(header), columns)
+
+    def _get_columns(self, keys=None):
+        # return a dictionary of observation names and data, only the
+        # columns in keys are read
+        header = self._get_index(self.Obsname)[0]
+        if keys is None:
+            keys = header
+        # the last column is used for duplicate names, as in _array_to_dict
+        columns = []
+        for key in keys:
+            if key not in header:
+                raise KeyError(key)
+            columns.append(len(header) - 1 - header[::-1].index(key))
+        try:
+            values = self._read_columns(self.Obsname, columns)
+        except ValueError:
+            data = self._array_to_dict(self._csv_reader(self.Obsname))
+            return {key: data[key] for key in keys}
+        return {key: values[:, j].tolist() for j, key in enumerate(keys)}
+
     def _array_to_dict(self, data, key=None):
         # convert np.array to dictionary of observation names and data
         data = data.T
@@ -93,9 +145,8 @@ class Observations:
     def list_records(self):
         # requester option to list all records (observation names) within an
         # observation file
-        data_str = self._reader(self.Obsname)
-        data = self._array_to_dict(data_str)
-        for key in data:
+        header = self._get_index(self.Obsname)[0]
+        for key in sorted(set(header), key=header.index):
             print(key)
 
     def get_data(self, key=None, idx=None, totim=None):
@@ -114,11 +165,10 @@ class Observations:
         -------
         data: (list) observation file data in list
         '''
-        data = self._reader(self.Obsname)
-
         # check if user supplied observation key, default is to return
         # all observations
         if key is None:
+            data = self._reader(self.Obsname)
             header = data[0]
             if idx is not None:
                 data = data[idx, :]
@@ -135,7 +185,7 @@ class Observations:
                 pass
 
         else: 
-            data = self._array_to_dict(data, key)
+            data = self._get_columns([key])[key]
             if idx is not None:
                 data = data[idx]
             elif totim is not None:
@@ -155,8 +205,7 @@ class Observations:
         return self.get_data(key='time')
 
     def get_nrecords(self):
-        data_str = self._reader(self.Obsname)
-        return len(self._array_to_dict(data_str))
+        return len(set(self._get_index(self.Obsname)[0]))
         
     def get_ntimes(self):
         return len(self.get_times())
@@ -199,8 +248,13 @@ class Observations:
             print("this feature requires pandas")
             return None
 
-        data_str = self._reader(self.Obsname)
-        data = self._array_to_dict(data_str)
+        if keys is None:
+            data = self._get_columns()
+        else:
+            data = self._get_columns(['time'] +
+                                     [key for key in self._key_list(keys)
+                                      if key in
+                                      self._get_index(self.Obsname)[0]])
         time = data['time']
         
         if start_datetime is not None:
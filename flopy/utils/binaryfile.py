@@ -9,10 +9,12 @@ important classes that can be accessed by the user.
 
 """
 from __future__ import print_function
+import os
 import numpy as np
 import warnings
 from collections import OrderedDict
-from ..utils.datafile import Header, LayerFile
+from ..utils.datafile import Header, LayerFile, ThreadLocalFile, \
+    get_data_many
 
 
 class BinaryHeader(Header):
@@ -234,6 +236,93 @@ def get_headfile_precision(filename):
     return result
 
 
+# version of the layout of the header index cache files
+_index_cache_version = 2
+
+
+def _load_index_cache(filename, signature):
+    """
+    Load the header index cache (filename.fpidx) for a binary output file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the binary output file.
+    signature : dict
+        Values, in addition to the size and modification time of the binary
+        output file and the cache version, that must match the values stored
+        in the cache.
+
+    Returns
+    -------
+    cache : dict or None
+        Dictionary of arrays stored in the cache.  None is returned if the
+        cache does not exist or is out of date.
+
+    """
+    fpth = filename + '.fpidx'
+    if not os.path.isfile(fpth):
+        return None
+    try:
+        with np.load(fpth) as f:
+            cache = {key: f[key] for key in f.files}
+    except Exception:
+        return None
+    stat = os.stat(filename)
+    signature = dict(signature)
+    signature['filesize'] = stat.st_size
+    signature['mtime'] = stat.st_mtime
+    signature['cacheversion'] = _index_cache_version
+    for key, value in signature.items():
+        if key not in cache or not np.array_equal(cache[key], value):
+            return None
+    return cache
+
+
+def _save_index_cache(filename, signature, arrays):
+    """
+    Save the header index of a binary output file to filename.fpidx.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the binary output file.
+    signature : dict
+        Values used to validate the cache when it is loaded.
+    arrays : dict
+        Arrays that define the header index.
+
+    """
+    stat = os.stat(filename)
+    data = dict(arrays)
+    data.update(signature)
+    data['filesize'] = stat.st_size
+    data['mtime'] = stat.st_mtime
+    data['cacheversion'] = _index_cache_version
+    fpth = filename + '.fpidx'
+    try:
+        with open(fpth, 'wb') as f:
+            np.savez(f, **data)
+    except (IOError, OSError):
+        warnings.warn('Could not write index cache: {}'.format(fpth))
+    return
+
+
+def _select_kstpkper(recordarray, kstpkper_range):
+    """
+    Return a boolean array that is True for the records in recordarray
+    from the first through the last zero-based (kstp, kper) in
+    kstpkper_range.
+
+    """
+    (kstp0, kper0), (kstp1, kper1) = kstpkper_range
+    kper = recordarray['kper'] - 1
+    kstp = recordarray['kstp'] - 1
+    after = (kper > kper0) | ((kper == kper0) & (kstp >= kstp0))
+    before = (kper < kper1) | ((kper == kper1) & (kstp <= kstp1))
+    return after & before
+
+
 class BinaryLayerFile(LayerFile):
     """
     The BinaryLayerFile class is the super class from which specific derived
@@ -242,8 +331,14 @@ class BinaryLayerFile(LayerFile):
     """
 
     def __init__(self, filename, precision, verbose, kwargs):
+        self.mmap = kwargs.pop('mmap', False)
+        self.index_cache = kwargs.pop('index_cache', False)
+        self._mmbuf = None
+        self.cell_major = None
         super(BinaryLayerFile, self).__init__(filename, precision, verbose,
                                               kwargs)
+        if self.mmap:
+            self._mmbuf = np.memmap(self.filename, dtype=np.uint8, mode='r')
         return
 
     def _build_index(self):
@@ -252,6 +347,8 @@ class BinaryLayerFile(LayerFile):
         to the position in the binary file.
 
         """
+        if self.index_cache and self._load_index():
+            return
         header = self._get_header()
         self.nrow = header['nrow']
         self.ncol = header['ncol']
@@ -264,32 +361,126 @@ class BinaryLayerFile(LayerFile):
         self.file.seek(0, 2)
         self.totalbytes = self.file.tell()
         self.file.seek(0, 0)
-        ipos = 0
-        while ipos < self.totalbytes:
+        self.iposend = 0
+        records, iposarray = self._scan_records()
+
+        # self.recordarray contains a recordarray of all the headers.
+        self.recordarray = np.array(records, dtype=self.header_dtype)
+        self.iposarray = np.array(iposarray, dtype=np.int64)
+        if len(records) > 0:
+            self.nlay = np.max(self.recordarray['ilay'])
+        if self.index_cache:
+            self._save_index()
+        return
+
+    def _scan_records(self):
+        """
+        Read the headers of the complete records from self.iposend to the
+        end of the file.  A partial record at the end of the file, which
+        is still being written, is not included.
+
+        Returns
+        -------
+        records, iposarray : lists
+            The headers and the positions of the data for the records.
+
+        """
+        records = []
+        iposarray = []
+        headerbytes = self.header_dtype.itemsize
+        ipos = self.iposend
+        while ipos + headerbytes <= self.totalbytes:
+            self.file.seek(ipos, 0)
             header = self._get_header()
-            self.recordarray.append(header)
+            databytes = self.get_databytes(header)
+            if ipos + headerbytes + databytes > self.totalbytes:
+                break
+            ipos += headerbytes + databytes
+            self.iposend = ipos
             if self.text.upper() not in header['text']:
                 continue
-            if ipos == 0:
-                self.times.append(header['totim'])
+            records.append(header)
+            totim = header['totim']
+            if len(self.times) == 0 or totim != self.times[-1]:
+                self.times.append(totim)
                 kstpkper = (header['kstp'], header['kper'])
                 self.kstpkper.append(kstpkper)
-            else:
-                totim = header['totim']
-                if totim != self.times[-1]:
-                    self.times.append(totim)
-                    kstpkper = (header['kstp'], header['kper'])
-                    self.kstpkper.append(kstpkper)
-            ipos = self.file.tell()
-            self.iposarray.append(ipos)
-            databytes = self.get_databytes(header)
-            self.file.seek(databytes, 1)
-            ipos = self.file.tell()
+            iposarray.append(ipos - databytes)
+        return records, iposarray
 
-        # self.recordarray contains a recordarray of all the headers.
-        self.recordarray = np.array(self.recordarray, dtype=self.header_dtype)
-        self.iposarray = np.array(self.iposarray)
+    def refresh(self):
+        """
+        Add the records that have been written to the file since it was
+        opened or last refreshed.  Only the new part of the file is read,
+        so a file that is still being written by a running simulation can
+        be followed at a cost proportional to the new records.  A partial
+        record at the end of the file is ignored until it is complete.
+
+        Returns
+        -------
+        nrecords : int
+            The number of records that were added.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadFile('test.hds')
+        >>> if hdobj.refresh() > 0:
+        ...     head = hdobj.get_data()
+
+        """
+        self.file.seek(0, 2)
+        self.totalbytes = self.file.tell()
+        records, iposarray = self._scan_records()
+        if len(records) == 0:
+            return 0
+        self.recordarray = np.concatenate(
+            (self.recordarray, np.array(records, dtype=self.header_dtype)))
+        self.iposarray = np.concatenate(
+            (self.iposarray, np.array(iposarray, dtype=np.int64)))
         self.nlay = np.max(self.recordarray['ilay'])
+        if self.mmap:
+            self._mmbuf = np.memmap(self.filename, dtype=np.uint8, mode='r')
+        if self.index_cache:
+            self._save_index()
+        return len(records)
+
+    def _index_signature(self):
+        return {'text': self.text, 'precision': self.precision}
+
+    def _load_index(self):
+        """
+        Load the index from the index cache file.  Returns False if the
+        cache does not exist or is out of date.
+
+        """
+        cache = _load_index_cache(self.filename, self._index_signature())
+        if cache is None:
+            return False
+        self.nrow = cache['nrow'][()]
+        self.ncol = cache['ncol'][()]
+        self.nlay = cache['nlay'][()]
+        self.totalbytes = cache['totalbytes'][()]
+        self.iposend = cache['iposend'][()]
+        self.recordarray = cache['recordarray']
+        self.iposarray = cache['iposarray']
+        self.times = list(cache['times'])
+        self.kstpkper = [tuple(kk) for kk in cache['kstpkper']]
+        return True
+
+    def _save_index(self):
+        """
+        Save the index to the index cache file.
+
+        """
+        arrays = {'nrow': self.nrow, 'ncol': self.ncol, 'nlay': self.nlay,
+                  'totalbytes': self.totalbytes, 'iposend': self.iposend,
+                  'recordarray': self.recordarray,
+                  'iposarray': self.iposarray,
+                  'times': np.array(self.times, dtype=self.realtype),
+                  'kstpkper': np.array(self.kstpkper,
+                                       dtype=np.int32).reshape(-1, 2)}
+        _save_index_cache(self.filename, self._index_signature(), arrays)
         return
 
     def get_databytes(self, header):
@@ -314,6 +505,123 @@ class BinaryLayerFile(LayerFile):
         return binaryread(self.file, self.realtype,
                           shape=shp)
 
+    def _get_record_view(self, idx, shp):
+        """
+        Return a read-only view of the data for record idx in the
+        memory-mapped file.
+
+        """
+        return np.ndarray(shp, dtype=self.realtype, buffer=self._mmbuf,
+                          offset=int(self.iposarray[idx]))
+
+    def _get_strided_view(self, indices, shp):
+        """
+        Return a read-only view of shape (len(indices),) + shp spanning the
+        records in indices, or None if the records are not evenly spaced in
+        the memory-mapped file.
+
+        """
+        ipos = self.iposarray[indices]
+        if len(ipos) > 1:
+            stride = np.diff(ipos)
+            if stride[0] <= 0 or not np.all(stride == stride[0]):
+                return None
+            stride = int(stride[0])
+        else:
+            stride = int(self.get_databytes(self.recordarray[indices[0]]))
+        strides = [self.realtype(1).nbytes]
+        for n in shp[:0:-1]:
+            strides.insert(0, strides[0] * int(n))
+        strides.insert(0, stride)
+        return np.ndarray((len(indices),) + shp, dtype=self.realtype,
+                          buffer=self._mmbuf, offset=int(ipos[0]),
+                          strides=strides)
+
+    def _get_data_array(self, totim=0):
+        """
+        Get the three dimensional data array for the specified totim value.
+        If the file is memory-mapped a read-only view is returned when the
+        layers for totim are stored contiguously.
+
+        """
+        if not self.mmap:
+            return super(BinaryLayerFile, self)._get_data_array(totim)
+
+        keyindices = np.where((self.recordarray['totim'] == totim))[0]
+        if len(keyindices) == 0:
+            msg = 'totim value ({}) not found in file...'.format(totim)
+            raise Exception(msg)
+
+        idx = keyindices[0]
+        shp = (self.recordarray['nrow'][idx], self.recordarray['ncol'][idx])
+        ilay = self.recordarray['ilay'][keyindices]
+        if np.array_equal(ilay, np.arange(1, self.nlay + 1)):
+            data = self._get_strided_view(keyindices, shp)
+            if data is not None:
+                return data
+
+        # layers are not regularly spaced so a copy is required
+        data = np.empty((self.nlay,) + shp, dtype=self.realtype)
+        data[:, :, :] = np.nan
+        for idx in keyindices:
+            ilay = self.recordarray['ilay'][idx]
+            data[ilay - 1] = self._get_record_view(idx, shp)
+        return data
+
+    def get_alldata(self, mflay=None, nodata=-9999):
+        """
+        Get all of the data from the file.
+
+        Parameters
+        ----------
+        mflay : integer
+           MODFLOW zero-based layer number to return.  If None, then all
+           all layers will be included. (Default is None.)
+
+        nodata : float
+           The nodata value in the data array.  All array values that have the
+           nodata value will be assigned np.nan.  If None, values are not
+           replaced.
+
+        Returns
+        ----------
+        data : numpy array
+            Array has size (ntimes, nlay, nrow, ncol) if mflay is None or it
+            has size (ntimes, nrow, ncol) if mlay is specified.
+
+        Notes
+        -----
+        If the file was opened with mmap=True and nodata is None, a read-only
+        view of the memory-mapped file is returned when all of the records
+        are evenly spaced in the file.
+
+        """
+        if self.mmap and nodata is None:
+            ilay = self.recordarray['ilay'][:len(self.iposarray)]
+            ntimes = len(self.times)
+            expected = np.tile(np.arange(1, self.nlay + 1), ntimes)
+            if np.array_equal(ilay, expected):
+                header = self.recordarray[0]
+                shp = (ntimes * self.nlay, header['nrow'], header['ncol'])
+                indices = np.arange(len(ilay))
+                rv = self._get_strided_view(indices, shp[1:])
+                if rv is not None:
+                    rv = rv.reshape((ntimes, self.nlay) + shp[1:])
+                    if mflay is not None:
+                        rv = rv[:, mflay, :, :]
+                    return rv
+        return super(BinaryLayerFile, self).get_alldata(mflay=mflay,
+                                                        nodata=nodata)
+
+    def close(self):
+        """
+        Close the file handle and release the memory-mapped buffer.
+
+        """
+        self._mmbuf = None
+        super(BinaryLayerFile, self).close()
+        return
+
     def _get_header(self):
         """
         Read the file header
@@ -358,25 +666,355 @@ class BinaryLayerFile(LayerFile):
         # Initialize result array and put times in first column
         result = self._init_result(nstation)
 
-        istat = 1
-        for k, i, j in kijlist:
-            ioffset = (i * self.ncol + j) * self.realtype(1).nbytes
-            for irec, header in enumerate(self.recordarray):
-                ilay = header[
-                           'ilay'] - 1  # change ilay from header to zero-based
-                if ilay != k:
+        # read each cell from the cell-major store if one is available
+        kij = np.array(kijlist, dtype=np.int64).reshape(-1, 3)
+        ioffsets = kij[:, 1] * self.ncol + kij[:, 2]
+        if self.cell_major is not None and \
+                self.cell_major.shape[1] == len(self.times):
+            nodes = kij[:, 0] * self.nrow * self.ncol + ioffsets
+            result[:, 1:] = self.cell_major[nodes].T
+            return result
+
+        # map each record to its row in the result array
+        nrec = len(self.iposarray)
+        headers = self.recordarray[:nrec]
+        times = result[:, 0]
+        sorter = np.argsort(times)
+        itims = sorter[np.searchsorted(times, headers['totim'],
+                                       sorter=sorter)]
+        ilays = headers['ilay'] - 1  # change ilay from header to zero-based
+
+        # group the requested cells by layer and read all of the cells in
+        # a layer with a single read for each record
+        for k in np.unique(kij[:, 0]):
+            istats = np.where(kij[:, 0] == k)[0]
+            irecs = np.where(ilays == k)[0]
+            if len(irecs) == 0:
+                continue
+            ioffset = ioffsets[istats]
+            values = self._read_cells(irecs, ioffset)
+            result[itims[irecs][:, np.newaxis], istats + 1] = values
+        return result
+
+    def to_cell_major(self, filename, chunksize=100):
+        """
+        Write the data in the file to a cell-major numpy (.npy) file with
+        shape (ncells, ntimes), so that the time series for a cell is stored
+        contiguously.  ncells is nlay * nrow * ncol for structured head
+        files and the sum of the nodes in each layer for unstructured head
+        files.  The file is attached to this object and used by get_ts.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the .npy file to write.
+        chunksize : int
+            Number of times that are held in memory and written to the
+            .npy file at once. (Default is 100.)
+
+        Returns
+        -------
+        out : numpy memmap
+            Read-only memory-mapped array with shape (ncells, ntimes).  The
+            row for zero-based cell (k, i, j) is (k * nrow + i) * ncol + j.
+            The rows of an unstructured head file are the nodes of each
+            layer, in layer order.
+
+        See Also
+        --------
+        set_cell_major
+
+        Examples
+        --------
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadFile('test.hds')
+        >>> hdobj.to_cell_major('test.hds.npy')
+        >>> ts = hdobj.get_ts([(0, 10, 10), (1, 10, 10)])
+
+        """
+        ntimes = len(self.times)
+        first = self._get_layer_rows()
+        ncells = first[-1]
+        out = np.lib.format.open_memmap(filename, mode='w+',
+                                        dtype=self.realtype,
+                                        shape=(ncells, ntimes))
+        itims = {}
+        for itim, totim in enumerate(self.times):
+            itims[totim] = itim
+
+        # buffer chunksize times and write them as one block
+        buffer = np.empty((ncells, chunksize), dtype=self.realtype)
+        buffer[:, :] = np.nan
+        it0 = 0
+        for header, data in self.iter_records(reuse_buffer=True):
+            itim = itims[header['totim']]
+            if itim >= it0 + chunksize:
+                out[:, it0:it0 + chunksize] = buffer
+                buffer[:, :] = np.nan
+                it0 += chunksize
+            k = header['ilay'] - 1
+            buffer[first[k]:first[k + 1], itim - it0] = data.ravel()
+        out[:, it0:ntimes] = buffer[:, :ntimes - it0]
+        out.flush()
+        del out
+        return self.set_cell_major(filename)
+
+    def set_cell_major(self, filename):
+        """
+        Attach a cell-major numpy (.npy) file written by to_cell_major.
+        get_ts reads time series from the cell-major file instead of the
+        binary file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the .npy file.
+
+        Returns
+        -------
+        out : numpy memmap
+            Read-only memory-mapped array with shape (ncells, ntimes).
+
+        """
+        cell_major = np.load(filename, mmap_mode='r')
+        shape = (self._get_layer_rows()[-1], len(self.times))
+        if cell_major.shape != shape:
+            msg = 'cell-major file {} has shape {}'.format(
+                filename, cell_major.shape) + ' not {}'.format(shape)
+            raise ValueError(msg)
+        self.cell_major = cell_major
+        return cell_major
+
+    def _get_layer_rows(self):
+        """
+        Return the row of the first cell of each layer in a cell-major
+        file, followed by the number of rows.
+
+        """
+        return np.arange(self.nlay + 1, dtype=np.int64) * \
+               self.nrow * self.ncol
+
+    def iter_records(self, text=None, kstpkper_range=None, layers=None,
+                     reuse_buffer=False):
+        """
+        Iterate over the records in the file one record at a time.
+
+        Parameters
+        ----------
+        text : str
+            Only return records that include this text identifier.  If None,
+            all records are returned. (Default is None.)
+        kstpkper_range : tuple of two (kstp, kper) tuples
+            Only return records from the first through the last zero-based
+            (kstp, kper) in kstpkper_range.  If None, records for all time
+            steps are returned. (Default is None.)
+        layers : int or list of ints
+            Zero-based layers to return.  If None, all layers are returned.
+            (Default is None.)
+        reuse_buffer : bool
+            If True, the data for every record is read into the same array,
+            which is overwritten when the next record is read.  Not used if
+            the file is memory-mapped. (Default is False.)
+
+        Returns
+        ----------
+        out : generator
+            Generator of (header, data) tuples, where header is the record
+            header and data is the array for the record.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadFile('test.hds')
+        >>> for header, data in hdobj.iter_records(layers=0):
+        ...     print(header['totim'], data.max())
+
+        """
+        headers = self.recordarray[:len(self.iposarray)]
+        select = np.ones(len(headers), dtype=bool)
+        if text is not None:
+            if not isinstance(text, bytes):
+                text = text.encode()
+            select &= np.char.find(np.char.upper(headers['text']),
+                                   text.upper()) >= 0
+        if kstpkper_range is not None:
+            select &= _select_kstpkper(headers, kstpkper_range)
+        if layers is not None:
+            select &= np.in1d(headers['ilay'] - 1, layers)
+
+        buffer = None
+        for irec in np.where(select)[0]:
+            header = headers[irec]
+            shp = self._get_record_shape(header)
+            if self.mmap:
+                yield header, self._get_record_view(irec, shp)
+                continue
+            self.file.seek(int(self.iposarray[irec]), 0)
+            if reuse_buffer:
+                if buffer is None or buffer.shape != shp:
+                    buffer = np.empty(shp, dtype=self.realtype)
+                self.file.readinto(buffer)
+                yield header, buffer
+            else:
+                yield header, binaryread(self.file, self.realtype, shape=shp)
+
+    def _get_record_shape(self, header):
+        """
+        Return the shape of the data array for a record.
+
+        """
+        return (int(header['nrow']), int(header['ncol']))
+
+    def reduce(self, ops=('min', 'max', 'mean', 'std', 'argmax'),
+               layers=None, mask_values=None):
+        """
+        Calculate statistics for every cell over all of the times in the
+        file.  The statistics are calculated in a single pass over the file
+        with one record in memory at a time, so the full (ntimes, nlay,
+        nrow, ncol) array is never created.
+
+        Parameters
+        ----------
+        ops : tuple of str
+            Statistics to calculate.  Valid statistics are 'min', 'max',
+            'mean', 'std', 'argmin', and 'argmax'.  'argmin' and 'argmax'
+            are the zero-based index of the time in get_times() with the
+            minimum and maximum value. (Default is ('min', 'max', 'mean',
+            'std', 'argmax').)
+        layers : int or list of ints
+            Zero-based layers to calculate statistics for.  If None, then
+            all layers are included. (Default is None.)
+        mask_values : list of floats
+            Values, such as hnoflo and hdry, that are excluded from the
+            statistics. (Default is None.)
+
+        Returns
+        ----------
+        out : dict
+            Dictionary with the statistic names as keys.  Each value has
+            the same structure as get_data() for the selected layers.  Cells
+            without any unmasked values are nan, or -1 for 'argmin' and
+            'argmax'.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadFile('test.hds')
+        >>> stats = hdobj.reduce(ops=('max', 'mean'), mask_values=[-999.])
+        >>> hmax = stats['max']
+
+        """
+        valid_ops = ('min', 'max', 'mean', 'std', 'argmin', 'argmax')
+        for op in ops:
+            if op not in valid_ops:
+                msg = 'reduce() error: {} is not one of '.format(op) + \
+                      ', '.join(valid_ops)
+                raise ValueError(msg)
+        if layers is None:
+            layers = np.arange(self.nlay)
+        layers = [int(k) for k in np.atleast_1d(layers)]
+        itims = {}
+        for itim, totim in enumerate(self.times):
+            itims[totim] = itim
+
+        # compare mask values in the precision of the file so that values
+        # such as hnoflo and hdry written in single precision are matched
+        if mask_values is not None:
+            mask_values = np.array(mask_values,
+                                   dtype=self.realtype).ravel()
+
+        acc = {}
+        for header, data in self.iter_records(layers=layers,
+                                              reuse_buffer=True):
+            k = header['ilay'] - 1
+            itim = itims[header['totim']]
+            a = data.astype(np.float64)
+            valid = ~np.isnan(a)
+            if mask_values is not None:
+                valid &= ~np.in1d(data, mask_values).reshape(a.shape)
+            if k not in acc:
+                acc[k] = {'count': np.zeros(a.shape, dtype=np.int64),
+                          'mean': np.zeros(a.shape),
+                          'm2': np.zeros(a.shape),
+                          'min': np.full(a.shape, np.inf),
+                          'max': np.full(a.shape, -np.inf),
+                          'argmin': np.full(a.shape, -1, dtype=np.int64),
+                          'argmax': np.full(a.shape, -1, dtype=np.int64)}
+            d = acc[k]
+
+            # update the running mean and sum of squared differences
+            d['count'] += valid
+            delta = np.where(valid, a - d['mean'], 0.)
+            d['mean'] += delta / np.maximum(d['count'], 1)
+            d['m2'] += np.where(valid, delta * (a - d['mean']), 0.)
+
+            idx = valid & (a < d['min'])
+            d['min'][idx] = a[idx]
+            d['argmin'][idx] = itim
+            idx = valid & (a > d['max'])
+            d['max'][idx] = a[idx]
+            d['argmax'][idx] = itim
+
+        out = {}
+        for op in ops:
+            arrays = []
+            for k in layers:
+                if k not in acc:
+                    arrays.append(None)
                     continue
-                ipos = np.long(self.iposarray[irec])
+                d = acc[k]
+                empty = d['count'] == 0
+                if op in ('argmin', 'argmax'):
+                    v = d[op].copy()
+                else:
+                    if op == 'std':
+                        v = np.sqrt(d['m2'] / np.maximum(d['count'], 1))
+                    else:
+                        v = d[op].copy()
+                    v[empty] = np.nan
+                arrays.append(v)
+            out[op] = self._stack_layers(arrays)
+        return out
 
-                # Calculate offset necessary to reach intended cell
-                self.file.seek(ipos + np.long(ioffset), 0)
+    def _stack_layers(self, arrays):
+        """
+        Combine a list of layer arrays into a single array.
 
-                # Find the time index and then put value into result in the
-                # correct location.
-                itim = np.where(result[:, 0] == header['totim'])[0]
-                result[itim, istat] = binaryread(self.file, self.realtype)
-            istat += 1
-        return result
+        """
+        return np.array(arrays)
+
+    def _read_cells(self, irecs, ioffset):
+        """
+        Read the values at the zero-based cell offsets ioffset within a
+        layer for each of the records in irecs.
+
+        Returns
+        -------
+        values : numpy array
+            Array has size (len(irecs), len(ioffset)).
+
+        """
+        values = np.empty((len(irecs), len(ioffset)), dtype=self.realtype)
+        npl = self.nrow * self.ncol
+        if self.mmap:
+            view = self._get_strided_view(irecs, (npl,))
+            if view is not None:
+                values[:, :] = view[:, ioffset]
+                return values
+
+        # only read the span of the layer that contains the cells
+        i0 = ioffset.min()
+        nval = ioffset.max() - i0 + 1
+        itemsize = self.realtype(1).nbytes
+        for n, irec in enumerate(irecs):
+            if self.mmap:
+                v = self._get_record_view(irec, (npl,))
+                values[n, :] = v[ioffset]
+                continue
+            self.file.seek(int(self.iposarray[irec]) + int(i0) * itemsize, 0)
+            v = binaryread(self.file, self.realtype, shape=(nval,))
+            values[n, :] = v.reshape(-1)[ioffset - i0]
+        return values
 
 
 class HeadFile(BinaryLayerFile):
@@ -393,6 +1031,13 @@ class HeadFile(BinaryLayerFile):
         'auto', 'single' or 'double'.  Default is 'auto'.
     verbose : bool
         Write information to the screen.  Default is False.
+    mmap : bool
+        Memory-map the file so that get_data and get_alldata return
+        read-only views of the file instead of copies.  Default is False.
+    index_cache : bool
+        Save the record index to filename.fpidx and reuse it when the file
+        is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Attributes
     ----------
@@ -460,6 +1105,13 @@ class UcnFile(BinaryLayerFile):
         'auto', 'single' or 'double'.  Default is 'auto'.
     verbose : bool
         Write information to the screen.  Default is False.
+    mmap : bool
+        Memory-map the file so that get_data and get_alldata return
+        read-only views of the file instead of copies.  Default is False.
+    index_cache : bool
+        Save the record index to filename.fpidx and reuse it when the file
+        is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Attributes
     ----------
@@ -508,6 +1160,161 @@ class UcnFile(BinaryLayerFile):
         return
 
 
+class SparseBudgetData(object):
+    """
+    Compact list-style budget records (imeth 2, 5, and 6) stored as flat
+    arrays.  The entries for record n are in node[offsets[n]:offsets[n + 1]],
+    q[offsets[n]:offsets[n + 1]], etc., which is the same layout used by a
+    compressed sparse row matrix.
+
+    Parameters
+    ----------
+    recordarray : numpy recarray
+        Headers for the records.
+    offsets : numpy array
+        Integer array of size (nrecords + 1) with the position of the first
+        entry for each record.
+    node : numpy array
+        One-based node numbers for all of the entries.
+    q : numpy array
+        Flows for all of the entries.
+    node2 : numpy array
+        One-based node2 numbers for all of the entries.  Entries from
+        records that are not imeth 6 records are 0.
+    aux : OrderedDict
+        Dictionary of auxiliary variable arrays for all of the entries.
+        Entries from records without an auxiliary variable are nan.
+
+    Notes
+    -----
+    SparseBudgetData objects are created by CellBudgetFile.get_sparse_data
+    and should not be created directly.
+
+    Examples
+    --------
+    >>> import flopy
+    >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+    >>> sp = cbb.get_sparse_data(text='RIVER LEAKAGE')
+    >>> zones, qz = sp.sum_by_zone(izone)
+
+    """
+
+    def __init__(self, recordarray, offsets, node, q, node2, aux):
+        self.recordarray = recordarray
+        self.offsets = offsets
+        self.node = node
+        self.q = q
+        self.node2 = node2
+        self.aux = aux
+        return
+
+    @property
+    def nrecords(self):
+        """
+        Number of records.
+
+        """
+        return self.recordarray.shape[0]
+
+    def get_record_index(self):
+        """
+        Get the zero-based record number for every entry.
+
+        Returns
+        -------
+        irec : numpy array
+            Integer array with the same size as node.
+
+        """
+        return np.repeat(np.arange(self.nrecords), np.diff(self.offsets))
+
+    def _sum_by_group(self, igroup, ngroups):
+        """
+        Sum q for each record and zero-based group number in igroup.
+
+        """
+        key = self.get_record_index() * ngroups + igroup
+        totals = np.bincount(key, weights=self.q,
+                             minlength=self.nrecords * ngroups)
+        return totals.reshape(self.nrecords, ngroups)
+
+    def sum_by_node(self):
+        """
+        Sum the flows for each node in each record.
+
+        Returns
+        -------
+        nodes : numpy array
+            Sorted unique one-based node numbers in the records.
+        totals : numpy array
+            Array of size (nrecords, len(nodes)) with the total flow for
+            each node.
+
+        """
+        nodes, igroup = np.unique(self.node, return_inverse=True)
+        return nodes, self._sum_by_group(igroup, len(nodes))
+
+    def sum_by_zone(self, izone):
+        """
+        Sum the flows for each zone in each record.
+
+        Parameters
+        ----------
+        izone : numpy array
+            Integer zone array for the model grid.  The array is raveled so
+            it can have any shape with a size equal to the number of nodes.
+
+        Returns
+        -------
+        zones : numpy array
+            Sorted unique zone numbers in izone.
+        totals : numpy array
+            Array of size (nrecords, len(zones)) with the total flow for
+            each zone.
+
+        """
+        zones, izone = np.unique(np.asarray(izone).ravel(),
+                                 return_inverse=True)
+        igroup = izone[self.node - 1]
+        return zones, self._sum_by_group(igroup, len(zones))
+
+    def sum_by_package(self):
+        """
+        Sum the flows for each package and time step.  The package for a
+        record is paknam2 (MODFLOW 6), or paknam or the text identifier if
+        the package names are blank.
+
+        Returns
+        -------
+        kstpkper : list of tuples
+            List of unique zero-based (kstp, kper) values in the records.
+        paknams : list of bytes
+            List of unique package names in the records.
+        totals : numpy array
+            Array of size (len(kstpkper), len(paknams)) with the total flow
+            for each package.
+
+        """
+        qrec = np.bincount(self.get_record_index(), weights=self.q,
+                           minlength=self.nrecords)
+        # encode (kper, kstp) as a single key, which sorts by kper and then
+        # by kstp
+        kper = self.recordarray['kper'].astype(np.int64)
+        kstp = self.recordarray['kstp'].astype(np.int64)
+        nkstp = kstp.max() + 1 if kstp.shape[0] > 0 else 1
+        keys, itim = np.unique(kper * nkstp + kstp, return_inverse=True)
+        kk = np.column_stack((keys // nkstp, keys % nkstp))
+        names = self.recordarray['paknam2'].copy()
+        for key in ['paknam', 'text']:
+            idx = np.char.strip(names) == b''
+            names[idx] = self.recordarray[key][idx]
+        paknams, ipak = np.unique(names, return_inverse=True)
+        totals = np.zeros((kk.shape[0], len(paknams)))
+        np.add.at(totals, (itim.ravel(), ipak), qrec)
+        kstpkper = [(kstp - 1, kper - 1) for kper, kstp in kk]
+        return kstpkper, list(paknams), totals
+
+
 class CellBudgetFile(object):
     """
     CellBudgetFile Class.
@@ -520,6 +1327,10 @@ class CellBudgetFile(object):
         'single' or 'double'.  Default is 'single'.
     verbose : bool
         Write information to the screen.  Default is False.
+    index_cache : bool
+        Save the record index to filename.fpidx and reuse it when the file
+        is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Attributes
     ----------
@@ -543,6 +1354,8 @@ class CellBudgetFile(object):
 
     """
 
+    file = ThreadLocalFile()
+
     def __init__(self, filename, precision='single', verbose=False, **kwargs):
         self.filename = filename
         self.precision = precision
@@ -589,6 +1402,8 @@ class CellBudgetFile(object):
             self.sr = self.dis.parent.sr
         if 'sr' in kwargs.keys():
             self.sr = kwargs.pop('sr')
+        self.index_cache = kwargs.pop('index_cache', False)
+        self.cell_major = {}
         if len(kwargs.keys()) > 0:
             args = ','.join(kwargs.keys())
             raise Exception('LayerFile error: unrecognized kwargs: ' + args)
@@ -633,6 +1448,8 @@ class CellBudgetFile(object):
         Build the ordered dictionary, which maps the header information
         to the position in the binary file.
         """
+        if self.index_cache and self._load_index():
+            return
         header = self._get_header()
         self.nrow = header["nrow"]
         self.ncol = header["ncol"]
@@ -646,27 +1463,48 @@ class CellBudgetFile(object):
         self.totalbytes = self.file.tell()
         self.file.seek(0, 0)
         self.recorddict = OrderedDict()
-        ipos = 0
+        self.iposend = 0
+        records, iposheader, iposarray = self._scan_records()
+
+        # convert to numpy arrays
+        self.recordarray = np.array(records, dtype=self.header_dtype)
+        self.iposheader = np.array(iposheader, dtype=np.int64)
+        self.iposarray = np.array(iposarray, dtype=np.int64)
+        if len(records) > 0:
+            self.nper = self.recordarray["kper"].max()
+        if self.index_cache:
+            self._save_index()
+        return
+
+    def _scan_records(self):
+        """
+        Read the headers of the complete records from self.iposend to the
+        end of the file.  A partial record at the end of the file, which
+        is still being written, is not included.
+
+        Returns
+        -------
+        records, iposheader, iposarray : lists
+            The headers and the positions of the headers and data for the
+            records.
+
+        """
+        records = []
+        iposheader = []
+        iposarray = []
+        ipos = self.iposend
         while ipos < self.totalbytes:
-            self.iposheader.append(ipos)
-            header = self._get_header()
-            self.nrecords += 1
+            self.file.seek(ipos, 0)
+            try:
+                header = self._get_header()
+            except (IndexError, ValueError):
+                break
             totim = header['totim']
             if totim == 0:
                 totim = self._totim_from_kstpkper(
                     (header["kstp"] - 1, header["kper"] - 1))
                 header["totim"] = totim
-            if totim >= 0 and totim not in self.times:
-                self.times.append(totim)
-            kstpkper = (header['kstp'], header['kper'])
-            if kstpkper not in self.kstpkper:
-                self.kstpkper.append(kstpkper)
-            if header['text'] not in self.textlist:
-                self.textlist.append(header['text'])
-                self.imethlist.append(header['imeth'])
-            if header['paknam'] not in self.paknamlist:
-                self.paknamlist.append(header['paknam'])
-            ipos = self.file.tell()
+            iposdata = self.file.tell()
 
             if self.verbose:
                 for itxt in ['kstp', 'kper', 'text', 'ncol', 'nrow', 'nlay',
@@ -676,28 +1514,142 @@ class CellBudgetFile(object):
                     if isinstance(s, bytes):
                         s = s.decode()
                     print(itxt + ': ' + str(s))
-                print('file position: ', ipos)
+                print('file position: ', iposdata)
                 if int(header['imeth']) != 5 and \
                         int(header['imeth']) != 6 and \
                         int(header['imeth']) != 7:
                     print('')
 
+            # skip over the data to the next record and stop if the
+            # record has not been completely written
+            try:
+                self._skip_record(header)
+            except (IndexError, ValueError):
+                break
+            if self.file.tell() > self.totalbytes:
+                break
+
+            self.nrecords += 1
+            if totim >= 0 and totim not in self.times:
+                self.times.append(totim)
+            kstpkper = (header['kstp'], header['kper'])
+            if kstpkper not in self.kstpkper:
+                self.kstpkper.append(kstpkper)
+            if header['text'] not in self.textlist:
+                self.textlist.append(header['text'])
+                self.imethlist.append(header['imeth'])
+            if header['paknam'] not in self.paknamlist:
+                self.paknamlist.append(header['paknam'])
+
             # store record and byte position mapping
             self.recorddict[
-                tuple(header)] = ipos  # store the position right after header2
-            self.recordarray.append(header)
-            self.iposarray.append(
-                ipos)  # store the position right after header2
-
-            # skip over the data to the next record and set ipos
-            self._skip_record(header)
+                tuple(header)] = iposdata  # store the position right after header2
+            records.append(header)
+            iposheader.append(ipos)
+            iposarray.append(
+                iposdata)  # store the position right after header2
             ipos = self.file.tell()
+            self.iposend = ipos
+        return records, iposheader, iposarray
 
-        # convert to numpy arrays
-        self.recordarray = np.array(self.recordarray, dtype=self.header_dtype)
-        self.iposheader = np.array(self.iposheader, dtype=np.int64)
-        self.iposarray = np.array(self.iposarray, dtype=np.int64)
+    def refresh(self):
+        """
+        Add the records that have been written to the budget file since it
+        was opened or last refreshed.  Only the new part of the file is
+        read, so a file that is still being written by a running simulation
+        can be followed at a cost proportional to the new records.  A
+        partial record at the end of the file is ignored until it is
+        complete.
+
+        Returns
+        -------
+        nrecords : int
+            The number of records that were added.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+        >>> if cbb.refresh() > 0:
+        ...     rec = cbb.get_data(text='RIVER LEAKAGE')[-1]
+
+        """
+        self.file.seek(0, 2)
+        self.totalbytes = self.file.tell()
+        records, iposheader, iposarray = self._scan_records()
+        if len(records) == 0:
+            return 0
+        self.recordarray = np.concatenate(
+            (self.recordarray, np.array(records, dtype=self.header_dtype)))
+        self.iposheader = np.concatenate(
+            (self.iposheader, np.array(iposheader, dtype=np.int64)))
+        self.iposarray = np.concatenate(
+            (self.iposarray, np.array(iposarray, dtype=np.int64)))
         self.nper = self.recordarray["kper"].max()
+        if self.index_cache:
+            self._save_index()
+        return len(records)
+
+    def _index_signature(self):
+        # totim is calculated from the time discretization when it is not
+        # in the file, so the cache is only valid for the same perlen, nstp,
+        # and tsmult
+        perlen, nstp, tsmult = [], [], []
+        if self.dis is not None:
+            perlen = self.dis.perlen.array
+            nstp = self.dis.nstp.array
+            tsmult = self.dis.tsmult.array
+        return {'precision': self.precision,
+                'perlen': np.array(perlen, dtype=np.float64),
+                'nstp': np.array(nstp, dtype=np.int64),
+                'tsmult': np.array(tsmult, dtype=np.float64)}
+
+    def _load_index(self):
+        """
+        Load the index from the index cache file.  Returns False if the
+        cache does not exist or is out of date.
+
+        """
+        cache = _load_index_cache(self.filename, self._index_signature())
+        if cache is None:
+            return False
+        self.nrow = cache['nrow'][()]
+        self.ncol = cache['ncol'][()]
+        self.nlay = cache['nlay'][()]
+        self.nper = cache['nper'][()]
+        self.nrecords = int(cache['nrecords'])
+        self.totalbytes = cache['totalbytes'][()]
+        self.iposend = cache['iposend'][()]
+        self.recordarray = cache['recordarray']
+        self.iposheader = cache['iposheader']
+        self.iposarray = cache['iposarray']
+        self.times = list(cache['times'])
+        self.kstpkper = [tuple(kk) for kk in cache['kstpkper']]
+        self.textlist = list(cache['textlist'])
+        self.imethlist = list(cache['imethlist'])
+        self.paknamlist = list(cache['paknamlist'])
+        self.recorddict = OrderedDict(zip(map(tuple, self.recordarray),
+                                          self.iposarray))
+        return True
+
+    def _save_index(self):
+        """
+        Save the index to the index cache file.
+
+        """
+        arrays = {'nrow': self.nrow, 'ncol': self.ncol, 'nlay': self.nlay,
+                  'nper': self.nper, 'nrecords': self.nrecords,
+                  'totalbytes': self.totalbytes, 'iposend': self.iposend,
+                  'recordarray': self.recordarray,
+                  'iposheader': self.iposheader,
+                  'iposarray': self.iposarray,
+                  'times': np.array(self.times, dtype=self.realtype),
+                  'kstpkper': np.array(self.kstpkper,
+                                       dtype=np.int32).reshape(-1, 2),
+                  'textlist': np.array(self.textlist, dtype='S16'),
+                  'imethlist': np.array(self.imethlist, dtype=np.int32),
+                  'paknamlist': np.array(self.paknamlist, dtype='S16')}
+        _save_index_cache(self.filename, self._index_signature(), arrays)
         return
 
     def _skip_record(self, header):
@@ -1174,18 +2126,243 @@ class CellBudgetFile(object):
             for idx, t in enumerate(timesint):
                 result[idx, 0] = t
 
-        for itim, k in enumerate(kk):
-            v = self.get_data(kstpkper=k, text=text, full3D=True)
-            # skip missing data - required for storage
-            if len(v) > 0:
-                v = v[0]
-                istat = 1
-                for k, i, j in kijlist:
-                    result[itim, istat] = v[k, i, j].copy()
-                    istat += 1
+        # resolve the cells to zero-based node numbers once
+        kij = np.array(kijlist, dtype=np.int64).reshape(-1, 3)
+        nodes = (kij[:, 0] * self.nrow + kij[:, 1]) * self.ncol + kij[:, 2]
+
+        # read each cell from the cell-major store if one is available
+        cell_major = self.cell_major.get(self._find_text(text))
+        if cell_major is not None and \
+                cell_major.shape[1] == len(self.kstpkper):
+            result[:, 1:] = cell_major[nodes].T
+            return result
+
+        # use the first record for each kstpkper - missing records
+        # (required for storage) are left as nan
+        itims = {}
+        for itim, k in enumerate(self.kstpkper):
+            itims[k] = itim
+        for irec in self.get_indices(text=text):
+            header = self.recordarray[irec]
+            itim = itims.pop((header['kstp'], header['kper']), None)
+            if itim is None:
+                continue
+            result[itim, 1:] = self._get_ts_values(irec, nodes)
 
         return result
 
+    def get_sparse_data(self, text=None, paknam=None, kstpkper_range=None):
+        """
+        Get compact list-style budget records (imeth 2, 5, and 6) as flat
+        arrays of nodes, flows, and auxiliary variables for a range of time
+        steps, without expanding the records to full 3D arrays.
+
+        Parameters
+        ----------
+        text : str
+            The text identifier for the records.  Examples include
+            'RIVER LEAKAGE', 'STREAM LEAKAGE', 'DRAINS', etc.  If None, list
+            records for all text identifiers are returned.
+            (Default is None.)
+        paknam : str
+            The package name for the records.  If None, records for all
+            package names are returned. (Default is None.)
+        kstpkper_range : tuple of two (kstp, kper) tuples
+            Only return records from the first through the last zero-based
+            (kstp, kper) in kstpkper_range.  If None, records for all time
+            steps are returned. (Default is None.)
+
+        Returns
+        -------
+        out : SparseBudgetData
+            The flat arrays and the offsets of the entries for each record.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+        >>> sp = cbb.get_sparse_data(text='DRAINS')
+        >>> nodes, qnode = sp.sum_by_node()
+
+        """
+        select = np.in1d(self.recordarray['imeth'], [2, 5, 6])
+        if text is not None:
+            select &= self.recordarray['text'] == self._find_text(text)
+        if paknam is not None:
+            select &= self.recordarray['paknam'] == self._find_paknam(paknam)
+        if kstpkper_range is not None:
+            select &= _select_kstpkper(self.recordarray, kstpkper_range)
+        indices = np.where(select)[0]
+
+        records = [self.get_record(idx) for idx in indices]
+        offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([rec.shape[0] for rec in records])
+        nentries = offsets[-1]
+        node = np.zeros(nentries, dtype=np.int32)
+        node2 = np.zeros(nentries, dtype=np.int32)
+        q = np.zeros(nentries, dtype=self.realtype)
+        aux = OrderedDict()
+        for n, rec in enumerate(records):
+            i0, i1 = offsets[n], offsets[n + 1]
+            node[i0:i1] = rec['node']
+            q[i0:i1] = rec['q']
+            for name in rec.dtype.names:
+                if name in ('node', 'q'):
+                    continue
+                elif name == 'node2':
+                    node2[i0:i1] = rec['node2']
+                    continue
+                if name not in aux:
+                    aux[name] = np.empty(nentries, dtype=self.realtype)
+                    aux[name][:] = np.nan
+                aux[name][i0:i1] = rec[name]
+        return SparseBudgetData(self.recordarray[indices], offsets, node, q,
+                                node2, aux)
+
+    def to_cell_major(self, filename, text, chunksize=100):
+        """
+        Write a budget record to a cell-major numpy (.npy) file with
+        shape (nlay * nrow * ncol, len(kstpkper)), so that the time series
+        for a cell is stored contiguously.  Cells that are not in a record
+        are nan.  The file is attached to this object and used by get_ts
+        for text.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the .npy file to write.
+        text : str
+            The text identifier for the record.  Examples include
+            'RIVER LEAKAGE', 'STORAGE', 'FLOW RIGHT FACE', etc.
+        chunksize : int
+            Number of time steps that are held in memory and written to the
+            .npy file at once. (Default is 100.)
+
+        Returns
+        -------
+        out : numpy memmap
+            Read-only memory-mapped array with shape (ncells, ntimes).  The
+            row for zero-based cell (k, i, j) is (k * nrow + i) * ncol + j.
+
+        See Also
+        --------
+        set_cell_major
+
+        Examples
+        --------
+        >>> import flopy
+        >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+        >>> cbb.to_cell_major('riv.npy', text='RIVER LEAKAGE')
+        >>> ts = cbb.get_ts([(0, 10, 10), (0, 10, 11)], text='RIVER LEAKAGE')
+
+        """
+        ntimes = len(self.kstpkper)
+        ncells = self.nlay * self.nrow * self.ncol
+        nodes = np.arange(ncells)
+        out = np.lib.format.open_memmap(filename, mode='w+',
+                                        dtype=self.realtype,
+                                        shape=(ncells, ntimes))
+        itims = {}
+        for itim, k in enumerate(self.kstpkper):
+            itims[k] = itim
+
+        # buffer chunksize time steps and write them as one block
+        buffer = np.empty((ncells, chunksize), dtype=self.realtype)
+        buffer[:, :] = np.nan
+        it0 = 0
+        for irec in self.get_indices(text=text):
+            header = self.recordarray[irec]
+            itim = itims.pop((header['kstp'], header['kper']), None)
+            if itim is None:
+                continue
+            if itim >= it0 + chunksize:
+                out[:, it0:it0 + chunksize] = buffer
+                buffer[:, :] = np.nan
+                it0 += chunksize
+            buffer[:, itim - it0] = self._get_ts_values(irec, nodes)
+        out[:, it0:ntimes] = buffer[:, :ntimes - it0]
+        out.flush()
+        del out
+        return self.set_cell_major(filename, text)
+
+    def set_cell_major(self, filename, text):
+        """
+        Attach a cell-major numpy (.npy) file written by to_cell_major.
+        get_ts reads time series for text from the cell-major file instead
+        of the budget file.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the .npy file.
+        text : str
+            The text identifier for the record in the cell-major file.
+
+        Returns
+        -------
+        out : numpy memmap
+            Read-only memory-mapped array with shape (ncells, ntimes).
+
+        """
+        cell_major = np.load(filename, mmap_mode='r')
+        shape = (self.nlay * self.nrow * self.ncol, len(self.kstpkper))
+        if cell_major.shape != shape:
+            msg = 'cell-major file {} has shape {}'.format(
+                filename, cell_major.shape) + ' not {}'.format(shape)
+            raise ValueError(msg)
+        self.cell_major[self._find_text(text)] = cell_major
+        return cell_major
+
+    def _get_ts_values(self, irec, nodes):
+        """
+        Get the values for the zero-based node numbers in nodes from
+        record irec without expanding the record to a full 3D array.
+        Cells that are not in the record are returned as nan.
+
+        """
+        values = np.empty(len(nodes), dtype=self.realtype)
+        values[:] = np.nan
+        header = self.recordarray[irec]
+        imeth = header['imeth']
+        itemsize = self.realtype(1).nbytes
+        ncpl = self.nrow * self.ncol
+
+        if imeth in [2, 5, 6]:
+            # search the node column of the list for the requested nodes
+            # and sum the flows for nodes that are listed more than once
+            data = self.get_record(irec)
+            unodes, inv = np.unique(nodes, return_inverse=True)
+            pos = np.searchsorted(unodes, data['node'] - 1)
+            pos[pos == len(unodes)] = 0
+            found = unodes[pos] == data['node'] - 1
+            q = np.zeros(len(unodes), dtype=self.realtype)
+            np.add.at(q, pos[found], data['q'][found])
+            listed = np.zeros(len(unodes), dtype=bool)
+            listed[pos[found]] = True
+            idx = listed[inv]
+            values[idx] = q[inv][idx]
+        elif imeth in [0, 1]:
+            # only read the span of the record that contains the nodes
+            i0 = nodes.min()
+            nval = nodes.max() - i0 + 1
+            self.file.seek(int(self.iposarray[irec]) + int(i0) * itemsize, 0)
+            v = binaryread(self.file, self.realtype, shape=(nval,))
+            values[:] = v.reshape(-1)[nodes - i0]
+        elif imeth in [3, 4]:
+            # two dimensional records apply to a single layer for each
+            # row and column
+            icell = nodes % ncpl
+            self.file.seek(int(self.iposarray[irec]), 0)
+            if imeth == 3:
+                ilayer = binaryread(self.file, np.int32, shape=(ncpl,))
+                ilayer = ilayer.reshape(-1)[icell] - 1
+            else:
+                ilayer = np.zeros(len(nodes), dtype=np.int32)
+            v = binaryread(self.file, self.realtype, shape=(ncpl,))
+            idx = ilayer == nodes // ncpl
+            values[idx] = v.reshape(-1)[icell][idx]
+        return values
+
     def _build_kijlist(self, idx):
         if isinstance(idx, list):
             kijlist = idx
@@ -1226,6 +2403,83 @@ class CellBudgetFile(object):
             result[:, 0] = np.array(self.times)
         return result
 
+    def iter_records(self, text=None, kstpkper_range=None, layers=None,
+                     reuse_buffer=False):
+        """
+        Iterate over the records in the budget file one record at a time.
+
+        Parameters
+        ----------
+        text : str
+            The text identifier for the records to return.  Examples include
+            'RIVER LEAKAGE', 'STORAGE', 'FLOW RIGHT FACE', etc.  If None,
+            all records are returned. (Default is None.)
+        kstpkper_range : tuple of two (kstp, kper) tuples
+            Only return records from the first through the last zero-based
+            (kstp, kper) in kstpkper_range.  If None, records for all time
+            steps are returned. (Default is None.)
+        layers : int or list of ints
+            Zero-based layers to return.  Only these layers are read for
+            three dimensional array records and list records only include
+            entries for nodes in these layers.  If None, all layers are
+            returned. (Default is None.)
+        reuse_buffer : bool
+            If True, the data for every three dimensional array record is
+            read into the same array, which is overwritten when the next
+            record is read. (Default is False.)
+
+        Returns
+        ----------
+        out : generator
+            Generator of (header, data) tuples, where header is the record
+            header and data has the same structure as the record returned
+            by get_record with full3D=False.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+        >>> for header, q in cbb.iter_records(text='RIVER LEAKAGE'):
+        ...     print(header['totim'], q['q'].sum())
+
+        """
+        select = np.ones(self.recordarray.shape[0], dtype=bool)
+        if text is not None:
+            text16 = self._find_text(text)
+            select &= self.recordarray['text'] == text16
+        if kstpkper_range is not None:
+            select &= _select_kstpkper(self.recordarray, kstpkper_range)
+        if layers is not None:
+            layers = np.atleast_1d(layers)
+
+        buffer = None
+        for irec in np.where(select)[0]:
+            header = self.recordarray[irec]
+            imeth = header['imeth']
+            nlay = abs(header['nlay'])
+            shp = (nlay, header['nrow'], header['ncol'])
+            if imeth in [0, 1]:
+                if layers is not None:
+                    shp = (len(layers),) + shp[1:]
+                if buffer is None or not reuse_buffer or buffer.shape != shp:
+                    buffer = np.empty(shp, dtype=self.realtype)
+                if layers is None:
+                    self.file.seek(int(self.iposarray[irec]), 0)
+                    self.file.readinto(buffer)
+                else:
+                    nbytes = shp[1] * shp[2] * self.realtype(1).nbytes
+                    for n, k in enumerate(layers):
+                        self.file.seek(int(self.iposarray[irec]) +
+                                       int(k) * nbytes, 0)
+                        self.file.readinto(buffer[n])
+                yield header, buffer
+            else:
+                data = self.get_record(irec)
+                if layers is not None and imeth in [2, 5, 6]:
+                    ncpl = shp[1] * shp[2]
+                    data = data[np.in1d((data['node'] - 1) // ncpl, layers)]
+                yield header, data
+
     def get_record(self, idx, full3D=False):
         """
         Get a single data record from the budget file.
@@ -1534,11 +2788,51 @@ class CellBudgetFile(object):
 
         return residual
 
+    def get_data_many(self, kstpkpers, n_workers=None, text=None,
+                      paknam=None, full3D=False):
+        """
+        Get data from the binary budget file for several time steps,
+        reading the records in parallel with a pool of threads.
+
+        Parameters
+        ----------
+        kstpkpers : list of tuples of ints
+            List of tuples containing the time step and stress period
+            (kstp, kper).  The kstp and kper values are zero based.
+        n_workers : int
+            Number of threads used to read the data.  If None, up to four
+            threads are used. (Default is None.)
+        text : str
+            The text identifier for the record.  Examples include
+            'RIVER LEAKAGE', 'STORAGE', 'FLOW RIGHT FACE', etc.
+        paknam : str
+            The package name for the record.
+        full3D : boolean
+            If true, then return the records as three dimensional numpy
+            arrays.  (Default is False.)
+
+        Returns
+        ----------
+        data : list of lists of records
+            List with the record list returned by get_data for each
+            kstpkper.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> cbb = flopy.utils.CellBudgetFile('mymodel.cbb')
+        >>> riv = cbb.get_data_many(cbb.get_kstpkper(), n_workers=8,
+        ...                         text='RIVER LEAKAGE')
+
+        """
+        return get_data_many(self, kstpkpers, n_workers=n_workers,
+                             text=text, paknam=paknam, full3D=full3D)
+
     def close(self):
         """
         Close the file handle
         """
-        self.file.close()
+        ThreadLocalFile.close(self)
         return
 
 
@@ -1556,6 +2850,13 @@ class HeadUFile(BinaryLayerFile):
         'auto', 'single' or 'double'.  Default is 'auto'.
     verbose : bool
         Write information to the screen.  Default is False.
+    mmap : bool
+        Memory-map the file so that get_data and get_alldata return
+        read-only views of the file instead of copies.  Default is False.
+    index_cache : bool
+        Save the record index to filename.fpidx and reuse it when the file
+        is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Attributes
     ----------
@@ -1642,6 +2943,9 @@ class HeadUFile(BinaryLayerFile):
                 msg = 'Byte position in file: {} for '.format(ipos) + \
                       'layer {}'.format(ilay)
                 print(msg)
+            if self.mmap:
+                data[ilay - 1] = self._get_record_view(idx, (npl,))
+                continue
             self.file.seek(ipos, 0)
             data[ilay - 1] = binaryread(self.file, self.realtype,
                                         shape=(npl,))
@@ -1668,32 +2972,79 @@ class HeadUFile(BinaryLayerFile):
         npl = nend - nstrt + 1
         return npl * np.int64(self.realtype(1).nbytes)
 
+    def _get_record_shape(self, header):
+        """
+        Return the shape of the data array for a record.
+
+        """
+        return (int(header['nrow']) - int(header['ncol']) + 1,)
+
+    def _stack_layers(self, arrays):
+        """
+        Return the layer arrays as a list, which is the same structure
+        returned by get_data for unstructured head files.
+
+        """
+        return arrays
+
+    def _get_layer_rows(self):
+        """
+        Return the row of the first node of each layer in a cell-major
+        file, followed by the number of rows.  The number of nodes in a
+        layer is taken from the first record for the layer.
+
+        """
+        nrec = len(self.iposarray)
+        headers = self.recordarray[:nrec]
+        npl = np.zeros(self.nlay + 1, dtype=np.int64)
+        ilay, irec = np.unique(headers['ilay'], return_index=True)
+        npl[ilay] = headers['nrow'][irec].astype(np.int64) - \
+                    headers['ncol'][irec].astype(np.int64) + 1
+        return np.cumsum(npl)
+
     def get_ts(self, idx):
         """
-        Get a time series from the binary HeadUFile (not implemented).
+        Get a time series from the cell-major file written by to_cell_major
+        or attached with set_cell_major.  Time series are not read from the
+        binary HeadUFile itself.
 
         Parameters
         ----------
-        idx : tuple of ints, or a list of a tuple of ints
-            idx can be (layer, row, column) or it can be a list in the form
-            [(layer, row, column), (layer, row, column), ...].  The layer,
-            row, and column values must be zero based.
+        idx : int, or a list of ints
+            Zero-based node number, or a list of zero-based node numbers.
 
         Returns
         ----------
         out : numpy array
-            Array has size (ntimes, ncells + 1).  The first column in the
+            Array has size (ntimes, nnodes + 1).  The first column in the
             data array will contain time (totim).
 
         See Also
         --------
+        to_cell_major
 
         Notes
         -----
 
         Examples
         --------
-
-        """
-        msg = 'HeadUFile: get_ts() is not implemented'
-        raise NotImplementedError(msg)
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadUFile('test.hds')
+        >>> hdobj.to_cell_major('test.hds.npy')
+        >>> ts = hdobj.get_ts([0, 100])
+
+        """
+        if self.cell_major is None or \
+                self.cell_major.shape[1] != len(self.times):
+            msg = 'HeadUFile: get_ts() requires a cell-major file, ' + \
+                  'see to_cell_major()'
+            raise NotImplementedError(msg)
+        nodes = np.atleast_1d(np.array(idx, dtype=np.int64))
+        ncells = self.cell_major.shape[0]
+        if nodes.ndim != 1 or np.any((nodes < 0) | (nodes >= ncells)):
+            msg = 'HeadUFile: invalid node number(s) {}, '.format(idx) + \
+                  'nodes must be zero based and less than {}'.format(ncells)
+            raise Exception(msg)
+        result = self._init_result(nodes.shape[0])
+        result[:, 1:] = self.cell_major[nodes].T
+        return result
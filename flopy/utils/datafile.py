@@ -5,10 +5,114 @@ abstract classes that should not be directly accessed.
 """
 from __future__ import print_function
 import os
+import threading
+import weakref
 import numpy as np
+from multiprocessing.pool import ThreadPool
 import flopy.utils
 
 
+class _ThreadFile(object):
+    """
+    File handle opened by one thread.  The file is closed when the
+    thread-local data of the thread that opened it is released, which
+    happens when the thread exits.
+
+    """
+
+    def __init__(self, f):
+        self.file = f
+        self.thread = threading.current_thread()
+
+    def __del__(self):
+        self.file.close()
+
+
+class ThreadLocalFile(object):
+    """
+    Descriptor for a read-only file handle that is opened separately for
+    each thread that uses it.  seek and read calls in one thread do not
+    change the file position in other threads, so the same output file
+    object can be read by several threads at the same time.  Only weak
+    references to the handles are kept, so the handle opened by a thread
+    is closed when the thread exits.
+
+    """
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        tf = getattr(self._local(obj), 'file', None)
+        if tf is None:
+            self.__set__(obj, open(obj.filename, 'rb'))
+            tf = self._local(obj).file
+        return tf.file
+
+    def __set__(self, obj, f):
+        tf = _ThreadFile(f)
+        self._local(obj).file = tf
+        self.close(obj, finished_threads=True)
+        obj.__dict__['_file_handles'].append(weakref.ref(tf))
+
+    @staticmethod
+    def _local(obj):
+        local = obj.__dict__.get('_file_local')
+        if local is None:
+            local = threading.local()
+            obj.__dict__['_file_local'] = local
+            obj.__dict__['_file_handles'] = []
+        return local
+
+    @staticmethod
+    def close(obj, finished_threads=False):
+        """
+        Close the file handles for obj.
+
+        Parameters
+        ----------
+        obj : object
+            Object with a ThreadLocalFile file attribute.
+        finished_threads : bool
+            If True, only close the file handles opened by threads that
+            have finished. (Default is False.)
+
+        """
+        handles = obj.__dict__.get('_file_handles', [])
+        keep = []
+        for ref in handles:
+            tf = ref()
+            if tf is None:
+                continue
+            if finished_threads and tf.thread.is_alive():
+                keep.append(ref)
+            else:
+                tf.file.close()
+        handles[:] = keep
+        return
+
+
+def get_data_many(obj, kstpkpers, n_workers=None, **kwargs):
+    """
+    Call obj.get_data for each kstpkper in kstpkpers using a pool of
+    threads.  Each thread reads the file with its own file handle.
+
+    """
+    kstpkpers = list(kstpkpers)
+    if n_workers is None:
+        n_workers = min(len(kstpkpers), 4)
+    if n_workers <= 1 or len(kstpkpers) <= 1:
+        return [obj.get_data(kstpkper=kk, **kwargs) for kk in kstpkpers]
+    pool = ThreadPool(n_workers)
+    try:
+        data = pool.map(lambda kk: obj.get_data(kstpkper=kk, **kwargs),
+                        kstpkpers)
+    finally:
+        pool.close()
+        pool.join()
+    ThreadLocalFile.close(obj, finished_threads=True)
+    return data
+
+
 class Header(object):
     """
     The header class is an abstract base class to create headers for MODFLOW files
@@ -85,6 +189,8 @@ class LayerFile(object):
 
     """
 
+    file = ThreadLocalFile()
+
     def __init__(self, filename, precision, verbose, kwargs):
         assert os.path.exists(
             filename), "datafile error: datafile not found:" + str(filename)
@@ -440,7 +546,8 @@ class LayerFile(object):
 
         nodata : float
            The nodata value in the data array.  All array values that have the
-           nodata value will be assigned np.nan.
+           nodata value will be assigned np.nan.  If None, values are not
+           replaced.
 
         Returns
         ----------
@@ -463,7 +570,8 @@ class LayerFile(object):
             h = self.get_data(totim=totim, mflay=mflay)
             rv.append(h)
         rv = np.array(rv)
-        rv[rv == nodata] = np.nan
+        if nodata is not None:
+            rv[rv == nodata] = np.nan
         return rv
 
     def _read_data(self, shp):
@@ -513,10 +621,42 @@ class LayerFile(object):
         result[:, 0] = np.array(self.times)
         return result
 
+    def get_data_many(self, kstpkpers, n_workers=None, mflay=None):
+        """
+        Get data from the file for several time steps, reading the records
+        in parallel with a pool of threads.
+
+        Parameters
+        ----------
+        kstpkpers : list of tuples of ints
+            List of tuples containing the time step and stress period
+            (kstp, kper).  These are zero-based kstp and kper values.
+        n_workers : int
+            Number of threads used to read the data.  If None, up to four
+            threads are used. (Default is None.)
+        mflay : integer
+           MODFLOW zero-based layer number to return.  If None, then all
+           all layers will be included. (Default is None.)
+
+        Returns
+        ----------
+        data : list of numpy arrays
+            List with the data returned by get_data for each kstpkper.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> hdobj = flopy.utils.HeadFile('test.hds')
+        >>> heads = hdobj.get_data_many(hdobj.get_kstpkper(), n_workers=8)
+
+        """
+        return get_data_many(self, kstpkpers, n_workers=n_workers,
+                             mflay=mflay)
+
     def close(self):
         """
         Close the file handle.
 
         """
-        self.file.close()
+        ThreadLocalFile.close(self)
         return
@@ -7,7 +7,7 @@ important classes that can be accessed by the user.
 """
 
 import numpy as np
-from ..utils.datafile import Header, LayerFile
+from ..utils.datafile import Header, LayerFile, ThreadLocalFile
 
 
 def is_int(s):
@@ -289,7 +289,7 @@ class FormattedLayerFile(LayerFile):
         Close the file handle.
 
         """
-        self.file.close()
+        ThreadLocalFile.close(self)
         return
 
 
@@ -326,3 +326,81 @@ class MfGrdFile(FlopyBinaryData):
                 msg = 'could not return vertices for {}'.format(self.file.name)
                 raise KeyError(msg)
         return
+
+    def get_shape(self):
+        """
+        Get the shape of the user model grid.
+
+        Returns
+        -------
+        shape : tuple of ints
+            (nlay, nrow, ncol) for DIS, (nlay, ncpl) for DISV, and
+            (nodes,) for DISU grids.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> gobj = flopy.utils.MfGrdFile('test.dis.grb')
+        >>> shape = gobj.get_shape()
+
+        """
+        if self._grid == 'DIS':
+            return (self._datadict['NLAY'], self._datadict['NROW'],
+                    self._datadict['NCOL'])
+        elif self._grid == 'DISV':
+            return (self._datadict['NLAY'], self._datadict['NCPL'])
+        elif self._grid == 'DISU':
+            return (self._datadict['NODES'],)
+        msg = 'could not return the shape of the {} grid in '.format(
+            self._grid) + '{}'.format(self.file.name)
+        raise KeyError(msg)
+
+    def get_connectivity(self):
+        """
+        Get the cell connectivity of the model. The connections of cell n
+        are ja[ia[n]:ia[n + 1]], where the first connection is the cell
+        itself. These are the connections of the FLOW-JA-FACE budget
+        record.
+
+        Returns
+        -------
+        ia : np.ndarray
+            Zero-based index of the first connection of each cell
+            (ncells + 1).
+        ja : np.ndarray
+            Zero-based cell number of each connection (nja).
+
+        Examples
+        --------
+        >>> import flopy
+        >>> gobj = flopy.utils.MfGrdFile('test.dis.grb')
+        >>> ia, ja = gobj.get_connectivity()
+
+        """
+        try:
+            ia = self._datadict['IA'] - 1
+            ja = self._datadict['JA'] - 1
+        except:
+            msg = 'could not return connectivity for {}'.format(
+                self.file.name)
+            raise KeyError(msg)
+        return ia, ja
+
+    def get_idomain(self):
+        """
+        Get the IDOMAIN array of the model.
+
+        Returns
+        -------
+        idomain : np.ndarray
+            IDOMAIN values for every user cell, or None if the binary grid
+            file does not contain IDOMAIN.
+
+        Examples
+        --------
+        >>> import flopy
+        >>> gobj = flopy.utils.MfGrdFile('test.dis.grb')
+        >>> idomain = gobj.get_idomain()
+
+        """
+        return self._datadict.get('IDOMAIN')
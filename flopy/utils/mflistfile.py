@@ -6,6 +6,7 @@ recarrays, which can then be easily plotted.
 """
 
 import collections
+import mmap
 import os
 import re
 import sys
@@ -15,6 +16,13 @@ import numpy as np
 from ..utils.utils_def import totim_to_datetime
 
 
+# the end of a budget table and the budget lines in a budget table
+_pdre = re.compile(br'PERCENT DISCREPANCY[^\n]*\n')
+_tsumkey = b'TIME SUMMARY AT END'
+_budre = re.compile(br'^(?:([^=\n]*)=[ \t]*([^\s=]*)[^=\n]*=[ \t]*([^\s=]*)'
+                    br'[^=\n]*$|[^=\n]*([Oo][Uu][Tt]:))', re.M)
+
+
 class ListBudget(object):
     """
     MODFLOW family list file handling
@@ -47,10 +55,6 @@ class ListBudget(object):
         # Set up file reading
         assert os.path.exists(file_name),"file_name {0} not found".format(file_name)
         self.file_name = file_name
-        if sys.version_info[0] == 2:
-            self.f = open(file_name, 'r')
-        elif sys.version_info[0] == 3:
-            self.f = open(file_name, 'r', encoding='ascii', errors='replace')
 
         self.tssp_lines = 0
 
@@ -65,6 +69,10 @@ class ListBudget(object):
         self.idx_map = []
         self.entries = []
         self.null_entries = []
+        self._offset = 0
+        self._ncomplete = 0
+        self._tsumpending = False
+        self._layouts = {}
 
         self.time_line_idx = 20
         if timeunit.upper() == 'SECONDS':
@@ -93,9 +101,6 @@ class ListBudget(object):
         if len(self.idx_map) > 0:
             self._isvalid = True
 
-        # Close the open file
-        self.f.close()
-
         # return
         return
 
@@ -504,37 +509,6 @@ class ListBudget(object):
             df_flux.sort_index(axis=1,inplace=True)
             df_vol.sort_index(axis=1,inplace=True)
             return df_flux, df_vol
-    def _build_index(self, maxentries):
-        self.idx_map = self._get_index(maxentries)
-        return
-
-    def _get_index(self, maxentries):
-        # --parse through the file looking for matches and parsing ts and sp
-        idxs = []
-        l_count = 1
-        while True:
-            seekpoint = self.f.tell()
-            line = self.f.readline()
-            if line == '':
-                break
-            if self.budgetkey in line:
-                for l in range(self.tssp_lines):
-                    line = self.f.readline()
-                try:
-                    ts, sp = self._get_ts_sp(line)
-                except:
-                    print('unable to cast ts,sp on line number', l_count,
-                          ' line: ', line)
-                    break
-                # print('info found for timestep stress period',ts,sp)
-
-                idxs.append([ts, sp, seekpoint])
-
-                if maxentries and len(idxs) >= maxentries:
-                    break
-
-        return idxs
-
     def _seek_to_string(self, s):
         """
         Parameters
@@ -583,50 +557,120 @@ class ListBudget(object):
 
         return ts, sp
 
-    def _set_entries(self):
-        if len(self.idx_map) < 1:
-            return None, None
-        if len(self.entries) > 0:
-            raise Exception('entries already set:' + str(self.entries))
-        if not self.idx_map:
-            raise Exception('must call build_index before call set_entries')
+    def update(self):
+        """
+        Add the budget tables that have been written to the list file since
+        it was loaded or last updated.  Parsing restarts at the end of the
+        last complete budget table and time summary, so a list file that is
+        still being written by a running simulation can be followed at a
+        cost proportional to the new output.  A budget table at the end of
+        the file that is not yet complete is replaced once it is finished,
+        and the time of the last complete budget table is set once its time
+        summary has been written.
+
+        Returns
+        -------
+        nentries : int
+            The number of budget entries that were added.
+
+        Examples
+        --------
+        >>> mf_list = MfListBudget("my_model.list")
+        >>> if mf_list.update() > 0:
+        ...     discrepancy = mf_list.get_incremental('PERCENT_DISCREPANCY')
+
+        """
+        nentries = len(self.idx_map)
+        buf = self._map_file()
         try:
-            incdict, cumdict = self._get_sp(self.idx_map[0][0],
-                                            self.idx_map[0][1],
-                                            self.idx_map[0][2])
-        except:
-            raise Exception('unable to read budget information from first '
-                            'entry in list file')
-        self.entries = incdict.keys()
-        null_entries = collections.OrderedDict()
-        incdict = collections.OrderedDict()
-        cumdict = collections.OrderedDict()
-        for entry in self.entries:
-            incdict[entry] = []
-            cumdict[entry] = []
-            null_entries[entry] = np.NaN
-        self.null_entries = [null_entries, null_entries]
-        return incdict, cumdict
+            # the file was truncated or rewritten, so start over
+            if len(buf) < self._offset:
+                self._offset = 0
+                self._ncomplete = 0
+                self._tsumpending = False
+                self.idx_map = []
+                self.entries = []
+                self.null_entries = []
+            if self._tsumpending:
+                self._update_totim(buf)
+            blocks = self._scan(buf, pos=self._offset)
+        finally:
+            if hasattr(buf, 'close'):
+                buf.close()
+        self._set_budget(blocks)
+        self._isvalid = len(self.idx_map) > 0
+        return len(self.idx_map) - nentries
 
     def _load(self, maxentries=None):
-        self._build_index(maxentries)
-        incdict, cumdict = self._set_entries()
-        if incdict is None and cumdict is None:
+        """
+        Fill the incremental and cumulative budget recarrays using a single
+        forward pass through a memory map of the list file.
+
+        """
+        buf = self._map_file()
+        try:
+            blocks = self._scan(buf, maxentries=maxentries)
+        finally:
+            if hasattr(buf, 'close'):
+                buf.close()
+        self._set_budget(blocks)
+        return
+
+    def _update_totim(self, buf):
+        """
+        Set totim for the last complete budget table if its time summary has
+        been written since the list file was loaded or last updated.
+
+        """
+        tsumpos = buf.find(_tsumkey, self._offset)
+        if tsumpos < 0:
             return
-        totim = []
-        for ts, sp, seekpoint in self.idx_map:
-            tinc, tcum = self._get_sp(ts, sp, seekpoint)
-            for entry in self.entries:
-                incdict[entry].append(tinc[entry])
-                cumdict[entry].append(tcum[entry])
+        tsumpoint = buf.rfind(b'\n', 0, tsumpos) + 1
+        i = self._ncomplete - 1
+        ts, sp = self.idx_map[i][0], self.idx_map[i][1]
+        tslen, sptim, tt, end = self._get_totim(buf, ts, sp, tsumpoint,
+                                                quiet=True)
+        if end < 1 or not buf[end - 1:end] == b'\n':
+            # the time summary is still being written
+            return
+        self.inc['totim'][i] = tt
+        self.cum['totim'][i] = tt
+        self._tsumpending = False
+
+        # do not skip a budget table that was written before the time summary
+        keyre = re.compile(re.escape(self.budgetkey.encode('ascii')))
+        m = keyre.search(buf, self._offset)
+        if m is None or m.start() > tsumpos:
+            self._offset = end
+        return
 
-            # Get the time for this record
-            seekpoint = self._seek_to_string('TIME SUMMARY AT END')
-            tslen, sptim, tt = self._get_totim(ts, sp, seekpoint)
-            totim.append(tt)
+    def _set_budget(self, blocks):
+        """
+        Add the budget tables returned by _scan to the incremental and
+        cumulative budget recarrays, replacing any incomplete budget tables
+        at the end of the recarrays.
+
+        """
+        nkeep = self._ncomplete
+        self.idx_map = self.idx_map[:nkeep]
+        for i, block in enumerate(blocks):
+            if block[7] is not None:
+                self._offset = block[7]
+                self._ncomplete = nkeep + i + 1
+                self._tsumpending = not block[8]
+        if len(blocks) < 1:
+            if nkeep > 0:
+                self.inc = self.inc[:nkeep]
+                self.cum = self.cum[:nkeep]
+            return
 
-        # get kstp and kper
-        idx_array = np.array(self.idx_map)
+        self.idx_map += [[block[0], block[1], block[2]] for block in blocks]
+        if nkeep < 1:
+            self.entries = list(blocks[0][3])
+            null_entries = collections.OrderedDict()
+            for entry in self.entries:
+                null_entries[entry] = np.NaN
+            self.null_entries = [null_entries, null_entries]
 
         # build dtype for recarray
         dtype_tups = [('totim', np.float32), ("time_step", np.int32),
@@ -635,156 +679,348 @@ class ListBudget(object):
             dtype_tups.append((entry, np.float32))
         dtype = np.dtype(dtype_tups)
 
+        # convert the budget values for all of the entries at once and
+        # place them using the row and column of each value
+        nentries = len(blocks)
+        inc = np.full((nentries, len(self.entries)), np.NaN)
+        cum = np.full((nentries, len(self.entries)), np.NaN)
+        rows, cols = self._get_budget_index(blocks)
+        cumu, flux, ibad = self._cast_budget_values(blocks)
+        if nkeep < 1 and 0 in ibad:
+            raise Exception('unable to read budget information '
+                            'from first entry in list file')
+        valid = cols >= 0
+        inc[rows[valid], cols[valid]] = flux[valid]
+        cum[rows[valid], cols[valid]] = cumu[valid]
+        totim = np.array([block[6] for block in blocks])
+        idx_array = np.array(self.idx_map[nkeep:])
+
         # create recarray
-        nentries = len(incdict[entry])
-        self.inc = np.recarray(shape=(nentries,), dtype=dtype)
-        self.cum = np.recarray(shape=(nentries,), dtype=dtype)
+        recinc = np.recarray(shape=(nentries,), dtype=dtype)
+        reccum = np.recarray(shape=(nentries,), dtype=dtype)
 
         # fill each column of the recarray
-        for entry in self.entries:
-            self.inc[entry] = incdict[entry]
-            self.cum[entry] = cumdict[entry]
+        for j, entry in enumerate(self.entries):
+            recinc[entry] = inc[:, j]
+            reccum[entry] = cum[:, j]
 
         # file the totim, time_step, and stress_period columns for the
         # incremental and cumulative recarrays (zero-based kstp,kper)
-        self.inc['totim'] = np.array(totim)[:]
-        self.inc["time_step"] = idx_array[:, 0] - 1
-        self.inc["stress_period"] = idx_array[:, 1] - 1
-
-        self.cum['totim'] = np.array(totim)[:]
-        self.cum["time_step"] = idx_array[:, 0] - 1
-        self.cum["stress_period"] = idx_array[:, 1] - 1
-
+        recinc['totim'] = totim
+        recinc["time_step"] = idx_array[:, 0] - 1
+        recinc["stress_period"] = idx_array[:, 1] - 1
+
+        reccum['totim'] = totim
+        reccum["time_step"] = idx_array[:, 0] - 1
+        reccum["stress_period"] = idx_array[:, 1] - 1
+
+        if nkeep > 0:
+            recinc = np.concatenate((self.inc[:nkeep], recinc))
+            reccum = np.concatenate((self.cum[:nkeep], reccum))
+        self.inc = recinc.view(np.recarray)
+        self.cum = reccum.view(np.recarray)
         return
 
-    def _get_sp(self, ts, sp, seekpoint):
-        self.f.seek(seekpoint)
-        # --read to the start of the "in" budget information
-        while True:
-            line = self.f.readline()
-            if line == '':
-                print(
-                        'end of file found while seeking budget information for ts,sp',
-                        ts, sp)
-                return self.null_entries
+    def _get_budget_index(self, blocks):
+        """
+        Return the block (row) and entry (column) index of every budget value
+        in blocks.  Budget values that are not in entries have a column
+        index of -1.
 
-            # --if there are two '=' in this line, then it is a budget line
-            if len(re.findall('=', line)) == 2:
-                break
+        """
+        columns = {}
+        cols = []
+        for block in blocks:
+            keys = block[3]
+            if keys not in columns:
+                columns[keys] = np.array([self.entries.index(key)
+                                          if key in self.entries else -1
+                                          for key in keys], dtype=np.int64)
+            cols.append(columns[keys])
+        nvalues = [len(block[3]) for block in blocks]
+        rows = np.repeat(np.arange(len(blocks)), nvalues)
+        if len(cols) > 0:
+            cols = np.concatenate(cols)
+        else:
+            cols = np.array([], dtype=np.int64)
+        return rows, cols
 
-        tag = 'IN'
-        incdict = collections.OrderedDict()
-        cumdict = collections.OrderedDict()
-        while True:
+    def _cast_budget_values(self, blocks):
+        """
+        Convert the cumulative and incremental budget value strings in
+        blocks to floats with a single conversion.  If a value cannot be
+        cast, the values are converted one block at a time and all of the
+        values for a block that contains a value that cannot be cast are
+        set to nan.
 
-            if line == '':
-                # raise Exception('end of file found while seeking budget information')
-                print(
-                        'end of file found while seeking budget information for ts,sp',
-                        ts, sp)
-                return self.null_entries
-            if len(re.findall('=', line)) == 2:
-                try:
-                    entry, flux, cumu = self._parse_budget_line(line)
-                except e:
-                    print('error parsing budget line in ts,sp', ts, sp)
-                    return self.null_entries
-                if flux is None:
-                    print(
-                            'error casting in flux for', entry,
-                            ' to float in ts,sp',
-                            ts, sp)
-                    return self.null_entries
-                if cumu is None:
-                    print(
-                            'error casting in cumu for', entry,
-                            ' to float in ts,sp',
-                            ts, sp)
-                    return self.null_entries
-                if entry.endswith(tag.upper()):
-                    if ' - ' in entry.upper():
-                        key = entry.replace(' ', '')
-                    else:
-                        key = entry.replace(' ', '_')
-                elif 'PERCENT DISCREPANCY' in entry.upper():
-                    key = entry.replace(' ', '_')
-                else:
-                    key = '{}_{}'.format(entry.replace(' ', '_'), tag)
-                incdict[key] = flux
-                cumdict[key] = cumu
+        Returns
+        -------
+        cumu : numpy array
+            Cumulative budget values.
+        flux : numpy array
+            Incremental budget values.
+        ibad : list
+            Index of the blocks with values that could not be cast.
+
+        """
+        try:
+            cumu = np.array([v for block in blocks for v in block[4]],
+                            dtype=np.float64)
+            flux = np.array([v for block in blocks for v in block[5]],
+                            dtype=np.float64)
+            return cumu, flux, []
+        except ValueError:
+            pass
+
+        cumu, flux, ibad = [], [], []
+        for i, (ts, sp, seekpoint, keys, tcumu, tflux, tt, end, tsum) in \
+                enumerate(blocks):
+            try:
+                vcumu = [self._cast_budget_value(v) for v in tcumu]
+                vflux = [self._cast_budget_value(v) for v in tflux]
+            except ValueError:
+                print('error casting budget values to float in ts,sp',
+                      ts, sp)
+                vcumu = vflux = [np.NaN] * len(keys)
+                ibad.append(i)
+            cumu += vcumu
+            flux += vflux
+        return np.array(cumu, dtype=np.float64), \
+               np.array(flux, dtype=np.float64), ibad
+
+    @staticmethod
+    def _cast_budget_value(s):
+        try:
+            v = float(s)
+        except ValueError:
+            if b'NAN' in s.strip().upper():
+                v = np.NaN
             else:
-                if 'OUT:' in line.upper():
-                    tag = 'OUT'
-            line = self.f.readline()
-            if entry.upper() == 'PERCENT DISCREPANCY':
-                break
+                raise
+        return v
 
-        return incdict, cumdict
+    def _map_file(self):
+        """
+        Return a read-only memory map of the list file.  An empty bytes
+        object is returned for an empty file, which cannot be mapped.
 
-    def _parse_budget_line(self, line):
+        """
+        with open(self.file_name, 'rb') as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                buf = b''
+        return buf
 
-        # get the budget item name
-        entry = line.strip().split('=')[0].strip()
+    def _scan(self, buf, pos=0, maxentries=None):
+        """
+        Locate and parse every budget table and the time summary that
+        follows it in a single forward pass through buf.
 
-        # get the cumulative string
-        idx = line.index('=') + 1
-        line2 = line[idx:]
-        ll = line2.strip().split()
-        cu_str = ll[0]
+        Parameters
+        ----------
+        buf : mmap.mmap or bytes
+            Contents of the list file.
+        pos : int
+            Byte offset at which to start scanning. (default is 0)
+        maxentries : int
+            Maximum number of budget tables to parse. (default is None)
 
-        idx = line2.index('=') + 1
-        fx_str = line2[idx:].split()[0].strip()
+        Returns
+        -------
+        blocks : list
+            List of (ts, sp, seekpoint, keys, cumu, flux, totim, end, tsum)
+            tuples, one for each budget table found in buf.  keys is a tuple
+            of the budget entry names and cumu and flux are lists of the
+            unconverted cumulative and incremental budget values.  end is the
+            byte offset following the time summary, or following the budget
+            table if the time summary has not been written, and is None if
+            the budget table is not complete.  tsum is False if the time
+            summary has not been written.
 
-        #
-        # cu_str = line[self.cumu_idxs[0]:self.cumu_idxs[1]]
-        # fx_str = line[self.flux_idxs[0]:self.flux_idxs[1]]
+        """
+        keyre = re.compile(re.escape(self.budgetkey.encode('ascii')))
+        tsumpos = None
+        blocks = []
+        while True:
+            m = keyre.search(buf, pos)
+            if m is None:
+                break
+            seekpoint = buf.rfind(b'\n', 0, m.start()) + 1
+            line, pos = self._readline(buf, seekpoint)
+            for l in range(self.tssp_lines):
+                line, pos = self._readline(buf, pos)
+            try:
+                ts, sp = self._get_ts_sp(line)
+            except:
+                # the last line may still be being written
+                if line.endswith('\n'):
+                    print('unable to cast ts,sp at byte', seekpoint,
+                          ' line: ', line)
+                break
 
+            keys, cumu, flux, bpos = self._get_sp(buf, ts, sp, seekpoint)
+            if keys is None:
+                # the budget table is still being written
+                if len(blocks) < 1:
+                    break
+                blocks.append((ts, sp, seekpoint, (), [], [], np.NaN, None,
+                               False))
+                break
+            elif len(keys) < 1 and len(blocks) < 1 and not self.entries:
+                raise Exception('unable to read budget information '
+                                'from first entry in list file')
+
+            # the time summary is the next one after the budget table; the
+            # position of the last match is reused until it has been passed
+            if tsumpos is None or 0 <= tsumpos < bpos:
+                tsumpos = buf.find(_tsumkey, bpos)
+            tt, end, tsum = np.NaN, bpos, False
+            if tsumpos >= 0:
+                tsumpoint = buf.rfind(b'\n', 0, tsumpos) + 1
+                tslen, sptim, tt, tend = self._get_totim(buf, ts, sp,
+                                                         tsumpoint,
+                                                         quiet=True)
+                if tend > 0 and buf[tend - 1:tend] == b'\n':
+                    end, tsum = tend, True
+                else:
+                    # the time summary is still being written
+                    tt = np.NaN
+            if not cumu:
+                end = None
+
+            blocks.append((ts, sp, seekpoint, keys, cumu, flux, tt, end,
+                           tsum))
+            if maxentries and len(blocks) >= maxentries:
+                break
+        return blocks
 
-        flux, cumu = None, None
-        try:
-            cumu = float(cu_str)
-        except:
-            if 'NAN' in cu_str.strip().upper():
-                cumu = np.NaN
-        try:
-            flux = float(fx_str)
-        except:
-            if 'NAN' in fx_str.strip().upper():
-                flux = np.NaN
-        return entry, flux, cumu
+    @staticmethod
+    def _readline(buf, pos):
+        """
+        Return the line in buf that starts at byte pos and the position of
+        the following line.  An empty string is returned at the end of buf.
 
-    def _get_totim(self, ts, sp, seekpoint):
-        self.f.seek(seekpoint)
-        # --read header lines
+        """
+        n = len(buf)
+        if pos >= n:
+            return '', n
+        eol = buf.find(b'\n', pos)
+        if eol < 0:
+            eol = n - 1
+        line = buf[pos:eol + 1]
+        if sys.version_info[0] == 3:
+            line = line.decode('ascii', 'replace')
+        return line, eol + 1
+
+    def _get_sp(self, buf, ts, sp, pos):
+        """
+        Find all of the budget lines in the budget table that starts at byte
+        pos with a single regular expression search.
+
+        Returns
+        -------
+        keys : tuple
+            Budget entry names, or None if the budget table is not complete.
+        cumu : list
+            Unconverted cumulative budget values.
+        flux : list
+            Unconverted incremental budget values.
+        pos : int
+            Byte offset following the budget table.
+
+        """
+        m = _pdre.search(buf, pos)
+        if m is None:
+            return None, None, None, len(buf)
+
+        # budget lines have two '=' and the cumulative and incremental
+        # values follow the first and second '='
+        rows = _budre.findall(buf, pos, m.end())
+        if len(rows) < 1:
+            return (), [], [], m.end()
+        entries, cumu, flux, out = zip(*rows)
+        layout = self._layouts.get((entries, out))
+        if layout is None:
+            layout = self._get_budget_layout(entries, out)
+            self._layouts[(entries, out)] = layout
+        keys, ilines = layout
+        return keys, [cumu[i] for i in ilines], \
+               [flux[i] for i in ilines], m.end()
+
+    def _get_budget_layout(self, entries, out):
+        """
+        Return the budget keys and the index of the budget line for each key
+        from the entry names of the budget lines in a budget table.  A
+        non-empty value in out marks the line that starts the OUT section.
+
+        """
+        tag = 'IN'
+        layout = collections.OrderedDict()
+        for i, (entry, o) in enumerate(zip(entries, out)):
+            if o:
+                if len(layout) > 0:
+                    tag = 'OUT'
+                continue
+            entry = entry.strip()
+            if sys.version_info[0] == 3:
+                entry = entry.decode('ascii', 'replace')
+            if entry.endswith(tag.upper()):
+                if ' - ' in entry.upper():
+                    key = entry.replace(' ', '')
+                else:
+                    key = entry.replace(' ', '_')
+            elif 'PERCENT DISCREPANCY' in entry.upper():
+                key = entry.replace(' ', '_')
+            else:
+                key = '{}_{}'.format(entry.replace(' ', '_'), tag)
+            layout[key] = i
+            if entry.upper() == 'PERCENT DISCREPANCY':
+                break
+        return tuple(layout.keys()), list(layout.values())
+
+    def _get_totim(self, buf, ts, sp, pos, quiet=False):
+        # --quiet does not report a time summary that ends with the last,
+        #   incomplete line of a list file that is still being written
         ihead = 0
         while True:
-            line = self.f.readline()
+            line, pos = self._readline(buf, pos)
             ihead += 1
+            if quiet and not line.endswith('\n'):
+                return np.NaN, np.NaN, np.NaN, 0
             if line == '':
                 print(
                         'end of file found while seeking time information for ts,sp',
                         ts, sp)
-                return np.NaN, np.NaN, np.NaN
+                return np.NaN, np.NaN, np.NaN, 0
             elif ihead == 2 and 'SECONDS     MINUTES      HOURS       DAYS        YEARS' not in line:
                 break
             elif '-----------------------------------------------------------' in line:
-                line = self.f.readline()
+                line, pos = self._readline(buf, pos)
                 break
+        if quiet and not line.endswith('\n'):
+            return np.NaN, np.NaN, np.NaN, 0
         tslen = self._parse_time_line(line)
         if tslen is None:
             print('error parsing tslen for ts,sp', ts, sp)
-            return np.NaN, np.NaN, np.NaN
+            return np.NaN, np.NaN, np.NaN, 0
 
-        sptim = self._parse_time_line(self.f.readline())
+        line, pos = self._readline(buf, pos)
+        if quiet and not line.endswith('\n'):
+            return np.NaN, np.NaN, np.NaN, 0
+        sptim = self._parse_time_line(line)
         if sptim is None:
             print('error parsing sptim for ts,sp', ts, sp)
-            return np.NaN, np.NaN, np.NaN
+            return np.NaN, np.NaN, np.NaN, 0
 
-        totim = self._parse_time_line(self.f.readline())
+        line, pos = self._readline(buf, pos)
+        if quiet and not line.endswith('\n'):
+            return np.NaN, np.NaN, np.NaN, 0
+        totim = self._parse_time_line(line)
         if totim is None:
             print('error parsing totim for ts,sp', ts, sp)
-            return np.NaN, np.NaN, np.NaN
-        return tslen, sptim, totim
+            return np.NaN, np.NaN, np.NaN, 0
+        return tslen, sptim, totim, pos
 
     def _parse_time_line(self, line):
         if line == '':
@@ -7,8 +7,10 @@ important classes that can be accessed by the user.
 
 """
 
+import io
+import os
 import itertools
-import collections
+import warnings
 import numpy as np
 
 try:
@@ -16,10 +18,557 @@ try:
 except:
     pass
 from ..utils.flopy_io import loadtxt
-from ..utils.recarray_utils import ra_slice
+from ..utils.binaryfile import _load_index_cache, _save_index_cache
 
 
-class PathlineFile():
+def _get_group_index(particleid):
+    """
+    Build an index that groups records by particle id.
+
+    Parameters
+    ----------
+    particleid : numpy array
+        particle id of each record
+
+    Returns
+    -------
+    order : numpy array
+        stable sort order of particleid, records for each particle remain
+        in file order
+    pids : numpy array
+        sorted unique particle ids
+    offsets : numpy array
+        start of the records for each particle id in order, with the total
+        number of records appended
+
+    """
+    order = np.argsort(particleid, kind='mergesort')
+    spid = particleid[order]
+    pids, offsets = np.unique(spid, return_index=True)
+    offsets = np.append(offsets, spid.shape[0])
+    return order, pids, offsets
+
+
+def _get_group_slice(groups, partid):
+    """
+    Return the record numbers for particle partid from a group index
+    created by _get_group_index.
+
+    """
+    order, pids, offsets = groups
+    ipos = np.searchsorted(pids, partid)
+    if ipos < pids.shape[0] and pids[ipos] == partid:
+        return order[offsets[ipos]:offsets[ipos + 1]]
+    return order[0:0]
+
+
+def _encode_cells(data_cols, cell_cols):
+    """
+    Encode multi-column integer cell indices, for example (k, i, j), as a
+    single int64 id using a mixed radix that covers both sets of indices.
+
+    Parameters
+    ----------
+    data_cols : list of numpy arrays
+        cell index columns of the data
+    cell_cols : list of numpy arrays
+        cell index columns of the cells to compare with
+
+    Returns
+    -------
+    data_ids, cell_ids : numpy arrays
+        int64 cell ids of the data and of the cells
+
+    """
+    data_ids = np.zeros(data_cols[0].shape[0], dtype=np.int64)
+    cell_ids = np.zeros(cell_cols[0].shape[0], dtype=np.int64)
+    for dcol, ccol in zip(data_cols, cell_cols):
+        dcol = dcol.astype(np.int64)
+        ccol = ccol.astype(np.int64)
+        both = np.concatenate((dcol, ccol))
+        if both.shape[0] < 1:
+            continue
+        lo = both.min()
+        base = both.max() - lo + 1
+        data_ids = data_ids * base + (dcol - lo)
+        cell_ids = cell_ids * base + (ccol - lo)
+    return data_ids, cell_ids
+
+
+def _in_cells(data, keys, cells):
+    """
+    Return a boolean array that is True for the records in data located in
+    one of cells.
+
+    Parameters
+    ----------
+    data : numpy structured array
+        records with the cell index fields in keys
+    keys : list of str
+        cell index fields, for example ['k', 'i', 'j'] or ['node']
+    cells : list or array
+        (k, i, j) tuples or node numbers (zero-based)
+
+    """
+    cells = _get_cell_array(cells, keys)
+    data_ids, cell_ids = _encode_cells([data[key] for key in keys],
+                                       [cells[:, i]
+                                        for i in range(len(keys))])
+    return np.in1d(data_ids, cell_ids)
+
+
+def _get_cell_array(cells, keys):
+    """
+    Convert cells, a list of (k, i, j) tuples, a list of node numbers or a
+    structured array, to a two-dimensional int64 array with one column for
+    each of the cell index fields in keys.
+
+    """
+    if isinstance(cells, np.ndarray) and cells.dtype.names is not None:
+        names = cells.dtype.names
+        if not all(key in names for key in keys):
+            names = names[:len(keys)]
+        else:
+            names = keys
+        cells = np.column_stack([cells[name].astype(np.int64)
+                                 for name in names]).reshape(-1, len(keys))
+        return cells
+    cells = np.array(cells, dtype=np.int64)
+    return cells.reshape(-1, len(keys))
+
+
+def _get_cell_index(data, keys):
+    """
+    Build an index of record numbers sorted by cell.  Cells are encoded as
+    linear int64 ids so that the records for any set of cells can be found
+    with a binary search.
+
+    Parameters
+    ----------
+    data : numpy structured array
+        records with the cell index fields in keys
+    keys : list of str
+        cell index fields, for example ['k', 'i', 'j'] or ['node']
+
+    Returns
+    -------
+    index : tuple
+        lower bound and size of each cell index field, sorted cell ids
+        and the record numbers in the same order
+
+    """
+    lo = []
+    base = []
+    ids = np.zeros(data.shape[0], dtype=np.int64)
+    for key in keys:
+        col = data[key].astype(np.int64)
+        if col.shape[0] > 0:
+            lo.append(col.min())
+            base.append(col.max() - col.min() + 1)
+        else:
+            lo.append(0)
+            base.append(1)
+        ids = ids * base[-1] + (col - lo[-1])
+    order = np.argsort(ids, kind='mergesort')
+    return np.array(lo), np.array(base), ids[order], order
+
+
+def _get_cell_records(index, cells):
+    """
+    Return the record numbers located in one of cells from an index
+    created by _get_cell_index.  Records for each cell are returned in
+    file order, one cell after the other.
+
+    """
+    lo, base, sids, order = index
+    cells = cells[np.all((cells >= lo) & (cells < lo + base), axis=1)]
+    ids = np.zeros(cells.shape[0], dtype=np.int64)
+    for i in range(cells.shape[1]):
+        ids = ids * base[i] + (cells[:, i] - lo[i])
+    ids = np.unique(ids)
+    start = np.searchsorted(sids, ids, side='left')
+    stop = np.searchsorted(sids, ids, side='right')
+    return order[_concat_ranges(start, stop)]
+
+
+def _concat_ranges(start, stop):
+    """
+    Return the concatenation of np.arange(start[n], stop[n]) for all n.
+
+    """
+    count = stop - start
+    keep = count > 0
+    start, count = start[keep], count[keep]
+    ntot = count.sum()
+    if ntot < 1:
+        return np.array([], dtype=np.int64)
+    steps = np.ones(ntot, dtype=np.int64)
+    steps[0] = start[0]
+    ends = np.cumsum(count)[:-1]
+    steps[ends] = start[1:] - (start[:-1] + count[:-1]) + 1
+    return np.cumsum(steps)
+
+
+def _get_segments(groups):
+    """
+    Return the record numbers of the start and end points of the pathline
+    segments, from a group index created by _get_group_index.  Particles
+    with a single point have a segment of zero length.
+
+    """
+    order, pids, offsets = groups
+    count = np.diff(offsets)
+    last = np.zeros(order.shape[0], dtype=bool)
+    last[offsets[1:] - 1] = True
+    rec0 = order[~last]
+    rec1 = order[np.nonzero(~last)[0] + 1]
+    single = order[offsets[:-1][count == 1]]
+    rec0 = np.concatenate((rec0, single))
+    rec1 = np.concatenate((rec1, single))
+    return rec0, rec1
+
+
+def _get_bucket_index(xmin, ymin, xmax, ymax, nbucket=None):
+    """
+    Build a uniform grid of buckets over the bounding boxes of a set of
+    segments.  Each segment is listed in every bucket that its bounding
+    box overlaps.
+
+    Parameters
+    ----------
+    xmin, ymin, xmax, ymax : numpy arrays
+        bounding box of each segment
+    nbucket : int
+        number of buckets in each direction. If None, about four segments
+        per bucket are used, up to 1024 buckets in each direction, and the
+        buckets are at least twice the median size of the segments.
+        (default is None)
+
+    Returns
+    -------
+    index : dict
+        grid origin, bucket size and number of buckets, the segment
+        numbers sorted by bucket and the offset of each bucket
+
+    """
+    nseg = xmin.shape[0]
+    if nseg > 0:
+        x0, y0 = xmin.min(), ymin.min()
+        width = max(xmax.max() - x0, ymax.max() - y0)
+    else:
+        x0, y0, width = 0., 0., 0.
+    if nbucket is None:
+        nbucket = min(max(np.sqrt(nseg / 4.), 1), 1024)
+        if width > 0:
+            size = 2. * np.median(np.maximum(xmax - xmin, ymax - ymin))
+            nbucket = min(nbucket, width / size) if size > 0 else nbucket
+        nbucket = max(int(nbucket), 1)
+    if nseg > 0:
+        dx = max((xmax.max() - x0) / nbucket, 1e-30)
+        dy = max((ymax.max() - y0) / nbucket, 1e-30)
+    else:
+        dx, dy = 1., 1.
+    index = {'x0': x0, 'y0': y0, 'dx': dx, 'dy': dy, 'n': nbucket}
+    ix0, iy0 = _get_bucket(index, xmin, ymin)
+    ix1, iy1 = _get_bucket(index, xmax, ymax)
+    nx = ix1 - ix0 + 1
+    ny = iy1 - iy0 + 1
+
+    # list each segment in all of the buckets it overlaps
+    count = nx * ny
+    segs = np.repeat(np.arange(nseg, dtype=np.int64), count)
+    start = np.repeat(np.cumsum(count) - count, count)
+    local = np.arange(segs.shape[0], dtype=np.int64) - start
+    bx = ix0[segs] + local % nx[segs]
+    by = iy0[segs] + local // nx[segs]
+    bucket = by * nbucket + bx
+    order = np.argsort(bucket, kind='mergesort')
+    index['segments'] = segs[order]
+    index['offsets'] = np.searchsorted(bucket[order],
+                                       np.arange(nbucket * nbucket + 1))
+    return index
+
+
+def _get_bucket(index, x, y):
+    n = index['n']
+    ix = np.floor((np.asarray(x) - index['x0']) / index['dx'])
+    iy = np.floor((np.asarray(y) - index['y0']) / index['dy'])
+    ix = np.clip(ix, 0, n - 1).astype(np.int64)
+    iy = np.clip(iy, 0, n - 1).astype(np.int64)
+    return ix, iy
+
+
+def _query_bucket_index(index, bbox):
+    """
+    Return the unique segment numbers listed in the buckets that overlap
+    bbox (xmin, ymin, xmax, ymax).
+
+    """
+    n = index['n']
+    ix0, iy0 = _get_bucket(index, bbox[0], bbox[1])
+    ix1, iy1 = _get_bucket(index, bbox[2], bbox[3])
+    bx, by = np.meshgrid(np.arange(ix0, ix1 + 1), np.arange(iy0, iy1 + 1))
+    bucket = (by * n + bx).ravel()
+    offsets = index['offsets']
+    segs = index['segments'][_concat_ranges(offsets[bucket],
+                                            offsets[bucket + 1])]
+    return np.unique(segs)
+
+
+def _get_rings(bbox=None, polygon=None):
+    """
+    Return the rings of a bbox (xmin, ymin, xmax, ymax) or of a polygon,
+    given as a list of (x, y) vertices or a flopy.utils.geometry.Polygon,
+    as a list of closed (n, 2) arrays.
+
+    """
+    if bbox is not None:
+        xmin, ymin, xmax, ymax = bbox
+        rings = [[(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)]]
+    elif hasattr(polygon, 'exterior'):
+        rings = [polygon.exterior] + list(polygon.interiors)
+    else:
+        rings = [polygon]
+    closed = []
+    for ring in rings:
+        ring = np.array([v[:2] for v in ring], dtype=float)
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack((ring, ring[:1]))
+        closed.append(ring)
+    return closed
+
+
+def _segments_in_rings(ax, ay, bx, by, rings):
+    """
+    Return a boolean array that is True for the segments from (ax, ay) to
+    (bx, by) that have an end point inside, or cross an edge of, the
+    polygon defined by rings.  Points inside holes are outside the
+    polygon (even-odd rule).
+
+    """
+    inside_a = np.zeros(ax.shape[0], dtype=bool)
+    inside_b = np.zeros(ax.shape[0], dtype=bool)
+    cross = np.zeros(ax.shape[0], dtype=bool)
+
+    def orient(px, py, qx, qy, rx, ry):
+        return np.sign((qx - px) * (ry - py) - (qy - py) * (rx - px))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for ring in rings:
+            for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+                # point in polygon by ray casting
+                for px, py, inside in [(ax, ay, inside_a),
+                                       (bx, by, inside_b)]:
+                    straddle = (y1 > py) != (y2 > py)
+                    xcross = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+                    inside ^= straddle & (px < xcross)
+
+                # segment and edge intersection
+                o1 = orient(ax, ay, bx, by, x1, y1)
+                o2 = orient(ax, ay, bx, by, x2, y2)
+                o3 = orient(x1, y1, x2, y2, ax, ay)
+                o4 = orient(x1, y1, x2, y2, bx, by)
+                overlap = (np.minimum(ax, bx) <= max(x1, x2)) & \
+                          (np.maximum(ax, bx) >= min(x1, x2)) & \
+                          (np.minimum(ay, by) <= max(y1, y2)) & \
+                          (np.maximum(ay, by) >= min(y1, y2))
+                cross |= (o1 * o2 <= 0) & (o3 * o4 <= 0) & overlap
+    return inside_a | inside_b | cross
+
+
+def _clip_segments(t0, t1, time_window):
+    """
+    Return the fraction of each segment, from t0 to t1, at the start and
+    end of the part of the segment in time_window (tmin, tmax), and a
+    boolean array that is True for the segments that overlap time_window.
+
+    """
+    tmin, tmax = time_window
+    if tmin is None:
+        tmin = -np.inf
+    if tmax is None:
+        tmax = np.inf
+    keep = (np.maximum(t0, t1) >= tmin) & (np.minimum(t0, t1) <= tmax)
+    dt = t1 - t0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sa = (tmin - t0) / dt
+        sb = (tmax - t0) / dt
+    s0 = np.clip(np.minimum(sa, sb), 0., 1.)
+    s1 = np.clip(np.maximum(sa, sb), 0., 1.)
+    flat = dt == 0
+    s0[flat] = 0.
+    s1[flat] = 1.
+    return s0, s1, keep
+
+
+def _load_data_cache(filename, signature):
+    """
+    Load parsed MODPATH output data from the data cache (filename.npy).
+    The data are memory-mapped, so they are read from disk as they are
+    used.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the MODPATH output file.
+    signature : dict
+        Values, in addition to the size and modification time of the
+        MODPATH output file, that must match the values stored with the
+        cache.
+
+    Returns
+    -------
+    data : numpy recarray or None
+        Read-only memory-mapped data.  None is returned if the cache does
+        not exist or is out of date.
+
+    """
+    cache = _load_index_cache(filename, signature)
+    if cache is None:
+        return None
+    fpth = filename + '.npy'
+    if not os.path.isfile(fpth) or \
+            os.path.getsize(fpth) != cache['cachesize'][()]:
+        return None
+    try:
+        data = np.load(fpth, mmap_mode='r')
+    except Exception:
+        return None
+    return data.view(np.recarray)
+
+
+def _save_data_cache(filename, signature, data):
+    """
+    Save parsed MODPATH output data to filename.npy.  The size and
+    modification time of the MODPATH output file, used to validate the
+    cache, are saved to filename.fpidx.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the MODPATH output file.
+    signature : dict
+        Values used to validate the cache when it is loaded.
+    data : numpy structured array
+        Parsed data.
+
+    """
+    # text fields read by pandas are Python objects, which can not be
+    # memory-mapped, so they are saved as fixed-width strings
+    data = np.asarray(data)
+    dtype = []
+    for name in data.dtype.names:
+        dt = data.dtype[name]
+        if dt == object:
+            dt = np.array(data[name].tolist()).dtype
+            if dt == object:
+                warnings.warn('Could not write data cache: ' +
+                              '{}.npy'.format(filename))
+                return
+        dtype.append((name, dt))
+    dtype = np.dtype(dtype)
+    if dtype != data.dtype:
+        data = np.array(data.tolist(), dtype=dtype)
+
+    fpth = filename + '.npy'
+    try:
+        with open(fpth, 'wb') as f:
+            np.save(f, data)
+    except (IOError, OSError):
+        warnings.warn('Could not write data cache: {}'.format(fpth))
+        return
+    _save_index_cache(filename, signature,
+                      {'cachesize': os.path.getsize(fpth)})
+    return
+
+
+class _ModpathFile(object):
+    """
+    Base class for MODPATH output files with the particle group and cell
+    indexes that are shared by the pathline, endpoint, and timeseries files.
+    This class should not be instantiated directly.
+
+    """
+    _label = 'particle'
+
+    def _get_groups(self):
+        if self._groups is None:
+            self._groups = _get_group_index(self._data['particleid'])
+        return self._groups
+
+    def _get_cellindex(self, keys):
+        keys = tuple(keys)
+        if keys not in self._cellindex:
+            for key in keys:
+                if key not in self._data.dtype.names:
+                    msg = "could not extract '{}' key ".format(key) + \
+                          "from {} data".format(self._label)
+                    raise KeyError(msg)
+            self._cellindex[keys] = _get_cell_index(self._data, keys)
+        return self._cellindex[keys]
+
+    def _gather_particles(self, order, offsets, totim=None, ge=True):
+        """
+        Gather the output columns of the records in order, which hold the
+        records of consecutive particles that start at offsets.  Records
+        with times that are not greater than or equal to (ge=True) or less
+        than or equal to (ge=False) totim are removed.
+
+        Returns
+        -------
+        ra : numpy array
+            Output records of the particles.
+        offsets : list
+            Start of the records for each particle in ra, with the total
+            number of records appended.
+
+        """
+        if totim is not None:
+            time = self._data['time'][order]
+            if ge:
+                idx = time >= totim
+            else:
+                idx = time <= totim
+            offsets = np.append(0, np.cumsum(idx))[offsets]
+            order = order[idx]
+        ra = np.empty(order.shape[0], dtype=self.outdtype)
+        for name in self.outdtype.names:
+            ra[name] = self._data[name][order]
+        return ra, offsets.tolist()
+
+    def _get_particle_list(self, totim=None, ge=True):
+        """
+        Return a list with a recarray of the output columns for each
+        particle in particle id order.
+
+        """
+        order, pids, offsets = self._get_groups()
+        ra, offsets = self._gather_particles(order, offsets, totim=totim,
+                                             ge=ge)
+        # slicing an ndarray and then viewing each slice as a recarray is
+        # much faster than slicing a recarray
+        return [ra[i0:i1].view(np.recarray)
+                for i0, i1 in zip(offsets[:-1], offsets[1:])]
+
+    def _iter_particles(self, totim=None, ge=True, nblock=1000):
+        """
+        Generate (particleid, recarray) tuples in particle id order.  The
+        records are gathered for nblock particles at a time, so only the
+        records of one block of particles are held in memory.
+
+        """
+        order, pids, offsets = self._get_groups()
+        for ib in range(0, pids.shape[0], nblock):
+            ie = min(ib + nblock, pids.shape[0])
+            ra, boffsets = self._gather_particles(
+                order[offsets[ib]:offsets[ie]],
+                offsets[ib:ie + 1] - offsets[ib], totim=totim, ge=ge)
+            for partid, i0, i1 in zip(pids[ib:ie], boffsets[:-1],
+                                      boffsets[1:]):
+                yield partid, ra[i0:i1].view(np.recarray)
+
+
+class PathlineFile(_ModpathFile):
     """
     PathlineFile Class.
 
@@ -29,6 +578,28 @@ class PathlineFile():
         Name of the pathline file
     verbose : bool
         Write information to the screen.  Default is False.
+    data_cache : bool
+        Save the parsed data to filename.npy and memory-map it when the
+        file is opened again and its size and modification time have not
+        changed.  Default is False.
+    kwargs : dict
+        Keyword arguments that restrict the pathline points that are loaded.
+        If any of them are specified the file is read chunksize lines at a
+        time and only the matching points are kept (see iter_chunks).
+        chunksize : int
+            number of lines to read at a time (default is 100000)
+        particleids : list of ints
+            zero-based particle ids to load
+        particlegroups : list of ints
+            zero-based particle groups to load
+        time_window : tuple of floats
+            (tmin, tmax) time range to load, either may be None
+        layers : list of ints
+            zero-based layers to load
+        dest_cells : list or array of tuples
+            (k, i, j) or node numbers (zero-based); only the pathlines with
+            a point in one of these cells are loaded
+        The data cache is not used when any of them are specified.
 
     Examples
     --------
@@ -36,18 +607,31 @@ class PathlineFile():
     >>> import flopy
     >>> pthobj = flopy.utils.PathlineFile('model.mppth')
     >>> p1 = pthobj.get_data(partid=1)
+    >>> pthobj = flopy.utils.PathlineFile('model.mppth', layers=[0],
+    ...                                   time_window=(0., 3650.))
     """
     kijnames = ['k', 'i', 'j', 'node',
                 'particleid', 'particlegroup', 'linesegmentindex',
                 'particleidloc', 'sequencenumber']
+    _label = 'pathline'
 
-    def __init__(self, filename, verbose=False):
+    def __init__(self, filename, verbose=False, **kwargs):
         """
         Class constructor.
 
         """
         self.fname = filename
         self.verbose = verbose
+        self.data_cache = kwargs.pop('data_cache', False)
+
+        filters = {}
+        for key in ['chunksize', 'particleids', 'particlegroups',
+                    'time_window', 'layers', 'dest_cells']:
+            if key in kwargs.keys():
+                filters[key] = kwargs.pop(key)
+        if len(kwargs.keys()) > 0:
+            args = ','.join(kwargs.keys())
+            raise Exception('PathlineFile error: unrecognized kwargs: ' + args)
 
         # build index
         self._build_index()
@@ -56,28 +640,54 @@ class PathlineFile():
         self.outdtype = self._get_outdtype()
 
         # set data dtype and read pathline data
-        if self.version == 7:
-            self.dtype, self._data = self._get_mp7data()
+        if len(filters) > 0:
+            if self.version == 7:
+                self.dtype = self._get_mp7dtypes()[1]
+            else:
+                self.dtype = self._get_dtypes()
+            data = list(self.iter_chunks(**filters))
+            if len(data) > 0:
+                self._data = np.concatenate(data).view(np.recarray)
+            else:
+                self._data = np.recarray(0, dtype=self.dtype)
         else:
-            self.dtype = self._get_dtypes()
-            self._data = loadtxt(self.file, dtype=self.dtype,
-                                 skiprows=self.skiprows)
+            if self.version == 7:
+                self.dtype = self._get_mp7dtypes()[1]
+            else:
+                self.dtype = self._get_dtypes()
+            self._data = None
+            if self.data_cache:
+                self._data = _load_data_cache(self.fname,
+                                              self._cache_signature())
+            if self._data is None:
+                if self.version == 7:
+                    self.dtype, self._data = self._get_mp7data()
+                else:
+                    self._data = loadtxt(self.file, dtype=self.dtype,
+                                         skiprows=self.skiprows)
 
-        # convert layer, row, and column indices; particle id and group; and
-        #  line segment indices to zero-based
-        for n in self.kijnames:
-            try:
-                self._data[n] -= 1
-            except:
-                pass
+                # convert layer, row, and column indices; particle id and
+                # group; and line segment indices to zero-based
+                self._set_zero_based(self._data)
+                if self.data_cache:
+                    _save_data_cache(self.fname, self._cache_signature(),
+                                     self._data)
 
         # set number of particle ids
         self.nid = np.unique(self._data['particleid'])
 
+        # records grouped by particle id are indexed when first needed
+        self._groups = None
+        self._cellindex = {}
+        self._segindex = None
+
         # close the input file
         self.file.close()
         return
 
+    def _cache_signature(self):
+        return {'version': self.version, 'dtype': str(self.dtype)}
+
     def _build_index(self):
         """
            Set position of the start of the pathline data.
@@ -151,8 +761,15 @@ class PathlineFile():
                              ("particleid", np.int32)])
         return outdtype
 
-    def _get_mp7data(self):
-        data = None
+    def _set_zero_based(self, data):
+        for n in self.kijnames:
+            try:
+                data[n] -= 1
+            except:
+                pass
+        return
+
+    def _get_mp7dtypes(self):
         dtyper = np.dtype([("node", np.int32), ("x", np.float32),
                            ("y", np.float32), ("z", np.float32),
                            ("time", np.float32), ("xloc", np.float32),
@@ -169,16 +786,32 @@ class PathlineFile():
                           ("xloc", np.float32), ("yloc", np.float32),
                           ("zloc", np.float32),
                           ("stressperiod", np.int32), ("timestep", np.int32)])
-        idx = 0
-        part_dict = collections.OrderedDict()
+        return dtyper, dtype
+
+    def _get_mp7data(self):
+        dtype = self._get_mp7dtypes()[1]
+        data = list(self._iter_mp7data(self.file))
+        if len(data) > 0:
+            data = np.concatenate(data)
+        else:
+            data = np.zeros(0, dtype=dtype)
+        return dtype, data
+
+    def _iter_mp7data(self, f, chunksize=None):
+        """
+        Generate arrays of MODPATH 7 pathline data that hold complete
+        pathlines and at least chunksize points (except for the last one).
+
+        """
+        dtyper, dtype = self._get_mp7dtypes()
+        for n in range(self.skiprows):
+            f.readline()
+        pathlines = []
         ndata = 0
         while True:
-            if idx == 0:
-                for n in range(self.skiprows):
-                    line = self.file.readline()
             # read header line
             try:
-                line = self.file.readline().strip()
+                line = f.readline().strip()
                 if self.verbose:
                     print(line)
                 if len(line) < 1:
@@ -189,19 +822,25 @@ class PathlineFile():
             sequencenumber, group, particleid, pathlinecount = t[0:4]
             ndata += pathlinecount
             # read the particle data
-            d = np.loadtxt(itertools.islice(self.file, 0, pathlinecount),
+            d = np.loadtxt(itertools.islice(f, 0, pathlinecount),
                            dtype=dtyper)
-            key = (idx, sequencenumber, group, particleid, pathlinecount)
-            part_dict[key] = d.copy()
-            idx += 1
-
+            pathlines.append((sequencenumber, group, particleid,
+                              pathlinecount, d.copy()))
+            if chunksize is not None and ndata >= chunksize:
+                yield self._get_mp7array(pathlines, ndata, dtype)
+                pathlines = []
+                ndata = 0
+        if len(pathlines) > 0:
+            yield self._get_mp7array(pathlines, ndata, dtype)
+
+    def _get_mp7array(self, pathlines, ndata, dtype):
         # create data array
         data = np.zeros(ndata, dtype=dtype)
 
         # fill data
         ipos0 = 0
-        for key, value in part_dict.items():
-            idx, sequencenumber, group, particleid, pathlinecount = key[0:5]
+        for sequencenumber, group, particleid, pathlinecount, value in \
+                pathlines:
             ipos1 = ipos0 + pathlinecount
             # fill constant items for particle
             # particleid is not necessarily unique for all pathlines - use
@@ -217,7 +856,124 @@ class PathlineFile():
                 data[name][ipos0:ipos1] = value[name]
             ipos0 = ipos1
 
-        return dtype, data
+        return data
+
+    def _iter_raw_chunks(self, chunksize):
+        """
+        Generate zero-based arrays of pathline data read chunksize lines at
+        a time.
+
+        """
+        with open(self.fname, 'r') as f:
+            if self.version == 7:
+                chunks = self._iter_mp7data(f, chunksize)
+            else:
+                for n in range(self.skiprows):
+                    f.readline()
+                chunks = self._iter_text_chunks(f, chunksize)
+            for data in chunks:
+                self._set_zero_based(data)
+                yield data
+
+    def _iter_text_chunks(self, f, chunksize):
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if len(lines) < 1:
+                break
+            yield loadtxt(io.StringIO(u''.join(lines)), dtype=self.dtype)
+
+    def _get_filter(self, data, particleids=None, particlegroups=None,
+                    time_window=None, layers=None):
+        idx = np.ones(data.shape[0], dtype=bool)
+        if particleids is not None:
+            idx &= np.in1d(data['particleid'], particleids)
+        if particlegroups is not None:
+            if 'particlegroup' not in data.dtype.names:
+                msg = 'particle groups are not available in ' + \
+                      'MODPATH {} pathline files'.format(self.version)
+                raise Exception(msg)
+            idx &= np.in1d(data['particlegroup'], particlegroups)
+        if time_window is not None:
+            tmin, tmax = time_window
+            if tmin is not None:
+                idx &= data['time'] >= tmin
+            if tmax is not None:
+                idx &= data['time'] <= tmax
+        if layers is not None:
+            idx &= np.in1d(data['k'], layers)
+        return idx
+
+    def _get_cell_keys(self):
+        if self.version < 7:
+            return ['k', 'i', 'j']
+        return ['node']
+
+    def iter_chunks(self, chunksize=100000, particleids=None,
+                    particlegroups=None, time_window=None, layers=None,
+                    dest_cells=None):
+        """
+        Read the pathline file chunksize lines at a time and generate the
+        pathline points that match all of the specified criteria.  Only one
+        chunk of the file is held in memory, so pathline files that are
+        larger than the available memory can be filtered.
+
+        Parameters
+        ----------
+        chunksize : int
+            Number of lines to read at a time. MODPATH 7 chunks always
+            hold complete pathlines. (default is 100000)
+        particleids : list of ints
+            Zero-based particle ids to return. (default is None)
+        particlegroups : list of ints
+            Zero-based particle groups to return. Not available for
+            MODPATH 3 and 5 pathline files. (default is None)
+        time_window : tuple of floats
+            (tmin, tmax) range of pathline times to return. Either value
+            may be None. (default is None)
+        layers : list of ints
+            Zero-based layers of the points to return. (default is None)
+        dest_cells : list or array of tuples
+            (k, i, j) or node numbers (zero-based). Only pathlines with a
+            point in one of these cells are returned, as in
+            get_destination_pathline_data. This requires an additional
+            pass through the file. (default is None)
+
+        Returns
+        ----------
+        out : generator
+            A generator of numpy structured arrays with the same fields as
+            PathlineFile._data. Chunks without matching points are skipped.
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> pthobj = flopy.utils.PathlineFile('model.mppth')
+        >>> for pth in pthobj.iter_chunks(particlegroups=[0],
+        ...                               time_window=(0., 365.)):
+        ...     print(pth['particleid'].max())
+
+        """
+        if dest_cells is not None:
+            keys = self._get_cell_keys()
+            pids = []
+            for data in self._iter_raw_chunks(chunksize):
+                idx = _in_cells(data, keys, dest_cells)
+                pids.append(np.unique(data['particleid'][idx]))
+            pids = np.unique(np.concatenate(pids)) if len(pids) > 0 \
+                else np.array([], dtype=np.int32)
+            if particleids is not None:
+                pids = np.intersect1d(pids, particleids)
+            particleids = pids
+
+        for data in self._iter_raw_chunks(chunksize):
+            idx = self._get_filter(data, particleids=particleids,
+                                   particlegroups=particlegroups,
+                                   time_window=time_window, layers=layers)
+            if idx.all():
+                yield data
+            elif idx.any():
+                yield data[idx]
 
     def get_maxid(self):
         """
@@ -281,17 +1037,13 @@ class PathlineFile():
         >>> p1 = pthobj.get_data(partid=1)
 
         """
-        # idx = self._data['particleid'] == partid
+        ta = self._data[_get_group_slice(self._get_groups(), partid)]
         if totim is not None:
             if ge:
-                idx = (self._data['time'] >= totim) & \
-                      (self._data['particleid'] == partid)
+                ta = ta[ta['time'] >= totim]
             else:
-                idx = (self._data['time'] <= totim) & \
-                      (self._data['particleid'] == partid)
-        else:
-            idx = self._data['particleid'] == partid
-        self._ta = self._data[idx]
+                ta = ta[ta['time'] <= totim]
+        self._ta = ta
         names = ['x', 'y', 'z', 'time', 'k', 'particleid']
         return np.rec.fromarrays((self._ta[name] for name in names),
                                  dtype=self.outdtype)
@@ -332,11 +1084,222 @@ class PathlineFile():
         >>> p = pthobj.get_alldata()
 
         """
-        # plist = []
-        # for partid in self.nid:
-        #     plist.append(self.get_data(partid=partid, totim=totim, ge=ge))
-        return [self.get_data(partid=partid, totim=totim, ge=ge)
-                for partid in self.nid]
+        return self._get_particle_list(totim=totim, ge=ge)
+
+    def iter_particles(self, totim=None, ge=True):
+        """
+        Iterate over the pathline data for each particle in particle id order.
+
+        Parameters
+        ----------
+        totim : float
+            The simulation time. Only pathline points that are greater than or
+            equal to (ge=True) or less than or equal to (ge=False) totim
+            will be returned. Default is None
+        ge : bool
+            Boolean that determines if pathline times greater than or equal
+            to or less than or equal to totim is used to create a subset
+            of pathlines. Default is True.
+
+        Returns
+        ----------
+        out : generator
+            A generator of (particleid, recarray) tuples, where the
+            recarray has the x, y, z, time, k, and particleid for the
+            particle.
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> pthobj = flopy.utils.PathlineFile('model.mppth')
+        >>> for partid, p in pthobj.iter_particles(totim=100.):
+        ...     print(partid, p.time.max())
+
+        """
+        return self._iter_particles(totim=totim, ge=ge)
+
+    def get_destination_particleids(self, dest_cells):
+        """
+        Get the ids of the particles with a pathline point in a set of
+        destination cells.  An index of the pathline points by cell is built
+        on the first call and reused by later calls, so repeated queries
+        with different sets of cells are fast.
+
+        Parameters
+        ----------
+        dest_cells : list or array of tuples
+            (k, i, j) or node numbers of each destination cell (zero-based)
+
+        Returns
+        -------
+        partids : numpy array
+            sorted unique particle ids (zero-based)
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> p = flopy.utils.PathlineFile('modpath.pathline')
+        >>> partids = p.get_destination_particleids([(0, 0, 0),
+        ...                                          (1, 0, 0)])
+
+        """
+        keys = self._get_cell_keys()
+        index = self._get_cellindex(keys)
+        recs = _get_cell_records(index, _get_cell_array(dest_cells, keys))
+        return np.unique(self._data['particleid'][recs])
+
+    def _get_segment_index(self):
+        if self._segindex is None:
+            rec0, rec1 = _get_segments(self._get_groups())
+            x0, x1 = self._data['x'][rec0], self._data['x'][rec1]
+            y0, y1 = self._data['y'][rec0], self._data['y'][rec1]
+            index = _get_bucket_index(np.minimum(x0, x1),
+                                      np.minimum(y0, y1),
+                                      np.maximum(x0, x1),
+                                      np.maximum(y0, y1))
+            index['rec0'] = rec0
+            index['rec1'] = rec1
+            self._segindex = index
+        return self._segindex
+
+    def _query_segments(self, bbox=None, polygon=None, time_window=None,
+                        layers=None):
+        """
+        Return the record numbers of the start and end points of the
+        segments that match all of the specified criteria.
+
+        """
+        index = self._get_segment_index()
+        if bbox is not None or polygon is not None:
+            rings = _get_rings(bbox=bbox, polygon=polygon)
+            vertices = np.vstack(rings)
+            segs = _query_bucket_index(index,
+                                       (vertices[:, 0].min(),
+                                        vertices[:, 1].min(),
+                                        vertices[:, 0].max(),
+                                        vertices[:, 1].max()))
+        else:
+            rings = None
+            segs = np.arange(index['rec0'].shape[0])
+        rec0 = index['rec0'][segs]
+        rec1 = index['rec1'][segs]
+
+        if layers is not None:
+            keep = np.in1d(self._data['k'][rec0], layers) | \
+                   np.in1d(self._data['k'][rec1], layers)
+            rec0, rec1 = rec0[keep], rec1[keep]
+
+        s0, s1 = 0., 1.
+        if time_window is not None:
+            s0, s1, keep = _clip_segments(self._data['time'][rec0],
+                                          self._data['time'][rec1],
+                                          time_window)
+            rec0, rec1 = rec0[keep], rec1[keep]
+            s0, s1 = s0[keep], s1[keep]
+
+        if rings is not None:
+            x0, x1 = self._data['x'][rec0], self._data['x'][rec1]
+            y0, y1 = self._data['y'][rec0], self._data['y'][rec1]
+            keep = _segments_in_rings(x0 + s0 * (x1 - x0),
+                                      y0 + s0 * (y1 - y0),
+                                      x0 + s1 * (x1 - x0),
+                                      y0 + s1 * (y1 - y0), rings)
+            rec0, rec1 = rec0[keep], rec1[keep]
+        return rec0, rec1
+
+    def get_intersecting_segments(self, bbox=None, polygon=None,
+                                  time_window=None, layers=None):
+        """
+        Get the pathline segments that intersect an area, a time window
+        and/or a set of layers.  A spatial index of the segments is built
+        on the first call and reused by later calls.
+
+        Parameters
+        ----------
+        bbox : tuple of floats
+            (xmin, ymin, xmax, ymax) in the pathline file coordinates.
+            (default is None)
+        polygon : list of tuples or flopy.utils.geometry.Polygon
+            (x, y) vertices of a polygon in the pathline file coordinates.
+            Only used if bbox is None. (default is None)
+        time_window : tuple of floats
+            (tmin, tmax) range of times. Either value may be None. Segments
+            are interpolated linearly in time, so only the part of each
+            segment within time_window is tested against bbox or polygon.
+            (default is None)
+        layers : list of ints
+            Zero-based layers. A segment is in a layer if either of its
+            points is in the layer. (default is None)
+
+        Returns
+        -------
+        start, end : np.recarray
+            Pathline records (the same form as PathlineFile._data) for the
+            start and end points of the segments that match all of the
+            specified criteria. Particles with only one point are returned
+            as segments with the same start and end point.
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> p = flopy.utils.PathlineFile('modpath.pathline')
+        >>> start, end = p.get_intersecting_segments(layers=[2])
+
+        """
+        rec0, rec1 = self._query_segments(bbox=bbox, polygon=polygon,
+                                          time_window=time_window,
+                                          layers=layers)
+        return self._data[rec0].view(np.recarray), \
+               self._data[rec1].view(np.recarray)
+
+    def get_intersecting_particleids(self, bbox=None, polygon=None,
+                                     time_window=None, layers=None):
+        """
+        Get the ids of the particles with a pathline segment that
+        intersects an area, a time window and/or a set of layers.  A
+        spatial index of the segments is built on the first call and
+        reused by later calls.
+
+        Parameters
+        ----------
+        bbox : tuple of floats
+            (xmin, ymin, xmax, ymax) in the pathline file coordinates.
+            (default is None)
+        polygon : list of tuples or flopy.utils.geometry.Polygon
+            (x, y) vertices of a polygon in the pathline file coordinates.
+            Only used if bbox is None. (default is None)
+        time_window : tuple of floats
+            (tmin, tmax) range of times. Either value may be None.
+            (default is None)
+        layers : list of ints
+            Zero-based layers. (default is None)
+
+        Returns
+        -------
+        partids : numpy array
+            sorted unique particle ids (zero-based)
+
+        See Also
+        --------
+        get_intersecting_segments
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> p = flopy.utils.PathlineFile('modpath.pathline')
+        >>> partids = p.get_intersecting_particleids(
+        ...     polygon=[(0., 0.), (100., 0.), (100., 50.)],
+        ...     time_window=(0., 3650.))
+
+        """
+        rec0, rec1 = self._query_segments(bbox=bbox, polygon=polygon,
+                                          time_window=time_window,
+                                          layers=layers)
+        return np.unique(self._data['particleid'][rec0])
 
     def get_destination_pathline_data(self, dest_cells, to_recarray=False):
         """
@@ -369,48 +1332,18 @@ class PathlineFile():
 
         """
 
-        # create local copy of _data
-        ra = np.array(self._data)
-
-        # find the intersection of pathlines and dest_cells
-        # convert dest_cells to same dtype for comparison
-        if self.version < 7:
-            try:
-                raslice = ra[['k', 'i', 'j']]
-            except:
-                msg = "could not extract 'k', 'i', and 'j' keys " + \
-                      "from pathline data"
-                raise KeyError(msg)
-        else:
-            try:
-                raslice = ra[['node']]
-            except:
-                msg = "could not extract 'node' key from pathline data"
-                raise KeyError(msg)
-            if isinstance(dest_cells, (list, tuple)):
-                allint = all(isinstance(el, int) for el in dest_cells)
-                # convert to a list of tuples
-                if allint:
-                    t = []
-                    for el in dest_cells:
-                        t.append((el,))
-                        dest_cells = t
-
-        dest_cells = np.array(dest_cells, dtype=raslice.dtype)
-        inds = np.in1d(raslice, dest_cells)
-        epdest = ra[inds].copy().view(np.recarray)
+        partids = self.get_destination_particleids(dest_cells)
 
         if to_recarray:
             # use particle ids to get the rest of the paths
-            inds = np.in1d(ra['particleid'], epdest.particleid)
-            pthldes = ra[inds].copy()
-            pthldes.sort(order=['particleid', 'time'])
+            order, pids, offsets = self._get_groups()
+            ipos = np.searchsorted(pids, partids)
+            recs = order[_concat_ranges(offsets[ipos], offsets[ipos + 1])]
+            pthldes = self._data[recs]
+            pthldes = pthldes[np.lexsort((pthldes['time'],
+                                          pthldes['particleid']))]
             pthldes = pthldes.view(np.recarray)
         else:
-
-            # get list of unique particleids in selection
-            partids = np.unique(epdest['particleid'])
-
             # build list of unique particleids in selection
             pthldes = [self.get_data(partid) for partid in partids]
 
@@ -550,7 +1483,7 @@ class PathlineFile():
         recarray2shp(pthdata, geoms, shpname=shpname, epsg=epsg, **kwargs)
 
 
-class EndpointFile():
+class EndpointFile(_ModpathFile):
     """
     EndpointFile Class.
 
@@ -560,6 +1493,10 @@ class EndpointFile():
         Name of the endpoint file
     verbose : bool
         Write information to the screen.  Default is False.
+    data_cache : bool
+        Save the parsed data to filename.npy and memory-map it when the
+        file is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Examples
     --------
@@ -573,36 +1510,56 @@ class EndpointFile():
     kijnames = ['k0', 'i0', 'j0', 'node0', 'k', 'i', 'j', 'node',
                 'particleid', 'particlegroup', 'particleidloc',
                 'zone0', 'zone']
+    _label = 'endpoint'
 
-    def __init__(self, filename, verbose=False):
+    def __init__(self, filename, verbose=False, **kwargs):
         """
         Class constructor.
 
         """
         self.fname = filename
         self.verbose = verbose
+        self.data_cache = kwargs.pop('data_cache', False)
+        if len(kwargs.keys()) > 0:
+            args = ','.join(kwargs.keys())
+            raise Exception('EndpointFile error: unrecognized kwargs: ' + args)
         self._build_index()
         self.dtype = self._get_dtypes()
-        self._data = loadtxt(self.file, dtype=self.dtype,
-                             skiprows=self.skiprows)
-        # add particleid if required
-        self._add_particleid()
-
-        # convert layer, row, and column indices; particle id and group; and
-        #  line segment indices to zero-based
-        for n in self.kijnames:
-            try:
-                self._data[n] -= 1
-            except:
-                pass
+        self._data = None
+        if self.data_cache:
+            self._data = _load_data_cache(self.fname,
+                                          self._cache_signature())
+        if self._data is None:
+            self._data = loadtxt(self.file, dtype=self.dtype,
+                                 skiprows=self.skiprows)
+            # add particleid if required
+            self._add_particleid()
+
+            # convert layer, row, and column indices; particle id and group;
+            # and line segment indices to zero-based
+            for n in self.kijnames:
+                try:
+                    self._data[n] -= 1
+                except:
+                    pass
+            if self.data_cache:
+                _save_data_cache(self.fname, self._cache_signature(),
+                                 self._data)
 
         # set number of particle ids
         self.nid = np.unique(self._data['particleid']).shape[0]
 
+        # records grouped by particle id are indexed when first needed
+        self._groups = None
+        self._cellindex = {}
+
         # close the input file
         self.file.close()
         return
 
+    def _cache_signature(self):
+        return {'version': self.version, 'dtype': str(self.dtype)}
+
     def _build_index(self):
         """
            Set position of the start of the pathline data.
@@ -840,9 +1797,7 @@ class EndpointFile():
         >>> e1 = endobj.get_data(partid=1)
 
         """
-        idx = self._data['particleid'] == partid
-        ra = self._data[idx]
-        return ra
+        return self._data[_get_group_slice(self._get_groups(), partid)]
 
     def get_alldata(self):
         """
@@ -901,49 +1856,21 @@ class EndpointFile():
 
         """
 
-        # create local copy of _data
-        ra = self.get_alldata()
-
-        # find the intersection of endpoints and dest_cells
-        # convert dest_cells to same dtype for comparison
         if self.version < 7:
             if source:
                 keys = ['k0', 'i0', 'j0']
             else:
                 keys = ['k', 'i', 'j']
-            try:
-                raslice = ra_slice(ra, keys)
-            except:
-                msg = "could not extract" + "'" + "', '".join(keys) + "'" + \
-                      "from endpoint data."
-                raise KeyError(msg)
         else:
             if source:
                 keys = ['node0']
             else:
                 keys = ['node']
-            try:
-                raslice = ra_slice(ra, keys)
-            except:
-                msg = "could not extract '{}' ".format(keys[0]) + \
-                      "key from endpoint data"
-                raise KeyError(msg)
-            if isinstance(dest_cells, (list, tuple)):
-                allint = all(isinstance(el, int) for el in dest_cells)
-                # convert to a list of tuples
-                if allint:
-                    t = []
-                    for el in dest_cells:
-                        t.append((el,))
-                        dest_cells = t
-        dtype = []
-        for key in keys:
-            dtype.append((key, np.int32))
-        dtype = np.dtype(dtype)
-        dest_cells = np.array(dest_cells, dtype=dtype)
 
-        inds = np.in1d(raslice, dest_cells)
-        epdest = ra[inds].copy().view(np.recarray)
+        # find the endpoints in dest_cells, in file order
+        index = self._get_cellindex(keys)
+        recs = _get_cell_records(index, _get_cell_array(dest_cells, keys))
+        epdest = self._data[np.sort(recs)].view(np.recarray)
         return epdest
 
     def write_shapefile(self, endpoint_data=None,
@@ -1000,7 +1927,7 @@ class EndpointFile():
         recarray2shp(epd, geoms, shpname=shpname, epsg=epsg, **kwargs)
 
 
-class TimeseriesFile():
+class TimeseriesFile(_ModpathFile):
     """
     TimeseriesFile Class.
 
@@ -1010,6 +1937,10 @@ class TimeseriesFile():
         Name of the timeseries file
     verbose : bool
         Write information to the screen.  Default is False.
+    data_cache : bool
+        Save the parsed data to filename.npy and memory-map it when the
+        file is opened again and its size and modification time have not
+        changed.  Default is False.
 
     Examples
     --------
@@ -1021,14 +1952,19 @@ class TimeseriesFile():
     kijnames = ['k', 'i', 'j', 'node',
                 'particleid', 'particlegroup', 'particleidloc',
                 'timestep', 'timestepindex', 'timepointindex']
+    _label = 'timeseries'
 
-    def __init__(self, filename, verbose=False):
+    def __init__(self, filename, verbose=False, **kwargs):
         """
         Class constructor.
 
         """
         self.fname = filename
         self.verbose = verbose
+        self.data_cache = kwargs.pop('data_cache', False)
+        if len(kwargs.keys()) > 0:
+            args = ','.join(kwargs.keys())
+            raise Exception('TimeseriesFile error: unrecognized kwargs: ' + args)
 
         # build index
         self._build_index()
@@ -1040,24 +1976,39 @@ class TimeseriesFile():
         self.dtype = self._get_dtypes()
 
         # read data
-        self._data = loadtxt(self.file, dtype=self.dtype,
-                             skiprows=self.skiprows)
+        self._data = None
+        if self.data_cache:
+            self._data = _load_data_cache(self.fname,
+                                          self._cache_signature())
+        if self._data is None:
+            self._data = loadtxt(self.file, dtype=self.dtype,
+                                 skiprows=self.skiprows)
 
-        # convert layer, row, and column indices; particle id and group; and
-        #  line segment indices to zero-based
-        for n in self.kijnames:
-            try:
-                self._data[n] -= 1
-            except:
-                pass
+            # convert layer, row, and column indices; particle id and group;
+            # and line segment indices to zero-based
+            for n in self.kijnames:
+                try:
+                    self._data[n] -= 1
+                except:
+                    pass
+            if self.data_cache:
+                _save_data_cache(self.fname, self._cache_signature(),
+                                 self._data)
 
         # set number of particle ids
         self.nid = np.unique(self._data['particleid'])
 
+        # records grouped by particle id are indexed when first needed
+        self._groups = None
+        self._cellindex = {}
+
         # close the input file
         self.file.close()
         return
 
+    def _cache_signature(self):
+        return {'version': self.version, 'dtype': str(self.dtype)}
+
     def _build_index(self):
         """
            Set position of the start of the timeseries data.
@@ -1225,16 +2176,13 @@ class TimeseriesFile():
         >>> ts1 = tsobj.get_data(partid=1)
 
         """
+        ta = self._data[_get_group_slice(self._get_groups(), partid)]
         if totim is not None:
             if ge:
-                idx = (self._data['time'] >= totim) & \
-                      (self._data['particleid'] == partid)
+                ta = ta[ta['time'] >= totim]
             else:
-                idx = (self._data['time'] <= totim) & \
-                      (self._data['particleid'] == partid)
-        else:
-            idx = self._data['particleid'] == partid
-        self._ta = self._data[idx]
+                ta = ta[ta['time'] <= totim]
+        self._ta = ta
         names = ['x', 'y', 'z', 'time', 'k', 'particleid']
         return np.rec.fromarrays((self._ta[name] for name in names),
                                  dtype=self.outdtype)
@@ -1276,8 +2224,77 @@ class TimeseriesFile():
         >>> ts = tsobj.get_alldata()
 
         """
-        return [self.get_data(partid=partid, totim=totim, ge=ge)
-                for partid in self.nid]
+        return self._get_particle_list(totim=totim, ge=ge)
+
+    def iter_particles(self, totim=None, ge=True):
+        """
+        Iterate over the timeseries data for each particle in particle id
+        order.
+
+        Parameters
+        ----------
+        totim : float
+            The simulation time. Only timeseries points that are greater
+            than or equal to (ge=True) or less than or equal to (ge=False)
+            totim will be returned. Default is None
+        ge : bool
+            Boolean that determines if timeseries times greater than or equal
+            to or less than or equal to totim is used to create a subset
+            of timeseries. Default is True.
+
+        Returns
+        ----------
+        out : generator
+            A generator of (particleid, recarray) tuples, where the
+            recarray has the x, y, z, time, k, and particleid for the
+            particle.
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> tsobj = flopy.utils.TimeseriesFile('model.timeseries')
+        >>> for partid, ts in tsobj.iter_particles(totim=100.):
+        ...     print(partid, ts.time.max())
+
+        """
+        return self._iter_particles(totim=totim, ge=ge)
+
+    def _get_cell_keys(self):
+        if self.version < 7:
+            return ['k', 'i', 'j']
+        return ['node']
+
+    def get_destination_particleids(self, dest_cells):
+        """
+        Get the ids of the particles with a timeseries point in a set of
+        destination cells.  An index of the timeseries points by cell is built
+        on the first call and reused by later calls, so repeated queries
+        with different sets of cells are fast.
+
+        Parameters
+        ----------
+        dest_cells : list or array of tuples
+            (k, i, j) or node numbers of each destination cell (zero-based)
+
+        Returns
+        -------
+        partids : numpy array
+            sorted unique particle ids (zero-based)
+
+        Examples
+        --------
+
+        >>> import flopy
+        >>> ts = flopy.utils.TimeseriesFile('modpath.timeseries')
+        >>> partids = ts.get_destination_particleids([(0, 0, 0),
+        ...                                           (1, 0, 0)])
+
+        """
+        keys = self._get_cell_keys()
+        index = self._get_cellindex(keys)
+        recs = _get_cell_records(index, _get_cell_array(dest_cells, keys))
+        return np.unique(self._data['particleid'][recs])
 
     def get_destination_timeseries_data(self, dest_cells):
         """
@@ -1304,39 +2321,12 @@ class TimeseriesFile():
 
         """
 
-        # create local copy of _data
-        ra = np.array(self._data)
-
-        # find the intersection of timeseries and dest_cells
-        # convert dest_cells to same dtype for comparison
-        if self.version < 7:
-            try:
-                raslice = ra[['k', 'i', 'j']]
-            except:
-                msg = "could not extract 'k', 'i', and 'j' keys " + \
-                      "from timeseries data"
-                raise KeyError(msg)
-        else:
-            try:
-                raslice = ra[['node']]
-            except:
-                msg = "could not extract 'node' key from timeseries data"
-                raise KeyError(msg)
-            if isinstance(dest_cells, (list, tuple)):
-                allint = all(isinstance(el, int) for el in dest_cells)
-                # convert to a list of tuples
-                if allint:
-                    t = []
-                    for el in dest_cells:
-                        t.append((el,))
-                        dest_cells = t
-
-        dest_cells = np.array(dest_cells, dtype=raslice.dtype)
-        inds = np.in1d(raslice, dest_cells)
-        epdest = ra[inds].copy().view(np.recarray)
+        partids = self.get_destination_particleids(dest_cells)
 
         # use particle ids to get the rest of the timeseries
-        inds = np.in1d(ra['particleid'], epdest.particleid)
-        tsdes = ra[inds].copy()
-        tsdes.sort(order=['particleid', 'time'])
+        order, pids, offsets = self._get_groups()
+        ipos = np.searchsorted(pids, partids)
+        recs = order[_concat_ranges(offsets[ipos], offsets[ipos + 1])]
+        tsdes = self._data[recs]
+        tsdes = tsdes[np.lexsort((tsdes['time'], tsdes['particleid']))]
         return tsdes.view(np.recarray)
@@ -3,7 +3,9 @@ This is a class for reading the mass budget from a (multi-component)
 mt3d(usgs) run. Also includes support for SFT budget.
 
 """
+import mmap
 import os
+import re
 import sys
 import warnings
 from datetime import timedelta
@@ -56,7 +58,7 @@ class MtListBudget(object):
         return
 
     def parse(self, forgive=True, diff=True, start_datetime=None,
-              time_unit='d'):
+              time_unit='d', fast=True):
         """
         Main entry point for parsing the list file.
 
@@ -72,6 +74,13 @@ class MtListBudget(object):
             Default is None.
         time_unit : str
             str to pass to pandas.to_timedelta.  Default is 'd' (days)
+        fast : bool
+            flag to locate the budget tables with a single scan of the list
+            file and convert the budget values in bulk.  A budget table that
+            does not have the expected layout is read line by line, so the
+            dataframes are the same as with fast=False.  The bulk parse is
+            the default; set fast=False to read the whole list file line by
+            line as in earlier versions.  Default is True
 
         Returns
         -------
@@ -88,34 +97,11 @@ class MtListBudget(object):
         self.gw_data = {}
         self.sw_data = {}
         self.lcount = 0
-        with open(self.file_name) as f:
-            while True:
-                line = self._readline(f)
-
-                if line is None:
-                    break
-                if self.gw_budget_key in line:
-                    if forgive:
-                        try:
-                            self._parse_gw(f, line)
-                        except Exception as e:
-                            warnings.warn(
-                                "error parsing GW mass budget starting on line {0}: {1} ".
-                                    format(self.lcount, str(e)))
-                            break
-                    else:
-                        self._parse_gw(f, line)
-                elif self.sw_budget_key in line:
-                    if forgive:
-                        try:
-                            self._parse_sw(f, line)
-                        except Exception as e:
-                            warnings.warn(
-                                "error parsing SW mass budget starting on line {0}: {1} ".
-                                    format(self.lcount, str(e)))
-                            break
-                    else:
-                        self._parse_sw(f, line)
+        if fast:
+            self._parse_fast(forgive)
+        else:
+            with open(self.file_name) as f:
+                self._parse_lines(f, forgive)
 
         if len(self.gw_data) == 0:
             raise Exception("no groundwater budget info found...")
@@ -180,6 +166,285 @@ class MtListBudget(object):
                 df_gw.pop(col)
         return df_gw, df_sw
 
+    def _parse_lines(self, f, forgive):
+        """
+        Read the budget tables line by line from the current position of
+        the open list file f.
+
+        """
+        while True:
+            line = self._readline(f)
+
+            if line is None:
+                break
+            if self.gw_budget_key in line:
+                if forgive:
+                    try:
+                        self._parse_gw(f, line)
+                    except Exception as e:
+                        warnings.warn(
+                            "error parsing GW mass budget starting on line {0}: {1} ".
+                                format(self.lcount, str(e)))
+                        break
+                else:
+                    self._parse_gw(f, line)
+            elif self.sw_budget_key in line:
+                if forgive:
+                    try:
+                        self._parse_sw(f, line)
+                    except Exception as e:
+                        warnings.warn(
+                            "error parsing SW mass budget starting on line {0}: {1} ".
+                                format(self.lcount, str(e)))
+                        break
+                else:
+                    self._parse_sw(f, line)
+        return
+
+    def _parse_fast(self, forgive):
+        """
+        Locate all of the budget tables with a single scan of a memory map
+        of the list file, convert the budget values of all tables at once
+        and add them to gw_data and sw_data in file order.  Reading
+        switches to _parse_lines at the first table that cannot be parsed
+        this way.
+
+        """
+        with open(self.file_name, 'rb') as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                buf = b''
+        try:
+            blocks, fallback = self._scan_blocks(buf)
+        finally:
+            if hasattr(buf, 'close'):
+                buf.close()
+
+        # convert the budget values for all of the tables at once
+        values = []
+        for block in blocks:
+            values += block['values']
+        try:
+            values = np.array(values, dtype=np.float64).tolist()
+        except ValueError:
+            values = None
+
+        i0 = 0
+        for iblock, block in enumerate(blocks):
+            nval = len(block['values'])
+            if values is None:
+                try:
+                    bvals = np.array(block['values'],
+                                     dtype=np.float64).tolist()
+                except ValueError:
+                    fallback = block['pos']
+                    break
+            else:
+                bvals = values[i0:i0 + nval]
+            i0 += nval
+            if block['kind'] == 'gw':
+                self._add_gw(block, bvals)
+            elif not self._add_sw(block, bvals):
+                fallback = block['pos']
+                break
+
+        # read the remainder of the file line by line
+        if fallback is not None:
+            with open(self.file_name, 'rb') as f:
+                self.lcount = 0
+                while f.tell() < fallback:
+                    self.lcount += f.read(min(fallback - f.tell(),
+                                              2 ** 24)).count(b'\n')
+            with open(self.file_name) as f:
+                f.seek(fallback)
+                self._parse_lines(f, forgive)
+        return
+
+    def _scan_blocks(self, buf):
+        """
+        Find the groundwater and stream budget tables in buf.
+
+        Returns
+        -------
+        blocks : list
+            dictionaries with the time step information, budget items and
+            budget value strings of each table in file order.
+        fallback : int
+            byte position of the first table that does not have the
+            expected layout, or None.
+
+        """
+        blocks = []
+        pos = 0
+        for ipos in self._iter_keys(buf):
+            if ipos < pos:
+                continue
+            bpos = buf.rfind(b'\n', 0, ipos) + 1
+            line, pos = self._getline(buf, bpos)
+            if self.gw_budget_key in line:
+                block, pos = self._scan_gw(buf, bpos)
+            else:
+                block, pos = self._scan_sw(buf, bpos)
+            if block is None:
+                return blocks, bpos
+            block['pos'] = bpos
+            blocks.append(block)
+        return blocks, None
+
+    def _iter_keys(self, buf, chunksize=2 ** 24):
+        """
+        Generate the sorted positions of the groundwater and stream budget
+        keys in buf.  buf is lower cased in chunks so the keys can be found
+        with a plain substring search.
+
+        """
+        keys = [self.gw_budget_key.encode('ascii'),
+                self.sw_budget_key.encode('ascii')]
+        overlap = max([len(key) for key in keys]) - 1
+        n = len(buf)
+        i0 = 0
+        while i0 < n:
+            i1 = min(i0 + chunksize, n)
+            chunk = buf[i0:i1 + overlap].lower()
+            found = []
+            for key in keys:
+                i = chunk.find(key)
+                while 0 <= i < i1 - i0:
+                    found.append(i0 + i)
+                    i = chunk.find(key, i + 1)
+            for ipos in sorted(found):
+                yield ipos
+            i0 = i1
+
+    @staticmethod
+    def _getline(buf, pos):
+        n = len(buf)
+        if pos >= n:
+            return None, n
+        eol = buf.find(b'\n', pos)
+        if eol < 0:
+            eol = n - 1
+        line = buf[pos:eol + 1].decode('ascii', 'replace')
+        return line.replace('\r\n', '\n').lower(), eol + 1
+
+    def _getlines(self, buf, pos, n):
+        lines = []
+        for _ in range(n):
+            line, pos = self._getline(buf, pos)
+            if line is None:
+                raise EOFError
+            lines.append(line)
+        return lines, pos
+
+    def _getlines_until(self, buf, pos, term):
+        lines = []
+        while True:
+            line, pos = self._getline(buf, pos)
+            if line is None:
+                raise EOFError
+            elif term in line:
+                return lines, pos
+            lines.append(line)
+
+    _gw_line = re.compile(
+        r'^([^:\n]*):[^\S\n]*([^\s:]+)[^\S\n]+([^\s:]+)', re.MULTILINE)
+    _sw_line = re.compile(
+        r'^[^\S\n]*([^=\n]*)=[^\S\n]*([^\s=]+)[^=\n]*=([^=\n]*).*$',
+        re.MULTILINE)
+
+    def _scan_gw(self, buf, pos):
+        try:
+            lines, pos = self._getlines(buf, pos, 11)
+            comp = int(lines[0].strip().split()[-1][:2])
+            totim = float(lines[7].split()[-2])
+            line = lines[10]
+            kper = int(line[-6:-1])
+            kstp = int(line[-26:-21])
+            tkstp = int(line[-42:-37])
+            lines, pos = self._getlines(buf, pos, 4)
+            lines, pos = self._getlines_until(buf, pos, '-----')
+        except Exception:
+            return None, pos
+        items = self._gw_line.findall(''.join(lines))
+        if len(items) != len(lines):
+            return None, pos
+        block = {'kind': 'gw', 'comp': comp,
+                 'header': [totim, kper, kstp, tkstp],
+                 'items': [item.strip().replace(' ', '_')
+                           for item, ival, oval in items],
+                 'values': [v for item, ival, oval in items
+                            for v in (ival, oval)]}
+        return block, pos
+
+    def _scan_sw(self, buf, pos):
+        try:
+            line, pos = self._getline(buf, pos)
+            comp = int(line[-5:-1])
+            kper = int(line[-24:-19])
+            kstp = int(line[-44:-39])
+            tkstp = int(line[-60:-55])
+            lines, pos = self._getlines(buf, pos, 4)
+            inlines, pos = self._getlines_until(buf, pos, '------')
+            lines, pos = self._getlines(buf, pos, 2)
+            outlines, pos = self._getlines_until(buf, pos, '------')
+            lines, pos = self._getlines(buf, pos, 1)
+        except Exception:
+            return None, pos
+        items = []
+        for lines, tag in zip([inlines, outlines], ['in', 'out']):
+            litems = self._sw_line.findall(
+                ''.join([line.strip() + '\n' for line in lines]))
+            if len(litems) != len(lines):
+                return None, pos
+            items += [(citem, cval, fval, tag)
+                      for citem, cval, fval in litems]
+        block = {'kind': 'sw', 'comp': comp,
+                 'header': [kper, kstp, tkstp],
+                 'items': [(citem.strip().replace(' ', '_'), tag)
+                           for citem, cval, fval, tag in items],
+                 'values': [v for citem, cval, fval, tag in items
+                            for v in (cval, fval.strip())]}
+        return block, pos
+
+    def _add_gw(self, block, values):
+        comp = block['comp']
+        for lab, val in zip(["totim", "kper", "kstp", "tkstp"],
+                            block['header']):
+            lab += '_{0}'.format(comp)
+            if lab not in self.gw_data.keys():
+                self.gw_data[lab] = []
+            self.gw_data[lab].append(val)
+        for i, item in enumerate(block['items']):
+            item += "_{0}".format(comp)
+            ival, oval = values[2 * i], -1.0 * values[2 * i + 1]
+            for lab, val in zip(["_in", "_out"], [ival, oval]):
+                iitem = item + lab + "_cum"
+                if iitem not in self.gw_data.keys():
+                    self.gw_data[iitem] = []
+                self.gw_data[iitem].append(val)
+
+    def _add_sw(self, block, values):
+        comp = block['comp']
+        labs = [lab + '_{0}'.format(comp) for lab in ["kper", "kstp", "tkstp"]]
+        # _parse_sw fails for these tables, so leave them to _parse_lines
+        for lab in labs:
+            if lab in self.gw_data.keys() and lab not in self.sw_data.keys():
+                return False
+        for lab, val in zip(labs, block['header']):
+            if lab not in self.gw_data.keys():
+                self.sw_data[lab] = []
+            self.sw_data[lab].append(val)
+        for i, (item, tag) in enumerate(block['items']):
+            item += '_{0}_{1}'.format(comp, tag)
+            for lab, val in zip(['_cum', '_flx'],
+                                [values[2 * i], values[2 * i + 1]]):
+                iitem = item + lab
+                if iitem not in self.sw_data.keys():
+                    self.sw_data[iitem] = []
+                self.sw_data[iitem].append(val)
+        return True
+
     def _diff(self, df):
         try:
             import pandas as pd
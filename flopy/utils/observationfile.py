@@ -1,4 +1,5 @@
 
+import os
 import numpy as np
 
 from ..utils.utils_def import FlopyBinaryData
@@ -6,6 +7,11 @@ from ..utils.utils_def import FlopyBinaryData
 class ObsFiles(FlopyBinaryData):
     def __init__(self):
         super(ObsFiles, self).__init__()
+        self.lazy = False
+        self.data = None
+        self._mmdata = None
+        self._csvrows = None
+        self._totim = None
         return
 
     def get_times(self):
@@ -18,7 +24,7 @@ class ObsFiles(FlopyBinaryData):
             List contains unique simulation times (totim) in binary file.
 
         """
-        return self.data['totim'].reshape(self.get_ntimes()).tolist()
+        return self._get_totim().tolist()
 
     def get_ntimes(self):
         """
@@ -30,7 +36,7 @@ class ObsFiles(FlopyBinaryData):
             The number of simulation times (totim) in binary file.
 
         """
-        return self.data['totim'].shape[0]
+        return self._get_totim().shape[0]
 
     def get_nobs(self):
         """
@@ -57,7 +63,7 @@ class ObsFiles(FlopyBinaryData):
             included in the list of observation names.
 
         """
-        return list(self.data.dtype.names[1:])
+        return list(self.dtype.names[1:])
 
     def get_data(self, idx=None, obsname=None, totim=None):
         """
@@ -69,9 +75,10 @@ class ObsFiles(FlopyBinaryData):
             The zero-based record number.  The first record is record 0.
             If idx is None and totim are None, data for all simulation times
             are returned. (default is None)
-        obsname : string
-            The name of the observation to return. If obsname is None, all
-            observation data are returned. (default is None)
+        obsname : string or list of strings
+            The name of the observation or observations to return. If
+            obsname is None, all observation data are returned.
+            (default is None)
         totim : float
             The simulation time to return. If idx is None and totim are None,
             data for all simulation times are returned. (default is None)
@@ -80,7 +87,9 @@ class ObsFiles(FlopyBinaryData):
         ----------
         data : numpy record array
             Array has size (ntimes, nitems). totim is always returned. nitems
-            is 2 if idx or obsname is not None or nobs+1.
+            is 2 if idx or obsname is not None or nobs+1. If the file was
+            opened with lazy=True, only the requested observations and
+            times are read from the file.
 
         See Also
         --------
@@ -96,29 +105,11 @@ class ObsFiles(FlopyBinaryData):
         >>> ts = hyd.get_data()
 
         """
-        i0 = 0
-        i1 = self.data.shape[0]
-        if totim is not None:
-            idx = np.where(self.data['totim'] == totim)[0][0]
-            i0 = idx
-            i1 = idx + 1
-        elif idx is not None:
-            if idx < i1:
-                i0 = idx
-            i1 = i0 + 1
+        i0, i1 = self._get_time_range(idx=idx, totim=totim)
         r = None
-        if obsname is None:
-            obsname = self.get_obsnames()
-        else:
-            if obsname is not None:
-                if obsname not in self.data.dtype.names:
-                    obsname = None
-                else:
-                    if not isinstance(obsname, list):
-                        obsname = [obsname]
+        obsname = self._get_obsname_list(obsname)
         if obsname is not None:
-            obsname.insert(0, 'totim')
-            r = get_selection(self.data, obsname)[i0:i1]
+            r = self._get_selection(obsname, i0, i1)
         return r
 
     def get_dataframe(self, start_datetime='1-1-1970',
@@ -174,57 +165,112 @@ class ObsFiles(FlopyBinaryData):
             msg = "ObsFiles.get_dataframe() error import pandas: " + str(e)
             raise ImportError(msg)
 
+        i0, i1 = self._get_time_range(idx=idx, totim=totim)
+        obsname = self._get_obsname_list(obsname)
+        if obsname is None:
+            return None
+
+        dti = self.get_times()[i0:i1]
+        if start_datetime is not None:
+            dti = totim_to_datetime(dti,
+                                    start=pd.to_datetime(start_datetime),
+                                    timeunit=timeunit)
+
+        df = pd.DataFrame(self._get_selection(obsname, i0, i1), index=dti,
+                          columns=obsname)
+        return df
+
+    def _get_time_range(self, idx=None, totim=None):
+        """
+        Return the first and last + 1 record numbers for idx or totim.
+
+        """
         i0 = 0
-        i1 = self.data.shape[0]
+        i1 = self.get_ntimes()
         if totim is not None:
-            idx = np.where(self.data['totim'] == totim)[0][0]
+            idx = np.where(self._get_totim() == totim)[0][0]
             i0 = idx
             i1 = idx + 1
         elif idx is not None:
             if idx < i1:
                 i0 = idx
             i1 = i0 + 1
+        return i0, i1
+
+    def _get_obsname_list(self, obsname):
+        """
+        Return totim and the observation names in obsname as a list, or
+        None if any of the names is not in the file.
 
+        """
         if obsname is None:
             obsname = self.get_obsnames()
         else:
-            if obsname is not None:
-                if obsname not in self.data.dtype.names:
-                    obsname = None
-                else:
-                    if not isinstance(obsname, list):
-                        obsname = [obsname]
-        if obsname is None:
-            return None
+            if not isinstance(obsname, list):
+                obsname = [obsname]
+            for name in obsname:
+                if name not in self.dtype.names:
+                    return None
+        return ['totim'] + [name for name in obsname if name != 'totim']
+
+    def _get_totim(self):
+        """
+        Return the simulation times.  For files opened with lazy=True only
+        the totim column is read, the first time it is needed.
 
-        obsname.insert(0, 'totim')
+        """
+        if self.data is not None:
+            return self.data['totim']
+        if self._totim is None:
+            self._totim = self._get_selection(['totim'], 0, None)['totim']
+        return self._totim
 
-        dti = self.get_times()[i0:i1]
-        if start_datetime is not None:
-            dti = totim_to_datetime(dti,
-                                    start=pd.to_datetime(start_datetime),
-                                    timeunit=timeunit)
+    def _get_selection(self, names, i0, i1):
+        """
+        Return the columns in names for records i0 to i1.  Data loaded in
+        memory are returned as a view.  For files opened with lazy=True
+        only the requested columns and records are read.
 
-        df = pd.DataFrame(self.data[i0:i1], index=dti, columns=obsname)
-        return df
+        """
+        if self.data is not None:
+            return get_selection(self.data, names)[i0:i1]
+        dtype = np.dtype([(name, self.dtype[name]) for name in names])
+        if self._mmdata is not None:
+            # strided read of each column from the memory-mapped file
+            mmdata = self._mmdata[i0:i1]
+            r = np.empty(mmdata.shape[0], dtype=dtype)
+            for name in names:
+                r[name] = mmdata[name]
+        else:
+            starts, ends = self._csvrows
+            columns = [self.dtype.names.index(name) for name in names]
+            values = _read_csv_columns(self.file.name, starts[i0:i1],
+                                       ends[i0:i1], len(self.dtype.names),
+                                       columns)
+            r = np.empty(values.shape[0], dtype=dtype)
+            for j, name in enumerate(names):
+                r[name] = values[:, j]
+        return r
 
     def _read_data(self):
 
-        if self.data is not None:
+        if self.data is not None or self._mmdata is not None:
             return
 
-        while True:
-            try:
-                r = self.read_record(count=1)
-                if self.data is None:
-                    self.data = r.copy()
-                elif r.size == 0:
-                    break
-                else:
-                    # should be hstack based on (https://mail.scipy.org/pipermail/numpy-discussion/2010-June/051107.html)
-                    self.data = np.hstack((self.data, r))
-            except:
-                break
+        if self.lazy:
+            # memory-map the records; data are only read when requested
+            offset = self.file.tell()
+            nbytes = os.path.getsize(self.file.name) - offset
+            nrec = nbytes // self.dtype.itemsize
+            if nrec > 0:
+                self._mmdata = np.memmap(self.file.name, dtype=self.dtype,
+                                         mode='r', offset=offset,
+                                         shape=(nrec,))
+            else:
+                self._mmdata = np.zeros(0, dtype=self.dtype)
+        else:
+            # read all of the complete records
+            self.data = self.read_record(count=-1)
         return
 
     def _build_dtype(self):
@@ -255,8 +301,14 @@ class Mf6Obs(ObsFiles):
     verbose : boolean
         If true, print additional information to to the screen during the
         extraction.  (default is False)
-    hydlbl_len : int
-        Length of hydmod labels. (default is 20)
+    isBinary : boolean
+        If true the observation file is binary, otherwise it is a comma
+        separated ascii file. (default is True)
+    lazy : boolean
+        If true, observation data are not loaded when the file is opened.
+        Binary files are memory-mapped and the rows of ascii files are
+        indexed, and get_data and get_dataframe only read and parse the
+        requested observations and times. (default is False)
 
     Returns
     -------
@@ -264,7 +316,7 @@ class Mf6Obs(ObsFiles):
 
     """
 
-    def __init__(self, filename, verbose=False, isBinary=True):
+    def __init__(self, filename, verbose=False, isBinary=True, lazy=False):
         """
         Class constructor.
 
@@ -272,6 +324,7 @@ class Mf6Obs(ObsFiles):
         super(Mf6Obs, self).__init__()
         # initialize class information
         self.verbose = verbose
+        self.lazy = lazy
         if isBinary:
             # --open binary head file
             self.file = open(filename, 'rb')
@@ -331,7 +384,12 @@ class Mf6Obs(ObsFiles):
             self._build_index()
 
             # read ascii data
-            self.data = np.loadtxt(self.file, dtype=self.dtype, delimiter=',')
+            self.data = None
+            if self.lazy:
+                self._csvrows = _get_csv_rows(filename)
+            else:
+                self.data = np.loadtxt(self.file, dtype=self.dtype,
+                                       delimiter=',')
         return
 
 
@@ -365,6 +423,10 @@ class HydmodObs(ObsFiles):
         extraction.  (default is False)
     hydlbl_len : int
         Length of hydmod labels. (default is 20)
+    lazy : boolean
+        If true, the file is memory-mapped when it is opened, and
+        get_data and get_dataframe only read the requested observations
+        and times. (default is False)
 
     Returns
     -------
@@ -372,7 +434,7 @@ class HydmodObs(ObsFiles):
 
     """
 
-    def __init__(self, filename, verbose=False, hydlbl_len=20):
+    def __init__(self, filename, verbose=False, hydlbl_len=20, lazy=False):
         """
         Class constructor.
 
@@ -380,6 +442,7 @@ class HydmodObs(ObsFiles):
         super(HydmodObs, self).__init__()
         # initialize class information
         self.verbose = verbose
+        self.lazy = lazy
         # --open binary head file
         self.file = open(filename, 'rb')
         # NHYDTOT,ITMUNI
@@ -442,6 +505,10 @@ class SwrObs(ObsFiles):
         'single' or 'double'.  Default is 'double'.
     verbose : bool
         Write information to the screen.  Default is False.
+    lazy : bool
+        If true, the file is memory-mapped when it is opened, and
+        get_data and get_dataframe only read the requested observations
+        and times.  Default is False.
 
     Attributes
     ----------
@@ -463,7 +530,8 @@ class SwrObs(ObsFiles):
 
     """
 
-    def __init__(self, filename, precision='double', verbose=False):
+    def __init__(self, filename, precision='double', verbose=False,
+                 lazy=False):
         """
         Class constructor.
 
@@ -472,6 +540,7 @@ class SwrObs(ObsFiles):
         self.set_float(precision=precision)
         # initialize class information
         self.verbose = verbose
+        self.lazy = lazy
         # open binary head file
         self.file = open(filename, 'rb')
 
@@ -536,3 +605,129 @@ def get_selection(data, names):
     # Valid list of names so make a selection
     dtype2 = np.dtype({name: data.dtype.fields[name] for name in names})
     return np.ndarray(data.shape, dtype2, data, 0, data.strides)
+
+
+def _get_csv_rows(filename, blocksize=2**25):
+    """
+    Find the data rows of a comma separated observation file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file.  The first line is the header.
+    blocksize : int
+        Number of bytes searched for line ends at a time.
+
+    Returns
+    -------
+    starts, ends : numpy arrays
+        Byte position of the start and end (excluding the line end) of each
+        non-empty data row.
+
+    """
+    with open(filename, 'rb') as f:
+        start = len(f.readline())
+    nbytes = os.path.getsize(filename)
+    starts = np.array([start], dtype=np.int64)
+    ends = np.array([nbytes], dtype=np.int64)
+    if nbytes > start:
+        buf = np.memmap(filename, dtype=np.uint8, mode='r')
+        newlines = [np.array([], dtype=np.int64)]
+        for i0 in range(start, nbytes, blocksize):
+            block = np.asarray(buf[i0:i0 + blocksize])
+            newlines.append(np.flatnonzero(block == ord('\n')) + i0)
+        newlines = np.concatenate(newlines)
+        starts = np.append(start, newlines + 1)
+        ends = np.append(newlines, nbytes)
+
+        # exclude carriage returns from the rows
+        cr = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == ord('\r'))
+        ends[cr] -= 1
+        del buf
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+
+def _read_csv_columns(filename, starts, ends, ncol, columns,
+                      blocksize=2**25, maxfields=2**19):
+    """
+    Parse selected columns of rows of a comma separated observation file.
+    Field boundaries are found from the comma positions of blocks of rows
+    and the selected fields are converted to floats with a single numpy
+    cast, so only the requested columns are converted.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file.
+    starts, ends : numpy arrays
+        Byte position of the start and end of each row (see _get_csv_rows).
+    ncol : int
+        Number of columns in each row.
+    columns : list of ints
+        Zero-based columns to parse.
+    blocksize : int
+        Maximum number of bytes parsed at a time.
+    maxfields : int
+        Maximum number of fields converted at a time.
+
+    Returns
+    -------
+    values : numpy array
+        Array of shape (len(starts), len(columns)).
+
+    """
+    nrow = starts.shape[0]
+    values = np.empty((nrow, len(columns)), dtype=np.float64)
+    if nrow < 1 or len(columns) < 1:
+        return values
+    buf = np.memmap(filename, dtype=np.uint8, mode='r')
+    maxrows = max(maxfields // len(columns), 1)
+    row = 0
+    while row < nrow:
+        last = np.searchsorted(starts, starts[row] + blocksize, side='left')
+        last = min(max(last, row + 1), row + maxrows, nrow)
+        b0 = starts[row]
+        chunk = np.asarray(buf[b0:ends[last - 1]])
+        values[row:last] = _parse_csv_block(chunk, starts[row:last] - b0,
+                                            ends[row:last] - b0, ncol,
+                                            columns)
+        row = last
+    del buf
+    return values
+
+
+def _parse_csv_block(chunk, starts, ends, ncol, columns):
+    """
+    Parse selected columns of a block of rows of a comma separated file.
+
+    """
+    nrow = starts.shape[0]
+    commas = np.flatnonzero(chunk == ord(','))
+    if commas.shape[0] == nrow * (ncol - 1):
+        commas = commas.reshape(nrow, ncol - 1)
+    if commas.ndim < 2 or (ncol > 1 and
+                           (np.any(commas[:, 0] < starts) or
+                            np.any(commas[:, -1] >= ends))):
+        # rows with a different number of columns
+        values = np.empty((nrow, len(columns)), dtype=np.float64)
+        for i in range(nrow):
+            line = chunk[starts[i]:ends[i]].tobytes().split(b',')
+            values[i] = [float(line[c]) for c in columns]
+        return values
+
+    # start and end of each field
+    fstart = np.empty((nrow, len(columns)), dtype=np.int64)
+    fend = np.empty((nrow, len(columns)), dtype=np.int64)
+    for j, c in enumerate(columns):
+        fstart[:, j] = starts if c == 0 else commas[:, c - 1] + 1
+        fend[:, j] = ends if c == ncol - 1 else commas[:, c]
+    width = max(int((fend - fstart).max()), 1)
+
+    # gather the fields into fixed width strings, padded with blanks
+    pos = fstart[:, :, None] + np.arange(width)
+    chars = chunk[np.minimum(pos, chunk.shape[0] - 1)]
+    chars[pos >= fend[:, :, None]] = ord(' ')
+    chars[chars == ord('\r')] = ord(' ')
+    fields = chars.reshape(-1).view('S{}'.format(width))
+    return fields.astype(np.float64).reshape(nrow, len(columns))
@@ -93,6 +93,9 @@ class SwrFile(FlopyBinaryData):
         # initialize itemlist and nentries for qaq data
         self.nentries = {}
 
+        # the file is memory-mapped when a time series is first requested
+        self._mmap = None
+
         self.datastart = self.file.tell()
 
         # build index
@@ -265,9 +268,10 @@ class SwrFile(FlopyBinaryData):
 
         Parameters
         ----------
-        irec : int
+        irec : int or list of ints
             is the zero-based reach (stage, qm, qaq) or reach group number
-            (budget) to retrieve. (default is 0)
+            (budget) to retrieve. If irec is a list, the time series for
+            all of the reaches are extracted at once. (default is 0)
         iconn : int
             is the zero-based connection number for reach (irch) to retrieve
             qm data. iconn is only used if qm data is being read.
@@ -287,7 +291,7 @@ class SwrFile(FlopyBinaryData):
             Array has size (ntimes, nitems).  The first column in the
             data array will contain time (totim). nitems is 2 for stage
             data, 15 for budget data, 3 for qm data, and 11 for qaq
-            data.
+            data. If irec is a list, the array has shape (ntimes, nirec).
 
         See Also
         --------
@@ -297,26 +301,35 @@ class SwrFile(FlopyBinaryData):
 
         The irec, iconn, and klay values must be zero-based.
 
+        The time series are gathered from the memory-mapped file using the
+        position of each record saved when the file is indexed, so only
+        the requested records are read.
+
         Examples
         --------
 
         """
 
-        if irec + 1 > self.nrecord:
-            err = 'Error: specified irec ({}) '.format(irec) + \
-                  'exceeds the total number of records ()'.format(self.nrecord)
-            raise Exception(err)
+        ireclist = np.atleast_1d(np.array(irec, dtype=np.int64))
+        for ir in ireclist:
+            if ir + 1 > self.nrecord:
+                err = 'Error: specified irec ({}) '.format(ir) + \
+                      'exceeds the total number of records ' + \
+                      '({})'.format(self.nrecord)
+                raise Exception(err)
 
         gage_record = None
         if self.type == 'stage' or self.type == 'budget':
-            gage_record = self._get_ts(irec=irec)
+            gage_record = self._get_ts(irec=ireclist)
         elif self.type == 'flow':
-            gage_record = self._get_ts_qm(irec=irec, iconn=iconn)
+            gage_record = self._get_ts_qm(irec=ireclist, iconn=iconn)
         elif self.type == 'exchange':
-            gage_record = self._get_ts_qaq(irec=irec, klay=klay)
+            gage_record = self._get_ts_qaq(irec=ireclist, klay=klay)
         elif self.type == 'structure':
-            gage_record = self._get_ts_structure(irec=irec, istr=istr)
+            gage_record = self._get_ts_structure(irec=ireclist, istr=istr)
 
+        if np.ndim(irec) == 0:
+            gage_record = gage_record[:, 0]
         return gage_record
 
     def _read_connectivity(self):
@@ -371,16 +384,14 @@ class SwrFile(FlopyBinaryData):
     def _read_header(self):
         nitems = 0
         if self.type == 'exchange' or self.type == 'structure':
-            itemlist = np.zeros(self.nrecord, np.int)
-            try:
-                for i in range(self.nrecord):
-                    itemlist[i] = self.read_integer()
-                    nitems += itemlist[i]
-                self.nitems = nitems
-            except:
+            itemlist = self._read_values(self.integer, self.nrecord)
+            if itemlist.shape[0] < self.nrecord:
                 if self.verbose:
                     sys.stdout.write('\nCould not read itemlist')
                 return 0.0, 0.0, 0, 0, 0, False
+            itemlist = itemlist.astype(np.int)
+            nitems = itemlist.sum()
+            self.nitems = nitems
         try:
             totim = self.read_real()
             dt = self.read_real()
@@ -395,106 +406,135 @@ class SwrFile(FlopyBinaryData):
 
     def _get_ts(self, irec=0):
 
-        # create array
-        gage_record = np.zeros(self._ntimes, dtype=self.out_dtype)
-
-        # iterate through the record dictionary
-        idx = 0
-        for key, value in self.recorddict.items():
-            totim = np.array(key)
-            gage_record['totim'][idx] = totim
+        # records are in reach order in every time step
+        ipos, itimes = self._get_ts_index()
+        irec = np.atleast_1d(irec)
+        r = self._get_step_records(ipos, irec)
+        return self._build_ts(r, np.ones(r.shape, dtype=bool), itimes)
 
-            self.file.seek(value)
-            r = self._get_data()
-            for name in r.dtype.names:
-                gage_record[name][idx] = r[name][irec]
-            idx += 1
+    def _get_ts_qm(self, irec=0, iconn=0):
 
-        return gage_record.view(dtype=self.out_dtype)
+        # find correct entry for reach and connection
+        ipos, itimes = self._get_ts_index()
+        irec = np.atleast_1d(irec)
+        entry = np.full(irec.shape[0], -1, dtype=np.int64)
+        for j, ir in enumerate(irec):
+            i = np.where((self.connectivity[:, 1] == ir) &
+                         (self.connectivity[:, 2] == iconn))[0]
+            if i.shape[0] > 0:
+                entry[j] = i[0]
+        r = self._get_step_records(ipos, np.where(entry < 0, 0, entry))
+        valid = np.repeat(entry[None, :] >= 0, r.shape[0], axis=0)
+        return self._build_ts(r, valid, itimes)
 
-    def _get_ts_qm(self, irec=0, iconn=0):
+    def _get_ts_qaq(self, irec=0, klay=0):
 
-        # create array
-        gage_record = np.zeros(self._ntimes, dtype=self.out_dtype)
+        # find correct entry for record and layer, layers are read from the
+        # entries of each reach
+        ipos, itimes = self._get_ts_index()
+        irec = np.atleast_1d(irec)
+        itemlists = self._itemlists[itimes]
+        first = np.cumsum(itemlists, axis=1) - itemlists
+        offsets = np.full((ipos.shape[0], irec.shape[0]), -1, dtype=np.int64)
+        found = np.zeros(offsets.shape, dtype=bool)
+        layer_offset = self.dtype.fields['layer'][1]
+        for i in range(itemlists[:, irec].max() if ipos.shape[0] > 0
+                       else 0):
+            valid = ~found & (i < itemlists[:, irec])
+            pos = ipos[:, None] + (first[:, irec] + i) * self.dtype.itemsize
+            layer = self._gather(np.where(valid, pos, -1) + layer_offset,
+                                 np.dtype('i4'))
+            match = valid & (layer - 1 == klay)
+            offsets[match] = pos[match]
+            found |= match
+        gage_record = self._build_ts(self._gather(offsets, self.dtype),
+                                     found, itimes)
+        gage_record['layer'] -= np.where(found, 1, 0)
+        gage_record['reach'] = np.where(found, irec[None, :], 0)
+        return gage_record
 
-        # iterate through the record dictionary
-        idx = 0
-        for key, value in self.recorddict.items():
-            totim = key
-            gage_record['totim'][idx] = totim
-
-            self.file.seek(value)
-            r = self._get_data()
-
-            # find correct entry for reach and connection
-            for i in range(self.nrecord):
-                inode = self.connectivity[i, 1]
-                ic = self.connectivity[i, 2]
-                if irec == inode and ic == iconn:
-                    for name in r.dtype.names:
-                        gage_record[name][idx] = r[name][i]
-                    break
-            idx += 1
+    def _get_ts_structure(self, irec=0, istr=0):
 
-        return gage_record.view(dtype=self.out_dtype)
+        # find correct entry for record and structure number
+        ipos, itimes = self._get_ts_index()
+        irec = np.atleast_1d(irec)
+        itemlists = self._itemlists[itimes]
+        first = np.cumsum(itemlists, axis=1) - itemlists
+        found = istr < itemlists[:, irec]
+        offsets = ipos[:, None] + (first[:, irec] + istr) * \
+                  self.dtype.itemsize
+        offsets[~found] = -1
+        gage_record = self._build_ts(self._gather(offsets, self.dtype),
+                                     found, itimes)
+        gage_record['reach'] = np.where(found, irec[None, :], 0)
+        gage_record['structure'] = np.where(found, istr, 0)
+        return gage_record
 
-    def _get_ts_qaq(self, irec=0, klay=0):
+    def _get_ts_index(self):
+        """
+        Return the position of the data and the time index of each entry in
+        recorddict, in recorddict order.
 
-        # create array
-        gage_record = np.zeros(self._ntimes, dtype=self.out_dtype)
+        """
+        ipos = np.array(list(self.recorddict.values()), dtype=np.int64)
+        itimes = np.searchsorted(self._iposarray, ipos)
+        return ipos, itimes
 
-        # iterate through the record dictionary
-        idx = 0
-        for key, value in self.recorddict.items():
-            totim = key
-            gage_record['totim'][idx] = totim
-
-            self.nitems, self.itemlist = self.nentries[key]
-
-            self.file.seek(value)
-            r = self._get_data()
-
-            # find correct entry for record and layer
-            ilen = np.shape(r)[0]
-            for i in range(ilen):
-                ir = r['reach'][i]
-                il = r['layer'][i]
-                if ir == irec and il == klay:
-                    for name in r.dtype.names:
-                        gage_record[name][idx] = r[name][i]
-                    break
-            idx += 1
+    def _build_ts(self, records, valid, itimes):
+        """
+        Build time series from records, an array of shape (ntimes, nirec).
+        Entries that are not valid are zero.
 
+        """
+        gage_record = np.zeros((self._ntimes, records.shape[1]),
+                               dtype=self.out_dtype)
+        nt = records.shape[0]
+        gage_record['totim'][:nt] = self._times[itimes][:, None]
+        for name in self.dtype.names:
+            gage_record[name][:nt] = np.where(valid, records[name], 0)
         return gage_record.view(dtype=self.out_dtype)
 
-    def _get_ts_structure(self, irec=0, istr=0):
+    def _get_step_records(self, ipos, irec):
+        """
+        Read records irec of the time steps that start at the byte positions
+        ipos.  Stage, budget and flow time steps hold nrecord records, so
+        when the time steps are evenly spaced the file is viewed as an array
+        of shape (ntimes, nrecord) and only the requested records are
+        copied.
 
-        # create array
-        gage_record = np.zeros(self._ntimes, dtype=self.out_dtype)
+        """
+        itemsize = self.dtype.itemsize
+        nbytes = self.nrecord * itemsize
+        nt = ipos.shape[0]
+        stride = np.unique(np.diff(ipos))
+        if nt > 0 and stride.shape[0] < 2 and \
+                (nt < 2 or stride[0] >= nbytes) and \
+                ipos[-1] + nbytes <= self._get_mmap().shape[0]:
+            step = stride[0] if nt > 1 else nbytes
+            r = np.ndarray(shape=(nt, self.nrecord), dtype=self.dtype,
+                           buffer=self._get_mmap(), offset=ipos[0],
+                           strides=(step, itemsize))
+            return r[:, irec]
+        offsets = ipos[:, None] + irec[None, :] * itemsize
+        return self._gather(offsets, self.dtype)
+
+    def _gather(self, offsets, dtype):
+        """
+        Read the values of dtype at the byte offsets in the file.  The
+        memory-mapped file is viewed as an array of dtype that starts at
+        every byte, so each value is copied with a single index.  Values at
+        negative offsets are undefined.
 
-        # iterate through the record dictionary
-        idx = 0
-        for key, value in self.recorddict.items():
-            totim = key
-            gage_record['totim'][idx] = totim
-
-            self.nitems, self.itemlist = self.nentries[key]
-
-            self.file.seek(value)
-            r = self._get_data()
-
-            # find correct entry for record and structure number
-            ilen = np.shape(r)[0]
-            for i in range(ilen):
-                ir = r['reach'][i]
-                il = r['structure'][i]
-                if ir == irec and il == istr:
-                    for name in r.dtype.names:
-                        gage_record[name][idx] = r[name][i]
-                    break
-            idx += 1
+        """
+        mm = self._get_mmap()
+        view = np.ndarray(shape=(mm.shape[0] - dtype.itemsize + 1,),
+                          dtype=dtype, buffer=mm, strides=(1,))
+        return view[np.where(offsets < 0, self.datastart, offsets)]
 
-        return gage_record.view(dtype=self.out_dtype)
+    def _get_mmap(self):
+        if self._mmap is None:
+            self._mmap = np.memmap(self.file.name, dtype=np.uint8, mode='r')
+        return self._mmap
 
     def _get_data(self):
         if self.type == 'exchange':
@@ -514,14 +554,8 @@ class SwrFile(FlopyBinaryData):
         r = np.zeros(self.nitems, dtype=self.qaq_dtype)
 
         # build array with reach numbers
-        reaches = np.zeros(self.nitems, dtype=np.int32)
-        idx = 0
-        for irch in range(self.nrecord):
-            klay = self.itemlist[irch]
-            for k in range(klay):
-                # r[idx, 0] = irch
-                reaches[idx] = irch
-                idx += 1
+        reaches = np.repeat(np.arange(self.nrecord, dtype=np.int32),
+                            self.itemlist)
 
         # add reach to array returned
         r['reach'] = reaches.copy()
@@ -539,16 +573,12 @@ class SwrFile(FlopyBinaryData):
         # add reach and structure number to structure data
         r = np.zeros(self.nitems, dtype=self.str_dtype)
 
-        # build array with reach numbers
-        reaches = np.zeros(self.nitems, dtype=np.int32)
-        struct = np.zeros(self.nitems, dtype=np.int32)
-        idx = 0
-        for irch in range(self.nrecord):
-            nstr = self.itemlist[irch]
-            for n in range(nstr):
-                reaches[idx] = irch
-                struct[idx] = n
-                idx += 1
+        # build array with reach and structure numbers
+        reaches = np.repeat(np.arange(self.nrecord, dtype=np.int32),
+                            self.itemlist)
+        first = np.cumsum(self.itemlist) - self.itemlist
+        struct = np.arange(self.nitems, dtype=np.int32) - \
+                 np.repeat(first, self.itemlist).astype(np.int32)
 
         # add reach to array returned
         r['reach'] = reaches.copy()
@@ -570,6 +600,8 @@ class SwrFile(FlopyBinaryData):
         self._ntimes = 0
         self._times = []
         self._kswrkstpkper = []
+        self._iposarray = []
+        self._itemlists = []
         self.recorddict = OrderedDict()
 
         idx = 0
@@ -602,6 +634,9 @@ class SwrFile(FlopyBinaryData):
                 header = (totim, kswr, kstp, kper)
                 self.recorddict[totim] = ipos
                 self._recordarray.append(header)
+                self._iposarray.append(ipos)
+                if self.type == 'exchange' or self.type == 'structure':
+                    self._itemlists.append(self.nentries[totim][1])
             else:
                 if self.verbose:
                     sys.stdout.write('\n')
@@ -609,6 +644,10 @@ class SwrFile(FlopyBinaryData):
                                              dtype=self.header_dtype)
                 self._times = np.array(self._times)
                 self._kswrkstpkper = np.array(self._kswrkstpkper)
+                self._iposarray = np.array(self._iposarray, dtype=np.int64)
+                self._itemlists = np.array(self._itemlists,
+                                           dtype=np.int64).reshape(
+                    -1, self.nrecord)
                 return
 
 
@@ -1,7 +1,10 @@
 import os
 import copy
 import numpy as np
+from multiprocessing.pool import ThreadPool
 from .binaryfile import CellBudgetFile
+from .datafile import ThreadLocalFile
+from .mfgrdfile import MfGrdFile
 from itertools import groupby
 from collections import OrderedDict
 from ..utils.utils_def import totim_to_datetime
@@ -17,7 +20,9 @@ class ZoneBudget(object):
         The file name or CellBudgetFile object for which budgets will be
         computed.
     z : ndarray
-        The array containing to zones to be used.
+        The array containing to zones to be used. When grb is specified,
+        z may have the shape of the user model grid, (nlay, nrow, ncol),
+        (nlay, ncpl) or (nodes,).
     kstpkper : tuple of ints
         A tuple containing the time step and stress period (kstp, kper).
         The kstp and kper values are zero based.
@@ -29,6 +34,18 @@ class ZoneBudget(object):
         When using this option in conjunction with a list of zones, the
         zone(s) passed may either be all strings (aliases), all integers,
         or mixed.
+    verbose : bool
+        Print the time step being processed. (Default is False.)
+    n_workers : int
+        Number of threads used to compute the budgets of the time steps.
+        Each thread reads the cell budget file with its own file handle
+        and writes its results directly into the budget record array.
+        (Default is 1.)
+    grb : str or MfGrdFile
+        MODFLOW 6 binary grid file. Required when the cell budget file
+        contains FLOW-JA-FACE records (MODFLOW 6 and unstructured grids).
+        Flows between zones are then computed from FLOW-JA-FACE using the
+        IA/JA connectivity in the binary grid file.
 
     Returns
     -------
@@ -42,10 +59,37 @@ class ZoneBudget(object):
     >>> zb = ZoneBudget('zonebudtest.cbc', zon, kstpkper=(0, 0))
     >>> zb.to_csv('zonebudtest.csv')
     >>> zb_mgd = zb * 7.48052 / 1000000
+    >>> zb_all = ZoneBudget('zonebudtest.cbc', zon, n_workers=4)
+    >>> cbc = CellBudgetFile('model.cbc', precision='double')
+    >>> zb6 = ZoneBudget(cbc, zon, grb='model.disv.grb')
     """
 
     def __init__(self, cbc_file, z, kstpkper=None, totim=None, aliases=None,
-                 verbose=False, **kwargs):
+                 verbose=False, n_workers=1, **kwargs):
+
+        self._setup(cbc_file, z, kstpkper=kstpkper, totim=totim,
+                    aliases=aliases, **kwargs)
+
+        # Update budget record array
+        _compute_budgets([self], n_workers=n_workers, verbose=verbose)
+
+        return
+
+    @classmethod
+    def _without_budgets(cls, cbc_file, z, kstpkper=None, totim=None,
+                         aliases=None, **kwargs):
+        """
+        Build a ZoneBudget with an empty budget record array, so that the
+        budgets of several zone arrays can be computed together.
+
+        """
+        zb = cls.__new__(cls)
+        zb._setup(cbc_file, z, kstpkper=kstpkper, totim=totim,
+                  aliases=aliases, **kwargs)
+        return zb
+
+    def _setup(self, cbc_file, z, kstpkper=None, totim=None, aliases=None,
+               **kwargs):
 
         if isinstance(cbc_file, CellBudgetFile):
             self.cbc = cbc_file
@@ -79,12 +123,41 @@ class ZoneBudget(object):
             self.sr = self.dis.parent.sr
         if 'sr' in kwargs.keys():
             self.sr = kwargs.pop('sr')
+        self.grb = None
+        if 'grb' in kwargs.keys():
+            self.grb = kwargs.pop('grb')
+            if not isinstance(self.grb, MfGrdFile):
+                self.grb = MfGrdFile(self.grb)
         if len(kwargs.keys()) > 0:
             args = ','.join(kwargs.keys())
             raise Exception('LayerFile error: unrecognized kwargs: ' + args)
 
+        # All record names in the cell-by-cell budget binary file
+        self.record_names = [n.strip() for n in
+                             self.cbc.get_unique_record_names(decode=True)]
+
         # Check the shape of the cbc budget file arrays
-        self.cbc_shape = self.cbc.get_data(idx=0, full3D=True)[0].shape
+        self.flowja_name = None
+        for name in ['FLOW-JA-FACE', 'FLOW JA FACE']:
+            if name in self.record_names:
+                self.flowja_name = name
+        if self.flowja_name is not None:
+            if self.grb is None:
+                raise Exception(
+                    'A MODFLOW 6 binary grid file (grb) is required to '
+                    'compute zone budgets from {} records.'.format(
+                        self.flowja_name))
+            shape = self.grb.get_shape()
+            if len(shape) == 1:
+                shape = (1, 1) + shape
+            elif len(shape) == 2:
+                shape = (shape[0], 1, shape[1])
+            self.cbc_shape = tuple(shape)
+            if z.size == np.prod(self.cbc_shape) or \
+                    z.size == self.cbc_shape[1] * self.cbc_shape[2]:
+                z = z.reshape((-1,) + self.cbc_shape[1:])
+        else:
+            self.cbc_shape = self.cbc.get_data(idx=0, full3D=True)[0].shape
         self.nlay, self.nrow, self.ncol = self.cbc_shape
         self.cbc_times = self.cbc.get_times()
         self.cbc_kstpkper = self.cbc.get_kstpkper()
@@ -94,24 +167,26 @@ class ZoneBudget(object):
         if kstpkper is not None:
             if isinstance(kstpkper, tuple):
                 kstpkper = [kstpkper]
+            cbc_kstpkper = set(self.cbc_kstpkper)
             for kk in kstpkper:
                 s = 'The specified time step/stress period ' \
                     'does not exist {}'.format(kk)
-                assert kk in self.cbc.get_kstpkper(), s
+                assert kk in cbc_kstpkper, s
             self.kstpkper = kstpkper
         elif totim is not None:
             if isinstance(totim, float):
                 totim = [totim]
             elif isinstance(totim, int):
                 totim = [float(totim)]
+            cbc_times = set(self.cbc_times)
             for t in totim:
                 s = 'The specified simulation time ' \
                     'does not exist {}'.format(t)
-                assert t in self.cbc.get_times(), s
+                assert t in cbc_times, s
             self.totim = totim
         else:
             # No time step/stress period or simulation time pass
-            self.kstpkper = self.cbc.get_kstpkper()
+            self.kstpkper = self.cbc_kstpkper
 
         # Set float and integer types
         self.float_type = np.float32
@@ -159,15 +234,20 @@ class ZoneBudget(object):
 
         self._iflow_recnames = self._get_internal_flow_record_names()
 
-        # All record names in the cell-by-cell budget binary file
-        self.record_names = [n.strip() for n in
-                             self.cbc.get_unique_record_names(decode=True)]
-
-        # Get imeth for each record in the CellBudgetFile record list
+        # Get imeth for each record in the CellBudgetFile record list and
+        # the position of the first record of each name in every time step
         self.imeth = {}
-        for record in self.cbc.recordarray:
-            self.imeth[record['text'].strip().decode("utf-8")] = record[
-                'imeth']
+        self._record_index = {}
+        recordarray = self.cbc.recordarray
+        for idx, (kstp, kper, t, text, imeth) in enumerate(zip(
+                recordarray['kstp'].tolist(), recordarray['kper'].tolist(),
+                recordarray['totim'].tolist(), recordarray['text'].tolist(),
+                recordarray['imeth'].tolist())):
+            text = text.strip().decode("utf-8")
+            self.imeth[text] = imeth
+            self._record_index.setdefault(((kstp - 1, kper - 1), text),
+                                          []).append(idx)
+            self._record_index.setdefault((t, text), []).append(idx)
 
         # INTERNAL FLOW TERMS ARE USED TO CALCULATE FLOW BETWEEN ZONES.
         # CONSTANT-HEAD TERMS ARE USED TO IDENTIFY WHERE CONSTANT-HEAD CELLS ARE AND THEN USE
@@ -177,6 +257,12 @@ class ZoneBudget(object):
                                'FLOW FRONT FACE', 'FLOW LOWER FACE',
                                'SWIADDTOCH', 'SWIADDTOFRF', 'SWIADDTOFFF',
                                'SWIADDTOFLF']
+        if self.flowja_name is not None:
+            # MODFLOW 6 writes constant-head flows as a boundary flow and
+            # DATA- records (specific discharge, saturation) are not flows
+            internal_flow_terms = [self.flowja_name] + \
+                                  [n for n in self.record_names
+                                   if n.startswith('DATA-')]
 
         # Source/sink/storage term record names
         # These are all of the terms that are not related to constant
@@ -185,34 +271,10 @@ class ZoneBudget(object):
                                   if n not in internal_flow_terms]
 
         # Initialize budget recordarray
-        array_list = []
-        if self.kstpkper is not None:
-            for kk in self.kstpkper:
-                recordarray = self._initialize_budget_recordarray(kstpkper=kk,
-                                                                  totim=None)
-                array_list.append(recordarray)
-        elif self.totim is not None:
-            for t in self.totim:
-                recordarray = self._initialize_budget_recordarray(
-                    kstpkper=None, totim=t)
-                array_list.append(recordarray)
-        self._budget = np.concatenate(array_list, axis=0)
-
-        # Update budget record array
-        if self.kstpkper is not None:
-            for kk in self.kstpkper:
-                if verbose:
-                    s = 'Computing the budget for' \
-                        ' time step {} in stress period {}'.format(kk[0] + 1,
-                                                                   kk[1] + 1)
-                    print(s)
-                self._compute_budget(kstpkper=kk)
-        elif self.totim is not None:
-            for t in self.totim:
-                if verbose:
-                    s = 'Computing the budget for time {}'.format(t)
-                    print(s)
-                self._compute_budget(totim=t)
+        self._budget_recnames = self._get_budget_recnames()
+        self._budget = self._initialize_budget_recordarray(
+            kstpkper=self.kstpkper, totim=self.totim)
+        self._set_budget_index()
 
         return
 
@@ -461,17 +523,104 @@ class ZoneBudget(object):
         result.cbc = self.cbc
         return result
 
-    def _compute_budget(self, kstpkper=None, totim=None):
+    def _get_record(self, text, kstpkper=None, totim=None, full3D=False,
+                    cache=None):
+        """
+        Get the first record with the specified name for a time step
+        without searching the cell budget file record array.
+
+        Parameters
+        ----------
+        text : str
+            Record name.
+        kstpkper : tuple
+            Tuple of kstp and kper (default is None).
+        totim : float
+            Totim (default is None).
+        full3D : boolean
+            Return the record as a full 3-D array. (Default is False.)
+        cache : dict
+            Records of the time step that have already been read, shared
+            by the zone budgets computed together. (Default is None.)
+
+        Returns
+        -------
+        record : ndarray, list, or None
+            Record returned by CellBudgetFile.get_record(), or None if the
+            record is not in the time step.
+
+        """
+        records = self._get_records(text, kstpkper, totim, full3D, cache)
+        if len(records) == 0:
+            return None
+        return records[0]
+
+    def _get_records(self, text, kstpkper=None, totim=None, full3D=False,
+                     cache=None):
+        """
+        Get all of the records with the specified name for a time step,
+        for example the records of several packages of the same type.
+
+        Parameters
+        ----------
+        text : str
+            Record name.
+        kstpkper : tuple
+            Tuple of kstp and kper (default is None).
+        totim : float
+            Totim (default is None).
+        full3D : boolean
+            Return the records as full 3-D arrays. (Default is False.)
+        cache : dict
+            Records of the time step that have already been read, shared
+            by the zone budgets computed together. (Default is None.)
+
+        Returns
+        -------
+        records : list
+            List of records returned by CellBudgetFile.get_record().
+
+        """
+        if kstpkper is not None:
+            key = (tuple(kstpkper), text)
+        else:
+            key = (totim, text)
+        records = []
+        for idx in self._record_index.get(key, []):
+            if cache is None:
+                records.append(self.cbc.get_record(idx, full3D=full3D))
+                continue
+            rec = cache.get((idx, full3D))
+            if rec is None:
+                rec = self.cbc.get_record(idx, full3D=full3D)
+                cache[(idx, full3D)] = rec
+            records.append(rec)
+        return records
+
+    def _compute_budget(self, kstpkper=None, totim=None, itime=None,
+                        cache=None):
         """
         Creates a budget for the specified zone array. This function only supports the
         use of a single time step/stress period or time.
 
+        Every face flow is encoded as an integer (from zone, to zone) key
+        and flows to and from constant-head cells as a (zone, direction)
+        key, so that all of the internal flow terms for the time step are
+        accumulated with a single call to np.bincount.
+
         Parameters
         ----------
         kstpkper : tuple
             Tuple of kstp and kper to compute budget for (default is None).
         totim : float
             Totim to compute budget for (default is None).
+        itime : int
+            Position of the time step in the list of requested time steps.
+            If None, it is looked up from kstpkper or totim.
+            (Default is None.)
+        cache : dict
+            Records of the time step that have already been read, shared
+            by the zone budgets computed together. (Default is None.)
 
         Returns
         -------
@@ -483,7 +632,8 @@ class ZoneBudget(object):
         ich = np.zeros(self.cbc_shape, self.int_type)
         swiich = np.zeros(self.cbc_shape, self.int_type)
 
-        if 'CONSTANT HEAD' in self.record_names:
+        if 'CONSTANT HEAD' in self.record_names and \
+                self.flowja_name is None:
             """
             C-----CONSTANT-HEAD FLOW -- DON'T ACCUMULATE THE CELL-BY-CELL VALUES FOR
             C-----CONSTANT-HEAD FLOW BECAUSE THEY MAY INCLUDE PARTIALLY CANCELING
@@ -491,34 +641,93 @@ class ZoneBudget(object):
             C-----HEAD CELLS ARE AND THEN USE FACE FLOWS TO DETERMINE THE AMOUNT OF
             C-----FLOW.  STORE CONSTANT-HEAD LOCATIONS IN ICH ARRAY.
             """
-            chd = self.cbc.get_data(text='CONSTANT HEAD', full3D=True,
-                                    kstpkper=kstpkper, totim=totim)[0]
-            ich[np.ma.where(chd != 0.)] = 1
-        if 'FLOW RIGHT FACE' in self.record_names:
-            self._accumulate_flow_frf('FLOW RIGHT FACE', ich, kstpkper, totim)
-        if 'FLOW FRONT FACE' in self.record_names:
-            self._accumulate_flow_fff('FLOW FRONT FACE', ich, kstpkper, totim)
-        if 'FLOW LOWER FACE' in self.record_names:
-            self._accumulate_flow_flf('FLOW LOWER FACE', ich, kstpkper, totim)
+            chd = self._get_record('CONSTANT HEAD', kstpkper, totim,
+                                   full3D=True, cache=cache)
+            if chd is not None:
+                ich[np.ma.where(chd != 0.)] = 1
         if 'SWIADDTOCH' in self.record_names:
-            swichd = self.cbc.get_data(text='SWIADDTOCH', full3D=True,
-                                       kstpkper=kstpkper, totim=totim)[0]
-            swiich[swichd != 0] = 1
-        if 'SWIADDTOFRF' in self.record_names:
-            self._accumulate_flow_frf('SWIADDTOFRF', swiich, kstpkper, totim)
-        if 'SWIADDTOFFF' in self.record_names:
-            self._accumulate_flow_fff('SWIADDTOFFF', swiich, kstpkper, totim)
-        if 'SWIADDTOFLF' in self.record_names:
-            self._accumulate_flow_flf('SWIADDTOFLF', swiich, kstpkper, totim)
+            swichd = self._get_record('SWIADDTOCH', kstpkper, totim,
+                                      full3D=True, cache=cache)
+            if swichd is not None:
+                swiich[swichd != 0] = 1
+
+        # INTERNAL FLOW TERMS: FACE FLOWS BETWEEN ZONES AND TO/FROM
+        # CONSTANT-HEAD CELLS
+        face_records = [('FLOW RIGHT FACE', ich, 2),
+                        ('FLOW FRONT FACE', ich, 1),
+                        ('FLOW LOWER FACE', ich, 0),
+                        ('SWIADDTOFRF', swiich, 2),
+                        ('SWIADDTOFFF', swiich, 1),
+                        ('SWIADDTOFLF', swiich, 0)]
+        keys = [np.array([], dtype=np.int64)]
+        fluxes = [np.array([], dtype=np.float64)]
+        if self.flowja_name is not None:
+            face_records = []
+            data = self._get_record(self.flowja_name, kstpkper, totim,
+                                    cache=cache)
+            if data is not None:
+                k, f = self.topology.get_connection_flow_keys(data)
+                keys.append(k)
+                fluxes.append(f)
+        for recname, ichx, axis in face_records:
+            if recname in self.record_names and self.cbc_shape[axis] >= 2:
+                data = self._get_record(recname, kstpkper, totim,
+                                        cache=cache)
+                if data is None:
+                    continue
+                k, f = self.topology.get_face_flow_keys(data, axis, ichx)
+                keys.append(k)
+                fluxes.append(f)
+        nzones = len(self.allzones)
+        q = np.bincount(np.concatenate(keys), weights=np.concatenate(fluxes),
+                        minlength=nzones * (nzones + 2))
+        zoneflow = q[:nzones * nzones].reshape(nzones, nzones)
+        chflow = q[nzones * nzones:].reshape(nzones, 2)
+
+        budget = np.zeros((len(self._budget_recnames),
+                           len(self._zone_cols)), np.float64)
+        rows = self._budget_rows
+        cols = self._zone_cols
+
+        # Flow from zone a to zone b is an inflow to zone b and an
+        # outflow from zone a
+        budget[self._iflow_from_rows] = zoneflow[self._iflow_zones][:, cols]
+        budget[self._iflow_to_rows] = zoneflow[:, self._iflow_zones][cols].T
+        if 'FROM_CONSTANT_HEAD' in rows:
+            budget[rows['FROM_CONSTANT_HEAD']] = chflow[cols, 0]
+            budget[rows['TO_CONSTANT_HEAD']] = chflow[cols, 1]
 
         # NOT AN INTERNAL FLOW TERM, SO MUST BE A SOURCE TERM OR STORAGE
         # ACCUMULATE THE FLOW BY ZONE
-        # iterate over remaining items in the list
         for recname in self.ssst_record_names:
-            self._accumulate_flow_ssst(recname, kstpkper, totim)
+            qin, qout = self._get_ssst_flows(recname, kstpkper, totim,
+                                             cache)
+            if qin is None:
+                continue
+            name = '_'.join(recname.split())
+            budget[rows['FROM_' + name]] += qin[cols]
+            budget[rows['TO_' + name]] += qout[cols]
 
         # Compute mass balance terms
-        self._compute_mass_balance(kstpkper, totim)
+        intot = budget[self._in_rows].sum(axis=0)
+        outtot = budget[self._out_rows].sum(axis=0)
+        budget[rows['TOTAL_IN']] = intot
+        budget[rows['TOTAL_OUT']] = outtot
+        budget[rows['IN-OUT']] = np.abs(intot - outtot)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            budget[rows['PERCENT_DISCREPANCY']] = np.abs(
+                100 * (intot - outtot) / ((intot + outtot) / 2.))
+
+        # Store the budget for this time step
+        if itime is None:
+            if kstpkper is not None:
+                itime = self.kstpkper.index(kstpkper)
+            else:
+                itime = self.totim.index(totim)
+        nrec = len(self._budget_recnames)
+        i0 = itime * nrec
+        for j, name in enumerate(self._zonenamedict.values()):
+            self._budget[name][i0:i0 + nrec] = budget[:, j]
 
         return
 
@@ -539,42 +748,34 @@ class ZoneBudget(object):
         iflow_recnames = np.array(list(iflow_recnames.items()), dtype=dtype)
         return iflow_recnames
 
-    def _add_empty_record(self, recordarray, recname, kstpkper=None,
-                          totim=None):
+    def _get_budget_recnames(self):
         """
-        Build an empty records based on the specified flow direction and
-        record name for the given list of zones.
-
-        Parameters
-        ----------
-        recordarray :
-        recname :
-        kstpkper : tuple
-            Tuple of kstp and kper to compute budget for (default is None).
-        totim : float
-            Totim to compute budget for (default is None).
+        Get the names of the budget records of a single time step.
 
         Returns
         -------
-        recordarray : np.recarray
+        recnames : list of strings
+            Budget record names in the order they are stored.
 
         """
-        if kstpkper is not None:
-            if len(self.cbc_times) > 0:
-                totim = self.cbc_times[self.cbc_kstpkper.index(kstpkper)]
+        recnames = []
+        for flowdir in ['FROM_', 'TO_']:
+            if 'STORAGE' in self.record_names:
+                recnames.append(flowdir + 'STORAGE')
+            if 'CONSTANT HEAD' in self.record_names and \
+                    'CONSTANT HEAD' not in self.ssst_record_names:
+                recnames.append(flowdir + 'CONSTANT_HEAD')
+            for recname in self.ssst_record_names:
+                if recname != 'STORAGE':
+                    recnames.append(flowdir + '_'.join(recname.split()))
+            for n in self._iflow_recnames['name']:
+                recnames.append(flowdir + '_'.join(n.split()))
+            if flowdir == 'FROM_':
+                recnames.append('TOTAL_IN')
             else:
-                totim = 0.
-        elif totim is not None:
-            if len(self.cbc_times) > 0:
-                kstpkper = self.cbc_kstpkper[self.cbc_times.index(totim)]
-            else:
-                kstpkper = (0, 0)
-
-        row = [totim, kstpkper[0], kstpkper[1], recname]
-        row += [0. for _ in self._zonenamedict.values()]
-        recs = np.array(tuple(row), dtype=recordarray.dtype)
-        recordarray = np.append(recordarray, recs)
-        return recordarray
+                recnames.append('TOTAL_OUT')
+        recnames += ['IN-OUT', 'PERCENT_DISCREPANCY']
+        return recnames
 
     def _initialize_budget_recordarray(self, kstpkper=None, totim=None):
         """
@@ -583,15 +784,26 @@ class ZoneBudget(object):
 
         Parameters
         ----------
-        kstpkper : tuple
-            Tuple of kstp and kper to compute budget for (default is None).
-        totim : float
-            Totim to compute budget for (default is None).
+        kstpkper : list of tuples
+            List of kstp and kper to compute budget for (default is None).
+        totim : list of floats
+            List of totim to compute budget for (default is None).
 
         Returns
         -------
+        recordarray : np.recarray
 
         """
+        if len(self.cbc_times) > 0:
+            times = dict(zip(self.cbc_kstpkper, self.cbc_times))
+            kstpkpers = dict(zip(self.cbc_times, self.cbc_kstpkper))
+        else:
+            times = {}
+            kstpkpers = {}
+        if kstpkper is not None:
+            totim = [times.get(kk, 0.) for kk in kstpkper]
+        elif totim is not None:
+            kstpkper = [kstpkpers.get(t, (0, 0)) for t in totim]
 
         # Create empty array for the budget terms.
         dtype_list = [('totim', '<f4'), ('time_step', '<i4'),
@@ -599,795 +811,133 @@ class ZoneBudget(object):
         dtype_list += [(n, self.float_type) for n in
                        self._zonenamedict.values()]
         dtype = np.dtype(dtype_list)
-        recordarray = np.array([], dtype=dtype)
-
-        # Add "from" records
-        if 'STORAGE' in self.record_names:
-            recordarray = self._add_empty_record(recordarray, 'FROM_STORAGE',
-                                                 kstpkper, totim)
-        if 'CONSTANT HEAD' in self.record_names:
-            recordarray = self._add_empty_record(recordarray,
-                                                 'FROM_CONSTANT_HEAD',
-                                                 kstpkper, totim)
-        for recname in self.ssst_record_names:
-            if recname != 'STORAGE':
-                recordarray = self._add_empty_record(recordarray,
-                                                     'FROM_' + '_'.join(
-                                                         recname.split()),
-                                                     kstpkper, totim)
-
-        for z, n in self._iflow_recnames:
-            if n == 0 and 0 not in self.allzones:
-                continue
-            else:
-                recordarray = self._add_empty_record(recordarray,
-                                                     'FROM_' + '_'.join(
-                                                         n.split()),
-                                                     kstpkper, totim)
-        recordarray = self._add_empty_record(recordarray, 'TOTAL_IN',
-                                             kstpkper, totim)
-
-        # Add "out" records
-        if 'STORAGE' in self.record_names:
-            recordarray = self._add_empty_record(recordarray, 'TO_STORAGE',
-                                                 kstpkper, totim)
-        if 'CONSTANT HEAD' in self.record_names:
-            recordarray = self._add_empty_record(recordarray,
-                                                 'TO_CONSTANT_HEAD',
-                                                 kstpkper, totim)
-        for recname in self.ssst_record_names:
-            if recname != 'STORAGE':
-                recordarray = self._add_empty_record(recordarray,
-                                                     'TO_' + '_'.join(
-                                                         recname.split()),
-                                                     kstpkper, totim)
-
-        for n in self._iflow_recnames['name']:
-            if n == 0 and 0 not in self.allzones:
-                continue
-            else:
-                recordarray = self._add_empty_record(recordarray,
-                                                     'TO_' + '_'.join(
-                                                         n.split()), kstpkper,
-                                                     totim)
-        recordarray = self._add_empty_record(recordarray, 'TOTAL_OUT',
-                                             kstpkper, totim)
-
-        recordarray = self._add_empty_record(recordarray, 'IN-OUT', kstpkper,
-                                             totim)
-        recordarray = self._add_empty_record(recordarray,
-                                             'PERCENT_DISCREPANCY', kstpkper,
-                                             totim)
+        nrec = len(self._budget_recnames)
+        recordarray = np.zeros(nrec * len(totim), dtype=dtype)
+        recordarray['totim'] = np.repeat(totim, nrec)
+        recordarray['time_step'] = np.repeat([kk[0] for kk in kstpkper],
+                                             nrec)
+        recordarray['stress_period'] = np.repeat([kk[1] for kk in kstpkper],
+                                                 nrec)
+        recordarray['name'] = np.tile(self._budget_recnames, len(totim))
         return recordarray
 
-    @staticmethod
-    def _filter_circular_flow(fz, tz, f):
+    def _set_budget_index(self):
         """
-
-        Parameters
-        ----------
-        fz
-        tz
-        f
-
-        Returns
-        -------
-
-        """
-        e = np.equal(fz, tz)
-        fz = fz[np.logical_not(e)]
-        tz = tz[np.logical_not(e)]
-        f = f[np.logical_not(e)]
-        return fz, tz, f
-
-    def _update_budget_fromfaceflow(self, fz, tz, f,
-                                    kstpkper=None, totim=None):
-        """
-
-        Parameters
-        ----------
-        fz
-        tz
-        f
-        kstpkper
-        totim
-
-        Returns
-        -------
-
-        """
-
-        # No circular flow within zones
-        fz, tz, f = self._filter_circular_flow(fz, tz, f)
-
-        if len(f) == 0:
-            return
-
-        # Inflows
-        idx = np.logical_not(np.array([item in tz for item in [0] * len(tz)]))
-        fzi = fz[idx]
-        tzi = tz[idx]
-        rownames = np.array(list(['FROM_' +
-                                  self._iflow_recnames[
-                                      self._iflow_recnames['zone'] == z][
-                                      'name'][0]
-                                  for z in fzi]))
-        colnames = np.array(list(
-            [self._iflow_recnames[self._iflow_recnames['zone'] == z]['name'][0]
-             for z in tzi]))
-        fluxes = f[idx]
-        self._update_budget_recordarray(rownames, colnames, fluxes, kstpkper,
-                                        totim)
-
-        # Outflows
-        idx = np.logical_not(np.array([item in fz for item in [0] * len(fz)]))
-        fzi = fz[idx]
-        tzi = tz[idx]
-        rownames = np.array(list(['TO_' +
-                                  self._iflow_recnames[
-                                      self._iflow_recnames['zone'] == z][
-                                      'name'][0]
-                                  for z in tzi]))
-        colnames = np.array(list(
-            [self._iflow_recnames[self._iflow_recnames['zone'] == z]['name'][0]
-             for z in fzi]))
-        fluxes = f[idx]
-        self._update_budget_recordarray(rownames, colnames, fluxes, kstpkper,
-                                        totim)
-        return
-
-    def _update_budget_fromssst(self, fz, tz, f, kstpkper=None, totim=None):
-        """
-
-        Parameters
-        ----------
-        fz
-        tz
-        f
-        kstpkper
-        totim
-
-        Returns
-        -------
-
-        """
-        if len(f) == 0:
-            return
-        self._update_budget_recordarray(fz, tz, f, kstpkper, totim)
-        return
-
-    def _update_budget_recordarray(self, rownames, colnames, fluxes,
-                                   kstpkper=None, totim=None):
-        """
-        Update the budget record array with the flux for the specified
-        flow direction (in/out), record name, and column.
-
-        Parameters
-        ----------
-        rownames
-        colnames
-        fluxes
-        kstpkper
-        totim
+        Set the row and column positions used to scatter the zone flows
+        of a time step into the budget record array.
 
         Returns
         -------
         None
 
         """
-        try:
-
-            if kstpkper is not None:
-                for rn, cn, flux in list(zip(rownames, colnames, fluxes)):
-                    rowidx = np.where(
-                        (self._budget['time_step'] == kstpkper[0]) &
-                        (self._budget['stress_period'] == kstpkper[1]) &
-                        (self._budget['name'] == rn))
-                    self._budget[cn][rowidx] += flux
-            elif totim is not None:
-                for rn, cn, flux in list(zip(rownames, colnames, fluxes)):
-                    rowidx = np.where((self._budget['totim'] == totim) &
-                                      (self._budget['name'] == rn))
-                    self._budget[cn][rowidx] += flux
-
-        except Exception as e:
-            print(e)
-            raise
-        return
-
-    def _accumulate_flow_frf(self, recname, ich, kstpkper, totim):
-        """
-
-        Parameters
-        ----------
-        recname
-        ich
-        kstpkper
-        totim
-
-        Returns
-        -------
-
-        """
-        try:
-            if self.ncol >= 2:
-                data = \
-                    self.cbc.get_data(text=recname, kstpkper=kstpkper,
-                                      totim=totim)[0]
-
-                # "FLOW RIGHT FACE"  COMPUTE FLOW BETWEEN ZONES ACROSS COLUMNS.
-                # COMPUTE FLOW ONLY BETWEEN A ZONE AND A HIGHER ZONE -- FLOW FROM
-                # ZONE 4 TO 3 IS THE NEGATIVE OF FLOW FROM 3 TO 4.
-                # 1ST, CALCULATE FLOW BETWEEN NODE J,I,K AND J-1,I,K
-
-                k, i, j = np.where(
-                    self.izone[:, :, 1:] > self.izone[:, :, :-1])
-
-                # Adjust column values to account for the starting position of "nz"
-                j += 1
-
-                # Define the zone to which flow is going
-                nz = self.izone[k, i, j]
-
-                # Define the zone from which flow is coming
-                jl = j - 1
-                nzl = self.izone[k, i, jl]
-
-                # Get the face flow
-                q = data[k, i, jl]
-
-                # Get indices where flow face values are positive (flow out of higher zone)
-                # Don't include CH to CH flow (can occur if CHTOCH option is used)
-                # Create an iterable tuple of (from zone, to zone, flux)
-                # Then group tuple by (from_zone, to_zone) and sum the flux values
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, i, jl] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzl[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # Get indices where flow face values are negative (flow into higher zone)
-                # Don't include CH to CH flow (can occur if CHTOCH option is used)
-                # Create an iterable tuple of (from zone, to zone, flux)
-                # Then group tuple by (from_zone, to_zone) and sum the flux values
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, i, jl] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nzl[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # FLOW BETWEEN NODE J,I,K AND J+1,I,K
-                k, i, j = np.where(
-                    self.izone[:, :, :-1] > self.izone[:, :, 1:])
-
-                # Define the zone from which flow is coming
-                nz = self.izone[k, i, j]
-
-                # Define the zone to which flow is going
-                jr = j + 1
-                nzr = self.izone[k, i, jr]
-
-                # Get the face flow
-                q = data[k, i, j]
-
-                # Get indices where flow face values are positive (flow out of higher zone)
-                # Don't include CH to CH flow (can occur if CHTOCH option is used)
-                # Create an iterable tuple of (from zone, to zone, flux)
-                # Then group tuple by (from_zone, to_zone) and sum the flux values
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, i, jr] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nzr[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # Get indices where flow face values are negative (flow into higher zone)
-                # Don't include CH to CH flow (can occur if CHTOCH option is used)
-                # Create an iterable tuple of (from zone, to zone, flux)
-                # Then group tuple by (from_zone, to_zone) and sum the flux values
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, i, jr] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzr[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # CALCULATE FLOW TO CONSTANT-HEAD CELLS IN THIS DIRECTION
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[j > 0], i[j > 0], j[j > 0]
-                jl = j - 1
-                nzl = self.izone[k, i, jl]
-                nz = self.izone[k, i, j]
-                q = data[k, i, jl]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, i, jl] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzl[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, i, jl] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzl[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[j < self.ncol - 1], i[j < self.ncol - 1], j[
-                    j < self.ncol - 1]
-                nz = self.izone[k, i, j]
-                jr = j + 1
-                nzr = self.izone[k, i, jr]
-                q = data[k, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, i, jr] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzr[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, i, jr] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzr[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-        except Exception as e:
-            print(e)
-            raise
-        return
-
-    def _accumulate_flow_fff(self, recname, ich, kstpkper, totim):
-        """
-
-        Parameters
-        ----------
-        recname
-        ich
-        kstpkper
-        totim
-
-        Returns
-        -------
-
-        """
-        try:
-            if self.nrow >= 2:
-                data = \
-                    self.cbc.get_data(text=recname, kstpkper=kstpkper,
-                                      totim=totim)[0]
-
-                # "FLOW FRONT FACE"
-                # CALCULATE FLOW BETWEEN NODE J,I,K AND J,I-1,K
-                k, i, j = np.where(
-                    self.izone[:, 1:, :] < self.izone[:, :-1, :])
-                i += 1
-                ia = i - 1
-                nza = self.izone[k, ia, j]
-                nz = self.izone[k, i, j]
-                q = data[k, ia, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, ia, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, ia, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nza[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # CALCULATE FLOW BETWEEN NODE J,I,K AND J,I+1,K.
-                k, i, j = np.where(
-                    self.izone[:, :-1, :] < self.izone[:, 1:, :])
-                nz = self.izone[k, i, j]
-                ib = i + 1
-                nzb = self.izone[k, ib, j]
-                q = data[k, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, ib, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nzb[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, ib, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # CALCULATE FLOW TO CONSTANT-HEAD CELLS IN THIS DIRECTION
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[i > 0], i[i > 0], j[i > 0]
-                ia = i - 1
-                nza = self.izone[k, ia, j]
-                nz = self.izone[k, i, j]
-                q = data[k, ia, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, ia, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, ia, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[i < self.nrow - 1], i[i < self.nrow - 1], j[
-                    i < self.nrow - 1]
-                nz = self.izone[k, i, j]
-                ib = i + 1
-                nzb = self.izone[k, ib, j]
-                q = data[k, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[k, ib, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[k, ib, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-        except Exception as e:
-            print(e)
-            raise
+        # Position of each cell's zone in the sorted list of all zones
+        if self.flowja_name is not None:
+            ia, ja = self.grb.get_connectivity()
+            nodes = None
+            idomain = self.grb.get_idomain()
+            if idomain is not None and len(ia) - 1 < self.izone.size:
+                # FLOW-JA-FACE is stored for the active (reduced) cells
+                nodes = np.flatnonzero(np.asarray(idomain).ravel() > 0)
+            self.topology = ZoneTopology(self.izone, ia=ia, ja=ja,
+                                         nodes=nodes)
+        else:
+            self.topology = ZoneTopology(self.izone)
+        self._zone_index = self.topology.zone_index
+        self._zone_cols = np.array([self.allzones.index(z) for z in
+                                    self._zonenamedict.keys()], dtype=int)
+
+        # All time steps share the same record names in the same order
+        self._budget_rows = OrderedDict()
+        for idx, name in enumerate(self._budget_recnames):
+            if name not in self._budget_rows:
+                self._budget_rows[name] = idx
+        self._in_rows = [idx for idx, name in enumerate(self._budget_recnames)
+                         if name.startswith('FROM_')]
+        self._out_rows = [idx for idx, name in
+                          enumerate(self._budget_recnames)
+                          if name.startswith('TO_')]
+
+        # Internal flow records of the zones that are in the zone array
+        iflow = [(z, n) for z, n in self._iflow_recnames
+                 if z in self.allzones]
+        self._iflow_zones = np.array([self.allzones.index(z) for z, n in
+                                      iflow], dtype=int)
+        self._iflow_from_rows = np.array(
+            [self._budget_rows['FROM_' + '_'.join(n.split())]
+             for z, n in iflow], dtype=int)
+        self._iflow_to_rows = np.array(
+            [self._budget_rows['TO_' + '_'.join(n.split())]
+             for z, n in iflow], dtype=int)
         return
 
-    def _accumulate_flow_flf(self, recname, ich, kstpkper, totim):
+    def _get_ssst_flows(self, recname, kstpkper, totim, cache=None):
         """
+        Sum the inflows and outflows of a source/sink or storage record
+        by zone.
 
         Parameters
         ----------
-        recname
-        ich
-        kstpkper
-        totim
+        recname : str
+            Record name.
+        kstpkper : tuple
+            Tuple of kstp and kper to compute budget for (default is None).
+        totim : float
+            Totim to compute budget for (default is None).
+        cache : dict
+            Records of the time step that have already been read, shared
+            by the zone budgets computed together. (Default is None.)
 
         Returns
         -------
+        qin, qout : ndarray
+            Inflow and (positive) outflow for each zone in allzones, or
+            None if the record is empty.
 
         """
-        try:
-            if self.nlay >= 2:
-                data = \
-                    self.cbc.get_data(text=recname, kstpkper=kstpkper,
-                                      totim=totim)[0]
-
-                # "FLOW LOWER FACE"
-                # CALCULATE FLOW BETWEEN NODE J,I,K AND J,I,K-1
-                k, i, j = np.where(
-                    self.izone[1:, :, :] < self.izone[:-1, :, :])
-                k += 1
-                ka = k - 1
-                nza = self.izone[ka, i, j]
-                nz = self.izone[k, i, j]
-                q = data[ka, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[ka, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[ka, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nza[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # CALCULATE FLOW BETWEEN NODE J,I,K AND J,I,K+1
-                k, i, j = np.where(
-                    self.izone[:-1, :, :] < self.izone[1:, :, :])
-                nz = self.izone[k, i, j]
-                kb = k + 1
-                nzb = self.izone[kb, i, j]
-                q = data[k, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[kb, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nz[idx],
-                                               nzb[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[kb, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                self._update_budget_fromfaceflow(fzi, tzi, np.abs(fi),
-                                                 kstpkper, totim)
-
-                # CALCULATE FLOW TO CONSTANT-HEAD CELLS IN THIS DIRECTION
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[k > 0], i[k > 0], j[k > 0]
-                ka = k - 1
-                nza = self.izone[ka, i, j]
-                nz = self.izone[k, i, j]
-                q = data[ka, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[ka, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[ka, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nza[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                k, i, j = np.where(ich == 1)
-                k, i, j = k[k < self.nlay - 1], i[k < self.nlay - 1], j[
-                    k < self.nlay - 1]
-                nz = self.izone[k, i, j]
-                kb = k + 1
-                nzb = self.izone[kb, i, j]
-                q = data[k, i, j]
-                idx = np.where(
-                    (q > 0) & ((ich[k, i, j] != 1) | (ich[kb, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                tz = tzi[tzi != 0]
-                f = fi[tzi != 0]
-                fz = np.array(['FROM_CONSTANT_HEAD'] * len(tz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-                idx = np.where(
-                    (q < 0) & ((ich[k, i, j] != 1) | (ich[kb, i, j] != 1)))
-                fzi, tzi, fi = sum_flux_tuples(nzb[idx],
-                                               nz[idx],
-                                               q[idx])
-                fz = fzi[fzi != 0]
-                f = fi[fzi != 0]
-                fz = np.array(['TO_CONSTANT_HEAD'] * len(fz))
-                tz = np.array([self._zonenamedict[z] for z in tzi[tzi != 0]])
-                self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper,
-                                             totim)
-
-        except Exception as e:
-            print(e)
-            raise
-        return
-
-    def _accumulate_flow_ssst(self, recname, kstpkper, totim):
-
-        # NOT AN INTERNAL FLOW TERM, SO MUST BE A SOURCE TERM OR STORAGE
-        # ACCUMULATE THE FLOW BY ZONE
-
         imeth = self.imeth[recname]
 
-        data = self.cbc.get_data(text=recname, kstpkper=kstpkper,
-                                 totim=totim)
-        if len(data) == 0:
+        records = self._get_records(recname, kstpkper, totim, cache=cache)
+        if len(records) == 0:
             # Empty data, can occur during the first time step of a transient model when
             # storage terms are zero and not in the cell-budget file.
-            return
-        else:
-            data = data[0]
-
-        if imeth == 2 or imeth == 5:
-            # LIST
-            qin = np.ma.zeros((self.nlay * self.nrow * self.ncol),
-                              self.float_type)
-            qout = np.ma.zeros((self.nlay * self.nrow * self.ncol),
-                               self.float_type)
-            for [node, q] in zip(data['node'], data['q']):
-                idx = node - 1
-                if q > 0:
-                    qin.data[idx] += q
-                elif q < 0:
-                    qout.data[idx] += q
-            qin = np.ma.reshape(qin, (self.nlay, self.nrow, self.ncol))
-            qout = np.ma.reshape(qout, (self.nlay, self.nrow, self.ncol))
-        elif imeth == 0 or imeth == 1:
-            # FULL 3-D ARRAY
-            qin = np.ma.zeros(self.cbc_shape, self.float_type)
-            qout = np.ma.zeros(self.cbc_shape, self.float_type)
-            qin[data > 0] = data[data > 0]
-            qout[data < 0] = data[data < 0]
-        elif imeth == 3:
-            # 1-LAYER ARRAY WITH LAYER INDICATOR ARRAY
-            rlay, rdata = data[0], data[1]
-            data = np.ma.zeros(self.cbc_shape, self.float_type)
-            for (r, c), l in np.ndenumerate(rlay):
-                data[l - 1, r, c] = rdata[r, c]
-            qin = np.ma.zeros(self.cbc_shape, self.float_type)
-            qout = np.ma.zeros(self.cbc_shape, self.float_type)
-            qin[data > 0] = data[data > 0]
-            qout[data < 0] = data[data < 0]
-        elif imeth == 4:
-            # 1-LAYER ARRAY THAT DEFINES LAYER 1
-            qin = np.ma.zeros(self.cbc_shape, self.float_type)
-            qout = np.ma.zeros(self.cbc_shape, self.float_type)
-            r, c = np.where(data > 0)
-            qin[0, r, c] = data[r, c]
-            r, c = np.where(data < 0)
-            qout[0, r, c] = data[r, c]
-        else:
-            # Should not happen
-            raise Exception(
-                'Unrecognized "imeth" for {} record: {}'.format(recname,
-                                                                imeth))
-
-        # Inflows
-        fz = []
-        tz = []
-        f = []
-        for z in self.allzones:
-            if z != 0:
-                flux = qin[(self.izone == z)].sum()
-                if type(flux) == np.ma.core.MaskedConstant:
-                    flux = 0.
-                fz.append('FROM_' + '_'.join(recname.split()))
-                tz.append(self._zonenamedict[z])
-                f.append(flux)
-        fz = np.array(fz)
-        tz = np.array(tz)
-        f = np.array(f)
-        self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper, totim)
-
-        # Outflows
-        fz = []
-        tz = []
-        f = []
-        for z in self.allzones:
-            if z != 0:
-                flux = qout[(self.izone == z)].sum()
-                if type(flux) == np.ma.core.MaskedConstant:
-                    flux = 0.
-                fz.append('TO_' + '_'.join(recname.split()))
-                tz.append(self._zonenamedict[z])
-                f.append(flux)
-        fz = np.array(fz)
-        tz = np.array(tz)
-        f = np.array(f)
-        self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper, totim)
-
-        return
-
-    def _compute_mass_balance(self, kstpkper, totim):
-        # Returns a record array with total inflow, total outflow,
-        # and percent error summed by column.
-        skipcols = ['time_step', 'stress_period', 'totim', 'name']
-
-        # Compute inflows
-        recnames = self.get_record_names()
-        innames = [n for n in recnames if n.startswith('FROM_')]
-        outnames = [n for n in recnames if n.startswith('TO_')]
-        if kstpkper is not None:
-            rowidx = np.where((self._budget['time_step'] == kstpkper[0]) &
-                              (self._budget['stress_period'] == kstpkper[1]) &
-                              np.in1d(self._budget['name'], innames))
-        elif totim is not None:
-            rowidx = np.where((self._budget['totim'] == totim) &
-                              np.in1d(self._budget['name'], innames))
-        a = _numpyvoid2numeric(
-            self._budget[list(self._zonenamedict.values())][rowidx])
-        intot = np.array(a.sum(axis=0))
-        tz = np.array(
-            list([n for n in self._budget.dtype.names if n not in skipcols]))
-        fz = np.array(['TOTAL_IN'] * len(tz))
-        self._update_budget_fromssst(fz, tz, intot, kstpkper, totim)
-
-        # Compute outflows
-        if kstpkper is not None:
-            rowidx = np.where((self._budget['time_step'] == kstpkper[0]) &
-                              (self._budget['stress_period'] == kstpkper[1]) &
-                              np.in1d(self._budget['name'], outnames))
-        elif totim is not None:
-            rowidx = np.where((self._budget['totim'] == totim) &
-                              np.in1d(self._budget['name'], outnames))
-        a = _numpyvoid2numeric(
-            self._budget[list(self._zonenamedict.values())][rowidx])
-        outot = np.array(a.sum(axis=0))
-        tz = np.array(
-            list([n for n in self._budget.dtype.names if n not in skipcols]))
-        fz = np.array(['TOTAL_OUT'] * len(tz))
-        self._update_budget_fromssst(fz, tz, outot, kstpkper, totim)
-
-        # Compute IN-OUT
-        tz = np.array(
-            list([n for n in self._budget.dtype.names if n not in skipcols]))
-        f = intot - outot
-        fz = np.array(['IN-OUT'] * len(tz))
-        self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper, totim)
-
-        # Compute percent discrepancy
-        tz = np.array(
-            list([n for n in self._budget.dtype.names if n not in skipcols]))
-        fz = np.array(['PERCENT_DISCREPANCY'] * len(tz))
-        in_minus_out = intot - outot
-        in_plus_out = intot + outot
-        f = 100 * in_minus_out / (in_plus_out / 2.)
-        self._update_budget_fromssst(fz, tz, np.abs(f), kstpkper, totim)
-
-        return
+            return None, None
+
+        zones = []
+        q = []
+        for data in records:
+            if imeth == 2 or imeth == 5 or imeth == 6:
+                # LIST
+                zones.append(self._zone_index.ravel()[data['node'] - 1])
+                q.append(np.asarray(data['q']))
+            elif imeth == 0 or imeth == 1:
+                # FULL 3-D ARRAY
+                zones.append(self._zone_index.ravel())
+                q.append(np.asarray(data).ravel())
+            elif imeth == 3:
+                # 1-LAYER ARRAY WITH LAYER INDICATOR ARRAY
+                rlay, rdata = np.asarray(data[0]), np.asarray(data[1])
+                r, c = np.indices(rdata.shape)
+                zones.append(self._zone_index[rlay - 1, r, c].ravel())
+                q.append(rdata.ravel())
+            elif imeth == 4:
+                # 1-LAYER ARRAY THAT DEFINES LAYER 1
+                zones.append(self._zone_index[0].ravel())
+                q.append(np.asarray(data).ravel())
+            else:
+                # Should not happen
+                raise Exception(
+                    'Unrecognized "imeth" for {} record: {}'.format(recname,
+                                                                    imeth))
+        zones = np.concatenate(zones)
+        q = np.concatenate(q)
+
+        nzones = len(self.allzones)
+        qin = np.bincount(zones, weights=np.where(q > 0, q, 0.),
+                          minlength=nzones)
+        qout = np.bincount(zones, weights=np.where(q < 0, -q, 0.),
+                           minlength=nzones)
+        return qin, qout
 
     def _clean_budget_names(self, names):
         newnames = []
@@ -1478,6 +1028,359 @@ class ZoneBudget(object):
         return newobj
 
 
+class ZoneTopology(object):
+    """
+    Zone-boundary faces and constant-head cell faces of a structured zone
+    array. The faces between zones, the zones on either side and the
+    (from zone, to zone) keys of the flow across them are computed once and
+    reused for every time step, so the face flows of a time step only need
+    to be gathered at the zone-boundary faces.
+
+    Parameters
+    ----------
+    izone : ndarray
+        Integer zone array (nlay, nrow, ncol).
+    ich : ndarray
+        Array flagging the constant-head cells with a 1. The faces for
+        other constant-head arrays are computed and cached when they are
+        first used. (Default is None.)
+    ia : ndarray
+        Zero-based index of the first connection of each cell in ja, for
+        unstructured (FLOW-JA-FACE) flows. (Default is None.)
+    ja : ndarray
+        Zero-based cell number of each connection. (Default is None.)
+    nodes : ndarray
+        Zero-based node number in izone of each cell in ia, if the
+        connectivity only includes the active cells. (Default is None.)
+
+    Attributes
+    ----------
+    zones : list of ints
+        Sorted zone numbers.
+    zone_index : ndarray
+        Position of the zone of each cell in zones.
+
+    Examples
+    --------
+
+    >>> from flopy.utils.zonbud import ZoneTopology
+    >>> topo = ZoneTopology(izone)
+    >>> keys, fluxes = topo.get_face_flow_keys(frf, axis=2)
+    >>> zoneflow = np.bincount(keys, weights=fluxes,
+    ...                        minlength=topo.nzones * (topo.nzones + 2))
+
+    >>> ia, ja = MfGrdFile('model.disv.grb').get_connectivity()
+    >>> topo = ZoneTopology(izone, ia=ia, ja=ja)
+    >>> keys, fluxes = topo.get_connection_flow_keys(flowja)
+
+    """
+
+    def __init__(self, izone, ich=None, ia=None, ja=None, nodes=None):
+        self.izone = izone
+        self.shape = izone.shape
+        self.zones = [z for z in np.unique(izone)]
+        self.nzones = len(self.zones)
+        self.zone_index = np.searchsorted(self.zones, izone)
+        self._zone_flat = self.zone_index.ravel()
+        self._strides = [self.shape[1] * self.shape[2], self.shape[2], 1]
+
+        # Low side cell of the faces between two zones for each axis
+        self._zone_faces = []
+        for axis in range(3):
+            lo = [slice(None)] * 3
+            hi = [slice(None)] * 3
+            lo[axis] = slice(None, -1)
+            hi[axis] = slice(1, None)
+            k, i, j = np.nonzero(izone[tuple(lo)] != izone[tuple(hi)])
+            self._zone_faces.append(
+                np.ravel_multi_index((k, i, j), self.shape))
+
+        # Connections between cells in different zones. FLOW-JA-FACE is
+        # positive for flow into cell n from cell ja, so the key of each
+        # connection is from zone (ja) to zone (n)
+        self._connections = None
+        if ia is not None:
+            zones = self._zone_flat
+            if nodes is not None:
+                zones = zones[nodes]
+            n = np.repeat(np.arange(len(ia) - 1), np.diff(ia))
+            zn = zones[n]
+            zm = zones[ja]
+            idx = np.flatnonzero(zn != zm)
+            self._connections = (idx, zm[idx] * self.nzones + zn[idx])
+
+        self._faces = {}
+        if ich is not None:
+            self.get_faces(0, ich)
+        return
+
+    def _get_ich_key(self, ich):
+        if ich is None:
+            return b''
+        return np.flatnonzero(np.asarray(ich) == 1).tobytes()
+
+    def get_faces(self, axis, ich=None):
+        """
+        Get the faces along an axis that carry internal flow terms.
+
+        Parameters
+        ----------
+        axis : int
+            Axis of the face flow (0 = lower, 1 = front, 2 = right face).
+        ich : ndarray
+            Array flagging the constant-head cells with a 1
+            (default is None).
+
+        Returns
+        -------
+        node : ndarray
+            Zero-based node number of the cell on the low side of each
+            face, which is where the face flow is stored.
+        kpos : ndarray
+            Key of each face for positive (low to high index cell) flow.
+        kneg : ndarray
+            Key of each face for negative flow.
+
+        """
+        key = self._get_ich_key(ich)
+        faces = self._faces.get(key)
+        if faces is None:
+            faces = [self._build_faces(ax, ich) for ax in range(3)]
+            self._faces[key] = faces
+        return faces[axis]
+
+    def _build_faces(self, axis, ich):
+        nzones = self.nzones
+        nzz = nzones * nzones
+        stride = self._strides[axis]
+        zones = self._zone_flat
+
+        # Flow between zones. Don't include CH to CH flow (can occur if
+        # CHTOCH option is used)
+        na = self._zone_faces[axis]
+        nb = na + stride
+        if ich is not None:
+            ichflat = np.asarray(ich).ravel() == 1
+            keep = ~(ichflat[na] & ichflat[nb])
+            na, nb = na[keep], nb[keep]
+        nodes = [na]
+        kpos = [zones[na] * nzones + zones[nb]]
+        kneg = [zones[nb] * nzones + zones[na]]
+
+        # Flow to and from constant-head cells, credited to the zone of
+        # the constant-head cell. Direction 0 is flow from and 1 is flow
+        # to the constant-head cells of the zone
+        if ich is not None:
+            ch = np.flatnonzero(ichflat)
+            pos = np.unravel_index(ch, self.shape)[axis]
+
+            # constant-head cell on the high side of the face
+            nb = ch[pos > 0]
+            na = nb - stride
+            keep = ~ichflat[na]
+            na, nb = na[keep], nb[keep]
+            nodes.append(na)
+            kpos.append(nzz + 2 * zones[nb] + 1)
+            kneg.append(nzz + 2 * zones[nb])
+
+            # constant-head cell on the low side of the face
+            na = ch[pos < self.shape[axis] - 1]
+            nb = na + stride
+            keep = ~ichflat[nb]
+            na, nb = na[keep], nb[keep]
+            nodes.append(na)
+            kpos.append(nzz + 2 * zones[na])
+            kneg.append(nzz + 2 * zones[na] + 1)
+
+        return np.concatenate(nodes), np.concatenate(kpos), \
+               np.concatenate(kneg)
+
+    def get_face_flow_keys(self, data, axis, ich=None):
+        """
+        Encode the flows across the cell faces along an axis as integer
+        keys into the zone-to-zone and constant-head flow arrays.
+
+        Parameters
+        ----------
+        data : ndarray
+            Face flow array (nlay, nrow, ncol) from the cell budget file.
+        axis : int
+            Axis of the face flow (0 = lower, 1 = front, 2 = right face).
+        ich : ndarray
+            Array flagging the constant-head cells with a 1
+            (default is None).
+
+        Returns
+        -------
+        keys : ndarray
+            Integer keys. Keys less than nzones * nzones are
+            from_zone * nzones + to_zone. The remaining keys are
+            nzones * nzones + 2 * zone + direction, where direction is 0
+            for flow from and 1 for flow to the constant-head cells of zone.
+            Zones are positions in zones.
+        fluxes : ndarray
+            Absolute value of the flow for each key.
+
+        """
+        nodes, kpos, kneg = self.get_faces(axis, ich)
+        q = np.asarray(data).ravel()[nodes]
+        idx = q != 0
+        q = q[idx]
+        keys = np.where(q > 0, kpos[idx], kneg[idx])
+        return keys, np.abs(q)
+
+    def get_connection_flow_keys(self, flowja):
+        """
+        Encode the flows between cells in different zones from a
+        FLOW-JA-FACE record as integer (from zone, to zone) keys. Each
+        connection is stored twice in FLOW-JA-FACE with opposite signs, so
+        only the positive (inflow) half is used.
+
+        Parameters
+        ----------
+        flowja : ndarray
+            FLOW-JA-FACE record (nja).
+
+        Returns
+        -------
+        keys : ndarray
+            from_zone * nzones + to_zone for each flow, where the zones are
+            positions in zones.
+        fluxes : ndarray
+            Flow for each key.
+
+        """
+        if self._connections is None:
+            raise Exception('ZoneTopology was not built with ia and ja.')
+        idx, keys = self._connections
+        q = np.asarray(flowja).ravel()[idx]
+        pos = q > 0
+        return keys[pos], q[pos]
+
+
+def zone_budgets(cbc_file, zone_arrays, kstpkper=None, totim=None,
+                 aliases=None, verbose=False, n_workers=1, **kwargs):
+    """
+    Compute the zone budgets of several zone arrays with a single pass over
+    the cell budget file. Each record of a time step is read once and
+    scattered into all of the zone arrays.
+
+    Parameters
+    ----------
+    cbc_file : str or CellBudgetFile object
+        The file name or CellBudgetFile object for which budgets will be
+        computed.
+    zone_arrays : list of ndarrays or ndarray
+        The zone arrays. An ndarray is treated as a stack of zone arrays
+        along its first axis.
+    kstpkper : tuple of ints or list of tuples
+        The time steps and stress periods (kstp, kper), zero based.
+    totim : float or list of floats
+        The simulation times.
+    aliases : dict or list of dicts
+        Zone aliases used for all of the zone arrays, or one dictionary
+        for each zone array.
+    verbose : bool
+        Print the time step being processed. (Default is False.)
+    n_workers : int
+        Number of threads used to compute the time steps. (Default is 1.)
+    **kwargs : keyword arguments
+        Other ZoneBudget keyword arguments (model, dis, sr, grb).
+
+    Returns
+    -------
+    zbs : list of ZoneBudget objects
+        Zone budget for each zone array.
+
+    Examples
+    --------
+
+    >>> from flopy.utils.zonbud import zone_budgets, read_zbarray
+    >>> zons = [read_zbarray('aquifers.zbr'), read_zbarray('counties.zbr')]
+    >>> zb_aquifers, zb_counties = zone_budgets('zonebudtest.cbc', zons)
+    >>> zb_counties.to_csv('counties.csv')
+
+    """
+    if 'grb' in kwargs.keys() and not isinstance(kwargs['grb'], MfGrdFile):
+        kwargs['grb'] = MfGrdFile(kwargs['grb'])
+    if not isinstance(aliases, (list, tuple)):
+        aliases = [aliases] * len(zone_arrays)
+    if len(aliases) != len(zone_arrays):
+        raise Exception('The number of aliases ({}) does not match the '
+                        'number of zone arrays ({}).'.format(
+                         len(aliases), len(zone_arrays)))
+
+    zbs = []
+    for z, a in zip(zone_arrays, aliases):
+        zb = ZoneBudget._without_budgets(cbc_file, z, kstpkper=kstpkper,
+                                         totim=totim, aliases=a, **kwargs)
+        cbc_file = zb.cbc
+        zbs.append(zb)
+
+    _compute_budgets(zbs, n_workers=n_workers, verbose=verbose)
+    return zbs
+
+
+def _compute_budgets(zbs, n_workers=1, verbose=False):
+    """
+    Compute the budgets of all of the requested time steps for zone
+    budgets that share a cell budget file and time steps. The records of a
+    time step are read once and shared by all of the zone budgets. The
+    results of each time step are written directly into its block of the
+    budget record arrays, so the time steps can be computed in any order by
+    a pool of threads.
+
+    Parameters
+    ----------
+    zbs : list of ZoneBudget objects
+        Zone budgets to compute.
+    n_workers : int
+        Number of threads. (Default is 1.)
+    verbose : bool
+        Print the time step being processed. (Default is False.)
+
+    Returns
+    -------
+    None
+
+    """
+    zb0 = zbs[0]
+    if zb0.kstpkper is not None:
+        times = [(itime, kk, None) for itime, kk in enumerate(zb0.kstpkper)]
+    else:
+        times = [(itime, None, t) for itime, t in enumerate(zb0.totim)]
+
+    def compute(args):
+        itime, kstpkper, totim = args
+        if verbose:
+            if kstpkper is not None:
+                s = 'Computing the budget for' \
+                    ' time step {} in stress period {}'.format(
+                    kstpkper[0] + 1, kstpkper[1] + 1)
+            else:
+                s = 'Computing the budget for time {}'.format(totim)
+            print(s)
+        cache = None
+        if len(zbs) > 1:
+            cache = {}
+        for zb in zbs:
+            zb._compute_budget(kstpkper=kstpkper, totim=totim, itime=itime,
+                               cache=cache)
+
+    if n_workers is None or n_workers <= 1 or len(times) <= 1:
+        for args in times:
+            compute(args)
+    else:
+        pool = ThreadPool(min(n_workers, len(times)))
+        try:
+            pool.map(compute, times)
+        finally:
+            pool.close()
+            pool.join()
+        ThreadLocalFile.close(zb0.cbc, finished_threads=True)
+    return
+
+
 def _numpyvoid2numeric(a):
     # The budget record array has multiple dtypes and a slice returns
     # the flexible-type numpy.void which must be converted to a numeric